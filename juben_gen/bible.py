@@ -11,46 +11,121 @@ from __future__ import annotations
 
 import json
 import logging
+import pickle
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 
+from . import jsonio
+from .cache import ResponseCache, cache_disabled_by_env, cache_key, cache_root, llm_cache_key
 from .config import AppConfig, RoleConfig, maybe_load_config
-from .docx_io import read_docx_lines
-from .llm_clients import ClaudeClient, LLMResponse
-from .novel import Chapter, load_chapters, select_chapter_range, split_chapters
+from .docx_io import read_docx_text
+from .fileio import write_bytes_atomic
+from .llm_clients import ClaudeClient
+from .novel import (
+    Chapter,
+    load_chapters,
+    select_chapter_range,
+    split_chapters,
+)
 from .prompts import build_system_prompt, load_fused_constraints, prompt_story_bible
 from .rules import AdaptRules
+from .semantic_cache import SemanticCache
 from .text_io import read_text_auto
 
 logger = logging.getLogger(__name__)
 
+# Bible 请求的输出上限（同时计入响应缓存 key）
+_BIBLE_MAX_TOKENS = 8192
+
 
 def load_novel_text(path: str | Path) -> str:
     """根据后缀加载小说全文（TXT 或 DOCX）。"""
     p = Path(path)
     suffix = p.suffix.lower()
     if suffix == ".docx":
-        return "\n".join(read_docx_lines(p))
+        return read_docx_text(p)
     # 默认按纯文本处理（.txt 及其他）
     return read_text_auto(p)
 
 
+# 进程内章节缓存：(绝对路径, st_mtime_ns, st_size) -> 章节列表
+_CHAPTERS_MEMO: Dict[Tuple[str, int, int], List[Chapter]] = {}
+# 磁盘缓存格式版本（Chapter 结构或拆分规则变化时递增）
+_CHAPTERS_PICKLE_VERSION = "2"
+
+
+def load_novel_chapters(path: str | Path) -> List[Chapter]:
+    """加载小说并按章节拆分，结果按文件 (路径, mtime, size) 缓存。
+
+    两层缓存：
+    - 进程内 dict：同一进程内多次调用直接返回
+    - 磁盘 pickle：``<cache_root>/novels/<sha>.pkl``，重复运行免去 DOCX 解析
+      （设置 JUBEN_GEN_NO_CACHE=1 时跳过磁盘层）
+
+    文件被修改（mtime 或大小变化）后自动失效。
+
+    无论是否启用磁盘缓存都拆分全书，保证不同缓存模式下得到的章节列表一致。
+    """
+    p = Path(path).resolve()
+    st = p.stat()
+    memo_key = (str(p), st.st_mtime_ns, st.st_size)
+    chapters = _CHAPTERS_MEMO.get(memo_key)
+    if chapters is not None:
+        return chapters
+
+    use_disk = not cache_disabled_by_env()
+    pkl = cache_root() / "novels" / (
+        cache_key(_CHAPTERS_PICKLE_VERSION, *map(str, memo_key)) + ".pkl"
+    )
+    if use_disk:
+        try:
+            with pkl.open("rb") as f:
+                chapters = pickle.load(f)
+            logger.info("命中章节缓存：%s", p.name)
+        except FileNotFoundError:
+            pass
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError) as e:
+            logger.warning("读取章节缓存失败（%s）：%s", pkl, e)
+
+    if chapters is None:
+        chapters = split_chapters(load_novel_text(p))
+        if use_disk:
+            try:
+                write_bytes_atomic(pkl, pickle.dumps(chapters, protocol=pickle.HIGHEST_PROTOCOL))
+            except OSError as e:
+                logger.warning("写入章节缓存失败（%s）：%s", pkl, e)
+
+    _CHAPTERS_MEMO[memo_key] = chapters
+    return chapters
+
+
 def extract_chapter_text(
     novel_path: str | Path,
     chapter_start: int,
     chapter_end: int,
+    *,
+    chapters: Optional[List[Chapter]] = None,
 ) -> str:
     """加载小说并提取指定章节范围的文本。
 
+    章节拆分结果经 load_novel_chapters 缓存，不同章节范围的重复调用不会重新解析文件。
+
+    按标题中的章节编号（第N章）选取 [chapter_start, chapter_end]，假定全书章节编号递增且不重复；
+    分卷重新编号（每卷都从第1章开始）的小说会把各卷同号章节一并选中，目录页中的章节标题也会被当作章节。
+
+    Parameters
+    ----------
+    chapters : 调用方已拆分好的章节列表；提供时不再读取 novel_path
+
     Returns
     -------
     拼接后的章节文本（含章节标题）。
     """
-    full_text = load_novel_text(novel_path)
-    chapters = split_chapters(full_text)
+    if chapters is None:
+        chapters = load_novel_chapters(novel_path)
     if not chapters:
         logger.warning("未检测到章节标记（第N章），将使用全文")
-        return full_text
+        return load_novel_text(novel_path)
 
     selected = select_chapter_range(chapters, chapter_start, chapter_end)
     if not selected:
@@ -60,7 +135,12 @@ def extract_chapter_text(
         )
 
     logger.info("已选择 %d 个章节（第%d章 ~ 第%d章）", len(selected), selected[0].index, selected[-1].index)
-    return "\n\n".join(f"{ch.title}\n{ch.text}" for ch in selected)
+    # 标题/正文/分隔符直接进同一个列表，一次 join，避免每章先拼一个中间字符串
+    parts: List[str] = []
+    for ch in selected:
+        parts.extend((ch.title, "\n", ch.text, "\n\n"))
+    parts.pop()  # 去掉末尾多余的分隔符
+    return "".join(parts)
 
 
 def generate_bible(
@@ -72,6 +152,8 @@ def generate_bible(
     config: Optional[AppConfig] = None,
     constraints_path: str = "juben_gen/constraints.fused.json",
     sample_bible_json: str = "",
+    use_cache: bool = True,
+    chapters: Optional[List[Chapter]] = None,
 ) -> Dict:
     """执行完整的 Story Bible 生成流程。
 
@@ -83,6 +165,8 @@ def generate_bible(
     config : 应用配置，为 None 时使用默认配置
     constraints_path : 融合约束 JSON 路径
     sample_bible_json : 样例 Bible JSON 字符串（few-shot），为空则跳过
+    use_cache : 是否启用磁盘缓存（prompt + 模型不变时跳过 API 调用）
+    chapters : 预先拆分好的章节列表（如 cmd_generate 开头已加载），为 None 时从 novel_path 读取
 
     Returns
     -------
@@ -92,7 +176,7 @@ def generate_bible(
     role_cfg: RoleConfig = cfg.roles["bible"]
 
     # 1. 提取章节文本
-    novel_excerpt = extract_chapter_text(novel_path, chapter_start, chapter_end)
+    novel_excerpt = extract_chapter_text(novel_path, chapter_start, chapter_end, chapters=chapters)
 
     # 2. 加载融合约束（用于 system prompt）
     constraints = None
@@ -107,36 +191,115 @@ def generate_bible(
         sample_bible_json=sample_bible_json,
     )
 
-    # 4. 调用 Claude API
+    # 4. 查缓存：system + user prompt + 模型完全一致时直接复用
+    cache = ResponseCache("bible", enabled=use_cache)
+    key = llm_cache_key(
+        system, user_msg,
+        model=role_cfg.model,
+        max_tokens=_BIBLE_MAX_TOKENS,
+        thinking=role_cfg.thinking,
+        budget_tokens=role_cfg.budget_tokens,
+    )
+    cached = cache.get(key)
+    if cached is not None:
+        return jsonio.loads(cached)
+
+    # 精确未命中时，按小说片段做语义近似查找（同一章节范围的原文只改了个别字时复用）
+    sem_cache: Optional[SemanticCache] = None
+    sem_vector = None
+    sem_scope: Optional[Dict] = None
+    if cache.enabled and cfg.cache.semantic:
+        sem_cache = SemanticCache(cache_root() / "bible_semantic.json")
+        sem_vector = sem_cache.embed(novel_excerpt)
+        # 向量只看片段开头：章节范围、片段长度、除片段外的整份 prompt（system / 规则 / 样例 / 生成参数）
+        # 必须完全一致才允许复用
+        prompt_rest = prompt_story_bible(rules=rules, novel_excerpt="", sample_bible_json=sample_bible_json)
+        sem_scope = {
+            "chapters": [chapter_start, chapter_end],
+            "excerpt_chars": len(novel_excerpt),
+            "prompt": llm_cache_key(
+                system, prompt_rest,
+                model=role_cfg.model,
+                max_tokens=_BIBLE_MAX_TOKENS,
+                thinking=role_cfg.thinking,
+                budget_tokens=role_cfg.budget_tokens,
+            ),
+        }
+        hit = sem_cache.lookup(
+            sem_vector, model=role_cfg.model, threshold=cfg.cache.semantic_threshold, scope=sem_scope
+        )
+        if hit is not None:
+            cached = cache.get(hit[0])
+            if cached is not None:
+                logger.info("命中 bible 语义缓存（相似度=%.4f）", hit[1])
+                return jsonio.loads(cached)
+
+    # 5. 调用 Claude API
     client = ClaudeClient(
         max_attempts=cfg.retry.max_attempts,
         base_delay=cfg.retry.base_delay,
     )
-    logger.info("调用 Claude API（bible 角色，模型=%s）", role_cfg.model)
-    response: LLMResponse = client.chat(
+    logger.info("调用 Claude API（bible 角色，模型=%s，流式）", role_cfg.model)
+    text = _collect_bible_stream(client.chat_stream(
         model=role_cfg.model,
         system=system,
         messages=[{"role": "user", "content": user_msg}],
         thinking=role_cfg.thinking,
         budget_tokens=role_cfg.budget_tokens,
-        max_tokens=8192,
-    )
+        max_tokens=_BIBLE_MAX_TOKENS,
+    ))
 
-    # 5. 解析 JSON
-    bible = _parse_bible_json(response.text)
+    # 6. 解析 JSON
+    bible = _parse_bible_json(text)
     logger.info("Story Bible 生成完成：logline=%s", bible.get("logline", "")[:50])
+    cache.put(key, json.dumps(bible, ensure_ascii=False))
+    if sem_cache is not None:
+        sem_cache.add(sem_vector, key=key, model=role_cfg.model, scope=sem_scope)
     return bible
 
 
 def save_bible(bible: Dict, output_path: str | Path) -> Path:
     """保存 Bible JSON 到文件。"""
-    p = Path(output_path)
-    p.parent.mkdir(parents=True, exist_ok=True)
-    p.write_text(json.dumps(bible, ensure_ascii=False, indent=2), encoding="utf-8")
+    p = jsonio.write_json(output_path, bible)
     logger.info("Bible JSON 已保存：%s", p)
     return p
 
 
+def _collect_bible_stream(deltas: Iterator[str]) -> str:
+    """收集流式文本增量，并在开头明显不是 JSON 对象时提前中止。
+
+    边接收边检查：跳过空白和可选的 ```json 代码块首行后，
+    第一个有效字符必须是 ``{``，否则立即关闭流并抛出 ValueError，
+    不必等 8K token 全部生成完才发现格式错误。
+    """
+    parts: list[str] = []
+    checked = False
+    try:
+        for delta in deltas:
+            parts.append(delta)
+            if checked:
+                continue
+            head = "".join(parts).lstrip()
+            if head.startswith("```"):
+                nl = head.find("\n")
+                if nl < 0:
+                    continue
+                head = head[nl + 1:].lstrip()
+            elif "```".startswith(head):
+                continue
+            if not head:
+                continue
+            if head[0] != "{":
+                logger.error("Bible 流式响应不是 JSON 对象，提前中止：%s", head[:200])
+                raise ValueError(f"LLM 返回的内容不是 JSON 对象：{head[:50]!r}")
+            checked = True
+    finally:
+        close = getattr(deltas, "close", None)
+        if close is not None:
+            close()
+    return "".join(parts)
+
+
 def _parse_bible_json(text: str) -> Dict:
     """从 LLM 响应文本中提取 JSON。
 
@@ -144,18 +307,16 @@ def _parse_bible_json(text: str) -> Dict:
     - 纯 JSON 响应
     - 被 ```json ... ``` 包裹的响应
     """
-    cleaned = text.strip()
-
     # 去除 markdown 代码块标记
-    if cleaned.startswith("```"):
-        # 找到第一个换行后的内容
-        first_newline = cleaned.index("\n")
-        last_fence = cleaned.rfind("```")
-        if last_fence > first_newline:
-            cleaned = cleaned[first_newline + 1:last_fence].strip()
+    cleaned = jsonio.strip_code_fence(text)
+
+    # 明显不是 JSON 时不必进入解析器
+    if cleaned[:1] not in ("{", "["):
+        logger.error("Bible 响应不是 JSON：\n原始响应（前500字符）：%s", text[:500])
+        raise ValueError(f"LLM 返回的内容不是 JSON：{cleaned[:50]!r}")
 
     try:
-        return json.loads(cleaned)
+        return jsonio.loads(cleaned)
     except json.JSONDecodeError as e:
         logger.error("Bible JSON 解析失败：%s\n原始响应（前500字符）：%s", e, text[:500])
         raise ValueError(f"LLM 返回的内容无法解析为 JSON：{e}") from e
@@ -0,0 +1,104 @@
+"""LLM 响应磁盘缓存 — 输入不变时跳过 Claude API 调用。
+
+缓存按内容寻址：key = sha256(model, system prompt, user prompt, 生成参数 ...)，
+同一输入重复运行时直接读盘，不再请求 API。
+
+缓存目录：
+- 默认 ``~/.cache/juben_gen/<namespace>/<key>.json``
+- 环境变量 ``JUBEN_GEN_CACHE_DIR`` 可覆盖根目录
+- 环境变量 ``JUBEN_GEN_NO_CACHE=1`` 全局禁用（等价于 CLI 的 ``--no-cache``）
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+from pathlib import Path
+from typing import Optional
+
+from .fileio import write_bytes_atomic
+
+logger = logging.getLogger(__name__)
+
+
+def cache_root() -> Path:
+    """缓存根目录。"""
+    env = os.getenv("JUBEN_GEN_CACHE_DIR")
+    if env:
+        return Path(env)
+    return Path.home() / ".cache" / "juben_gen"
+
+
+def cache_disabled_by_env() -> bool:
+    """是否通过环境变量 JUBEN_GEN_NO_CACHE 禁用了缓存。"""
+    return os.getenv("JUBEN_GEN_NO_CACHE", "").strip().lower() in ("1", "true", "yes")
+
+
+def cache_key(*parts: str) -> str:
+    """对若干字符串片段计算稳定的 sha256 key（片段间以 \\0 分隔）。"""
+    return hashlib.sha256(b"\0".join(p.encode("utf-8") for p in parts)).hexdigest()
+
+
+def llm_cache_key(
+    system: str,
+    user_msg: str,
+    *,
+    model: str,
+    max_tokens: int,
+    thinking: bool = False,
+    budget_tokens: int = 0,
+    temperature: float = 0.7,
+) -> str:
+    """LLM 响应缓存 key：prompt + 模型 + 生成参数。
+
+    只计入实际生效的参数：开启 thinking 时 API 不接收 temperature，关闭时 budget_tokens 不生效，
+    因此改 config 里的 thinking / budget_tokens 或调用处的 max_tokens 都会让旧响应失效。
+    """
+    gen = (
+        f"max_tokens={max_tokens};thinking=1;budget_tokens={budget_tokens}"
+        if thinking
+        else f"max_tokens={max_tokens};thinking=0;temperature={temperature}"
+    )
+    return cache_key(system, user_msg, model, gen)
+
+
+class ResponseCache:
+    """按 namespace 分目录的文本缓存（bible / plan / write ...）。
+
+    ``enabled=False`` 或设置了 JUBEN_GEN_NO_CACHE 时，get 恒返回 None，put 不落盘。
+    """
+
+    def __init__(self, namespace: str, *, enabled: bool = True, root: Optional[Path] = None) -> None:
+        self.namespace = namespace
+        self.enabled = enabled and not cache_disabled_by_env()
+        self._dir = (root or cache_root()) / namespace
+
+    def _path(self, key: str) -> Path:
+        return self._dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[str]:
+        """命中返回缓存文本，未命中（或禁用）返回 None。"""
+        if not self.enabled:
+            return None
+        p = self._path(key)
+        try:
+            text = p.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning("读取缓存失败（%s）：%s", p, e)
+            return None
+        logger.info("命中 %s 缓存：%s", self.namespace, key[:12])
+        return text
+
+    def put(self, key: str, text: str) -> None:
+        """写入缓存（先写临时文件再 os.replace，避免半截文件）。"""
+        if not self.enabled:
+            return
+        p = self._path(key)
+        try:
+            write_bytes_atomic(p, text.encode("utf-8"))
+        except OSError as e:
+            # 缓存写失败不影响主流程
+            logger.warning("写入缓存失败（%s）：%s", p, e)
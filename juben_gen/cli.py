@@ -1,16 +1,15 @@
 from __future__ import annotations
 
 import argparse
-import json
-import logging
-import traceback
+import re
+import sys
 from pathlib import Path
-
-from .style_profile import build_combined_profile, save_json
-from .constraints import save_constraints
+from typing import Optional, Sequence
 
 
 def cmd_profile(args: argparse.Namespace) -> int:
+    from .style_profile import build_combined_profile, save_json
+
     genre = getattr(args, "genre", None)
     profile = build_combined_profile(args.scripts, genre=genre)
     save_json(profile, args.out)
@@ -19,6 +18,8 @@ def cmd_profile(args: argparse.Namespace) -> int:
 
 
 def cmd_constraints(args: argparse.Namespace) -> int:
+    from .constraints import save_constraints
+
     genre = getattr(args, "genre", None)
     save_constraints(
         scripts=args.scripts,
@@ -34,19 +35,24 @@ def cmd_constraints(args: argparse.Namespace) -> int:
     return 0
 
 
-def cmd_write(args: argparse.Namespace) -> int:
-    from .writer import generate_all_episodes
+def _load_config_and_rules(args: argparse.Namespace):
+    """LLM 子命令的公共准备：加载配置与三份规则 docx（日志已由 main 统一初始化）。"""
     from .config import maybe_load_config
     from .rules import load_rules_from_docx
 
-    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
-
     config = maybe_load_config(args.config)
     rules = load_rules_from_docx(
         rhythm_docx=args.rhythm,
         end_hook_docx=args.end_hook,
         template_docx=args.template,
     )
+    return config, rules
+
+
+def cmd_write(args: argparse.Namespace) -> int:
+    from .writer import generate_all_episodes
+
+    config, rules = _load_config_and_rules(args)
 
     episodes = generate_all_episodes(
         plan_path=args.plan,
@@ -54,6 +60,8 @@ def cmd_write(args: argparse.Namespace) -> int:
         config=config,
         constraints_path=args.constraints,
         output_dir=args.out,
+        use_cache=not args.no_cache,
+        concurrency=args.concurrency,
     )
     print(f"OK: {len(episodes)} 集剧本已生成 -> {args.out}")
 
@@ -71,6 +79,7 @@ def cmd_write(args: argparse.Namespace) -> int:
             output_dir=args.out,
             pass_threshold=args.threshold,
             max_rounds=args.max_rounds,
+            max_workers=args.concurrency,
         )
         passed = sum(1 for r in results if r.get("pass", False))
         print(f"OK: 审稿完成 {passed}/{len(results)} 集通过")
@@ -80,17 +89,8 @@ def cmd_write(args: argparse.Namespace) -> int:
 
 def cmd_review(args: argparse.Namespace) -> int:
     from .review_loop import review_all_episodes
-    from .config import maybe_load_config
-    from .rules import load_rules_from_docx
 
-    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
-
-    config = maybe_load_config(args.config)
-    rules = load_rules_from_docx(
-        rhythm_docx=args.rhythm,
-        end_hook_docx=args.end_hook,
-        template_docx=args.template,
-    )
+    config, rules = _load_config_and_rules(args)
 
     results = review_all_episodes(
         episodes_dir=args.episodes,
@@ -101,6 +101,8 @@ def cmd_review(args: argparse.Namespace) -> int:
         output_dir=args.out,
         pass_threshold=args.threshold,
         max_rounds=args.max_rounds,
+        max_workers=args.concurrency,
+        skip_judge_on_format_error=not args.judge_every_round,
     )
 
     passed = sum(1 for r in results if r.get("pass", False))
@@ -109,38 +111,69 @@ def cmd_review(args: argparse.Namespace) -> int:
     return 0 if passed == total else 1
 
 
+def cmd_judge(args: argparse.Namespace) -> int:
+    """只对已生成的剧本评分（不返修），可选走 Message Batches 批处理。"""
+    from .judge import judge_all_episodes
+
+    config, rules = _load_config_and_rules(args)
+
+    reviews = judge_all_episodes(
+        episodes_dir=args.episodes,
+        plan_path=args.plan,
+        rules=rules,
+        config=config,
+        constraints_path=args.constraints,
+        output_dir=args.out,
+        pass_threshold=args.threshold,
+        max_workers=args.concurrency,
+        use_batch=args.batch,
+        batch_max_wait=args.batch_max_wait,
+        force_rejudge=args.force,
+    )
+
+    passed = sum(1 for r in reviews if r.get("pass", False))
+    total = len(reviews)
+    print(f"OK: 评分完成 {passed}/{total} 集通过 -> {Path(args.out) / 'reviews'}")
+    return 0 if passed == total else 1
+
+
+_BANNER = "=" * 50
+
+
+def _print_step(title: str) -> None:
+    """打印全流程步骤标题（上下横线包围）。"""
+    print(f"\n{_BANNER}\n{title}\n{_BANNER}")
+
+
 def cmd_generate(args: argparse.Namespace) -> int:
     """一键执行全流程：bible → plan → write → review。"""
-    from .bible import generate_bible, save_bible
+    import logging
+
+    from . import jsonio
+    from .bible import generate_bible, load_novel_chapters, save_bible
     from .planner import generate_plan, save_plan
     from .writer import generate_all_episodes
     from .review_loop import review_all_episodes
-    from .config import maybe_load_config
-    from .rules import load_rules_from_docx
 
-    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    config, rules = _load_config_and_rules(args)
     logger = logging.getLogger(__name__)
-
-    config = maybe_load_config(args.config)
-    rules = load_rules_from_docx(
-        rhythm_docx=args.rhythm,
-        end_hook_docx=args.end_hook,
-        template_docx=args.template,
-    )
+    # 完整堆栈只在 --verbose（DEBUG）时格式化输出，默认只打印错误摘要
+    debug = logger.isEnabledFor(logging.DEBUG)
 
     out_dir = Path(args.output)
     out_dir.mkdir(parents=True, exist_ok=True)
+    out_dir_str = str(out_dir)
 
     chapter_start, chapter_end = _parse_chapter_range(args.chapters)
     failed_steps: list[str] = []
 
     # ── 步骤 1/5：Story Bible ──
     bible_path = out_dir / "bible.json"
-    print(f"\n{'='*50}")
-    print(f"[1/5] 生成 Story Bible（第{chapter_start}-{chapter_end}章）")
-    print(f"{'='*50}")
+    _print_step(f"[1/5] 生成 Story Bible（第{chapter_start}-{chapter_end}章）")
 
     try:
+        # 小说只解析一次，后续步骤复用同一份章节列表
+        chapters = load_novel_chapters(args.novel)
         bible = generate_bible(
             novel_path=args.novel,
             chapter_start=chapter_start,
@@ -148,21 +181,21 @@ def cmd_generate(args: argparse.Namespace) -> int:
             rules=rules,
             config=config,
             constraints_path=args.constraints,
+            use_cache=not args.no_cache,
+            chapters=chapters,
         )
         save_bible(bible, bible_path)
         print(f"  ✓ Bible 已保存: {bible_path}")
         print(f"  logline: {bible.get('logline', '(无)')[:80]}")
     except Exception as e:
-        logger.error("Story Bible 生成失败: %s", e)
-        traceback.print_exc()
+        logger.error("Story Bible 生成失败: %s", e, exc_info=debug)
         print(f"\n✗ 全流程中断：Story Bible 生成失败，后续步骤依赖此输出")
         return 1
 
     # ── 步骤 2/5：节拍表 ──
     plan_path = out_dir / "plan.json"
-    print(f"\n{'='*50}")
-    print(f"[2/5] 生成节拍表")
-    print(f"{'='*50}")
+    plan_path_str = str(plan_path)
+    _print_step(f"[2/5] 生成节拍表")
 
     try:
         plan = generate_plan(
@@ -170,19 +203,17 @@ def cmd_generate(args: argparse.Namespace) -> int:
             rules=rules,
             config=config,
             constraints_path=args.constraints,
+            use_cache=not args.no_cache,
         )
         save_plan(plan, plan_path)
         print(f"  ✓ 节拍表已保存: {plan_path}（{len(plan)} 集）")
     except Exception as e:
-        logger.error("节拍表生成失败: %s", e)
-        traceback.print_exc()
+        logger.error("节拍表生成失败: %s", e, exc_info=debug)
         print(f"\n✗ 全流程中断：节拍表生成失败，后续步骤依赖此输出")
         return 1
 
     # ── 步骤 3/5：逐集剧本生成 ──
-    print(f"\n{'='*50}")
-    print(f"[3/5] 逐集生成剧本（共 {len(plan)} 集）")
-    print(f"{'='*50}")
+    _print_step(f"[3/5] 逐集生成剧本（共 {len(plan)} 集）")
 
     try:
         episodes = generate_all_episodes(
@@ -190,64 +221,53 @@ def cmd_generate(args: argparse.Namespace) -> int:
             rules=rules,
             config=config,
             constraints_path=args.constraints,
-            output_dir=str(out_dir),
+            output_dir=out_dir_str,
+            use_cache=not args.no_cache,
+            concurrency=args.concurrency,
         )
         print(f"  ✓ {len(episodes)} 集剧本已生成 -> {out_dir}/episodes/")
     except Exception as e:
-        logger.error("剧本生成失败: %s", e)
-        traceback.print_exc()
+        logger.error("剧本生成失败: %s", e, exc_info=debug)
         print(f"\n✗ 剧本生成失败")
         failed_steps.append("剧本生成")
         episodes = []
 
     # ── 步骤 4/5：审稿循环（可选跳过） ──
     if args.skip_review:
-        print(f"\n{'='*50}")
-        print(f"[4/5] 审稿循环（已跳过 --skip-review）")
-        print(f"{'='*50}")
+        _print_step(f"[4/5] 审稿循环（已跳过 --skip-review）")
     elif not episodes:
-        print(f"\n{'='*50}")
-        print(f"[4/5] 审稿循环（跳过：无剧本可审）")
-        print(f"{'='*50}")
+        _print_step(f"[4/5] 审稿循环（跳过：无剧本可审）")
     else:
-        print(f"\n{'='*50}")
-        print(f"[4/5] 审稿循环（{len(episodes)} 集，最多 {args.max_rounds} 轮）")
-        print(f"{'='*50}")
+        _print_step(f"[4/5] 审稿循环（{len(episodes)} 集，最多 {args.max_rounds} 轮）")
 
         try:
             ep_dir = str(out_dir / "episodes")
             results = review_all_episodes(
                 episodes_dir=ep_dir,
-                plan_path=str(plan_path),
+                plan_path=plan_path_str,
                 rules=rules,
                 config=config,
                 constraints_path=args.constraints,
-                output_dir=str(out_dir),
+                output_dir=out_dir_str,
                 pass_threshold=args.threshold,
                 max_rounds=args.max_rounds,
+                max_workers=args.concurrency,
             )
             passed = sum(1 for r in results if r.get("pass", False))
             total = len(results)
             print(f"  ✓ 审稿完成: {passed}/{total} 集通过")
 
             # 保存审稿汇总
-            summary_path = out_dir / "review_summary.json"
-            summary_path.write_text(
-                json.dumps(results, ensure_ascii=False, indent=2),
-                encoding="utf-8",
-            )
+            summary_path = jsonio.write_json(out_dir / "review_summary.json", results)
             print(f"  ✓ 审稿汇总: {summary_path}")
         except Exception as e:
-            logger.error("审稿循环失败: %s", e)
-            traceback.print_exc()
+            logger.error("审稿循环失败: %s", e, exc_info=debug)
             failed_steps.append("审稿循环")
 
     # ── 步骤 5/5：样例对比评估 ──
     eval_report_path = None
     if episodes:
-        print(f"\n{'='*50}")
-        print(f"[5/5] 样例对比评估")
-        print(f"{'='*50}")
+        _print_step(f"[5/5] 样例对比评估")
 
         try:
             from .evaluator import evaluate_script, load_target as eval_load_target
@@ -260,27 +280,27 @@ def cmd_generate(args: argparse.Namespace) -> int:
             else:
                 # 回退：拼接各集 txt
                 ep_dir = out_dir / "episodes"
-                ep_files = sorted(ep_dir.glob("ep*.txt"))
+                ep_files = sorted(
+                    ep_dir.glob("ep*.txt"),
+                    key=lambda f: int(f.stem[2:]) if f.stem[2:].isdigit() else 0,
+                )
                 script_text = "\n".join(f.read_text(encoding="utf-8") for f in ep_files)
 
             eval_target = eval_load_target(args.constraints.replace(
                 "constraints.fused.json", "style_profile.json"
             ) if hasattr(args, "constraints") else "juben_gen/style_profile.json")
             report = evaluate_script(script_text, eval_target)
-            eval_report_path = save_report(report, str(out_dir))
+            eval_report_path = save_report(report, out_dir_str)
             print(format_report_md(report))
             print(f"  ✓ 评估报告已保存: {eval_report_path}")
         except Exception as e:
-            logger.error("样例对比评估失败: %s", e)
-            traceback.print_exc()
+            logger.error("样例对比评估失败: %s", e, exc_info=debug)
             failed_steps.append("样例对比评估")
     else:
-        print(f"\n{'='*50}")
-        print(f"[5/5] 样例对比评估（跳过：无剧本可评估）")
-        print(f"{'='*50}")
+        _print_step(f"[5/5] 样例对比评估（跳过：无剧本可评估）")
 
     # ── 汇总 ──
-    print(f"\n{'='*50}")
+    print(f"\n{_BANNER}")
     if failed_steps:
         print(f"⚠ 全流程完成（部分失败）: {', '.join(failed_steps)}")
     else:
@@ -293,13 +313,13 @@ def cmd_generate(args: argparse.Namespace) -> int:
         print(f"  审稿日志: reviews/")
     if eval_report_path:
         print(f"  评估报告: {eval_report_path}")
-    print(f"{'='*50}")
+    print(_BANNER)
 
     return 1 if failed_steps else 0
 
 
 def cmd_validate(args: argparse.Namespace) -> int:
-    import json as json_mod
+    from . import jsonio
     from .validator import validate_script, load_target, format_report
 
     script_path = Path(args.script)
@@ -311,12 +331,16 @@ def cmd_validate(args: argparse.Namespace) -> int:
     target = load_target(args.profile)
     results = validate_script(text, target)
 
-    if args.json:
-        print(json_mod.dumps(
-            [r.to_dict() for r in results],
-            ensure_ascii=False,
-            indent=2,
-        ))
+    if args.jsonl:
+        # 每集一行，逐条写出，不构建整体列表
+        out = sys.stdout.buffer
+        for r in results:
+            out.write(jsonio.dumps_compact(r.to_dict()))
+            out.write(b"\n")
+        out.flush()
+    elif args.json:
+        sys.stdout.buffer.write(jsonio.dumps_pretty([r.to_dict() for r in results]) + b"\n")
+        sys.stdout.buffer.flush()
     else:
         print(format_report(results))
 
@@ -348,23 +372,15 @@ def cmd_evaluate(args: argparse.Namespace) -> int:
 
 def cmd_plan(args: argparse.Namespace) -> int:
     from .planner import generate_plan, save_plan
-    from .config import maybe_load_config
-    from .rules import load_rules_from_docx
-
-    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 
-    config = maybe_load_config(args.config)
-    rules = load_rules_from_docx(
-        rhythm_docx=args.rhythm,
-        end_hook_docx=args.end_hook,
-        template_docx=args.template,
-    )
+    config, rules = _load_config_and_rules(args)
 
     plan = generate_plan(
         bible_path=args.bible,
         rules=rules,
         config=config,
         constraints_path=args.constraints,
+        use_cache=not args.no_cache,
     )
     out = save_plan(plan, args.out)
     print(f"OK: {out}")
@@ -373,17 +389,8 @@ def cmd_plan(args: argparse.Namespace) -> int:
 
 def cmd_bible(args: argparse.Namespace) -> int:
     from .bible import generate_bible, save_bible
-    from .config import maybe_load_config
-    from .rules import load_rules_from_docx
-
-    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 
-    config = maybe_load_config(args.config)
-    rules = load_rules_from_docx(
-        rhythm_docx=args.rhythm,
-        end_hook_docx=args.end_hook,
-        template_docx=args.template,
-    )
+    config, rules = _load_config_and_rules(args)
 
     bible = generate_bible(
         novel_path=args.novel,
@@ -392,30 +399,28 @@ def cmd_bible(args: argparse.Namespace) -> int:
         rules=rules,
         config=config,
         constraints_path=args.constraints,
+        use_cache=not args.no_cache,
     )
     out = save_bible(bible, args.out)
     print(f"OK: {out}")
     return 0
 
 
+_RANGE_RE = re.compile(r"^\s*(\d+)\s*-\s*(\d+)\s*$")
+
+
 def _parse_chapter_range(value: str) -> tuple[int, int]:
     """解析章节范围字符串，如 '1-30'。"""
-    parts = value.split("-")
-    if len(parts) != 2:
-        raise argparse.ArgumentTypeError(f"章节范围格式应为 'start-end'，如 '1-30'，实际输入：{value}")
-    try:
-        start, end = int(parts[0]), int(parts[1])
-    except ValueError:
-        raise argparse.ArgumentTypeError(f"章节范围必须是整数，实际输入：{value}")
+    m = _RANGE_RE.match(value)
+    if not m:
+        raise argparse.ArgumentTypeError(f"章节范围格式应为 'start-end'（整数），如 '1-30'，实际输入：{value}")
+    start, end = int(m[1]), int(m[2])
     if start > end:
         raise argparse.ArgumentTypeError(f"起始章节不能大于结束章节：{start} > {end}")
     return start, end
 
 
-def build_parser() -> argparse.ArgumentParser:
-    p = argparse.ArgumentParser(prog="juben_gen")
-    sub = p.add_subparsers(dest="cmd", required=True)
-
+def _add_generate_parser(sub: argparse._SubParsersAction) -> None:
     # generate（全流程）
     p_gen = sub.add_parser("generate", help="一键执行全流程：小说→Bible→节拍表→剧本→审稿")
     p_gen.add_argument("--novel", required=True, help="小说文件路径（TXT/DOCX）")
@@ -429,16 +434,21 @@ def build_parser() -> argparse.ArgumentParser:
     p_gen.add_argument("--max-rounds", type=int, default=3, help="审稿最大轮数（默认3）")
     p_gen.add_argument("--threshold", type=float, default=75.0, help="审稿通过阈值（默认75）")
     p_gen.add_argument("--skip-review", action="store_true", help="跳过审稿循环")
+    p_gen.add_argument("--no-cache", action="store_true", help="跳过磁盘缓存，强制重新调用 API（也可设置 JUBEN_GEN_NO_CACHE=1）")
+    p_gen.add_argument("--concurrency", type=int, default=None, help="并发请求数（默认取 config.concurrency.max_workers；>1 时逐集并发生成，前情改用上一集节拍表）")
+    p_gen.add_argument("-v", "--verbose", action="store_true", help="输出 DEBUG 日志（步骤失败时打印完整堆栈）")
     p_gen.set_defaults(func=cmd_generate)
 
-    # profile
+
+def _add_profile_parser(sub: argparse._SubParsersAction) -> None:
     p_profile = sub.add_parser("profile", help="从样例剧本docx提取风格画像（JSON）")
     p_profile.add_argument("--scripts", nargs="+", required=True, help="样例剧本docx路径（可多个）")
     p_profile.add_argument("--genre", default=None, help="题材标识（如 apocalypse/末世），附加题材层信息")
     p_profile.add_argument("--out", required=True, help="输出JSON路径")
     p_profile.set_defaults(func=cmd_profile)
 
-    # constraints
+
+def _add_constraints_parser(sub: argparse._SubParsersAction) -> None:
     p_constraints = sub.add_parser("constraints", help="融合样例剧本+注意事项，生成可执行约束（JSON+MD）")
     p_constraints.add_argument("--scripts", nargs="+", required=True, help="样例剧本docx路径（可多个）")
     p_constraints.add_argument("--rhythm", required=True, help="节奏适配注意事项 docx")
@@ -449,7 +459,8 @@ def build_parser() -> argparse.ArgumentParser:
     p_constraints.add_argument("--out_md", required=True, help="输出约束说明 MD 路径")
     p_constraints.set_defaults(func=cmd_constraints)
 
-    # bible
+
+def _add_bible_parser(sub: argparse._SubParsersAction) -> None:
     p_bible = sub.add_parser("bible", help="从小说片段生成 Story Bible（JSON）")
     p_bible.add_argument("--novel", required=True, help="小说文件路径（TXT/DOCX）")
     p_bible.add_argument("--chapters", required=True, help="章节范围，如 '1-30'")
@@ -459,9 +470,11 @@ def build_parser() -> argparse.ArgumentParser:
     p_bible.add_argument("--constraints", default="juben_gen/constraints.fused.json", help="融合约束 JSON 路径")
     p_bible.add_argument("--config", default=None, help="配置文件路径")
     p_bible.add_argument("--out", required=True, help="输出 Bible JSON 路径")
-    p_bible.set_defaults(func=lambda args: _cmd_bible_wrapper(args))
+    p_bible.add_argument("--no-cache", action="store_true", help="跳过磁盘缓存，强制重新调用 API（也可设置 JUBEN_GEN_NO_CACHE=1）")
+    p_bible.set_defaults(func=_cmd_bible_wrapper)
+
 
-    # plan
+def _add_plan_parser(sub: argparse._SubParsersAction) -> None:
     p_plan = sub.add_parser("plan", help="从 Story Bible 生成前10集节拍表（JSON）")
     p_plan.add_argument("--bible", required=True, help="Bible JSON 路径")
     p_plan.add_argument("--rhythm", required=True, help="节奏适配注意事项 docx")
@@ -470,9 +483,11 @@ def build_parser() -> argparse.ArgumentParser:
     p_plan.add_argument("--constraints", default="juben_gen/constraints.fused.json", help="融合约束 JSON 路径")
     p_plan.add_argument("--config", default=None, help="配置文件路径")
     p_plan.add_argument("--out", required=True, help="输出节拍表 JSON 路径")
+    p_plan.add_argument("--no-cache", action="store_true", help="跳过磁盘缓存，强制重新调用 API（也可设置 JUBEN_GEN_NO_CACHE=1）")
     p_plan.set_defaults(func=cmd_plan)
 
-    # write
+
+def _add_write_parser(sub: argparse._SubParsersAction) -> None:
     p_write = sub.add_parser("write", help="从节拍表逐集生成剧本（TXT+DOCX）")
     p_write.add_argument("--plan", required=True, help="节拍表 JSON 路径")
     p_write.add_argument("--rhythm", required=True, help="节奏适配注意事项 docx")
@@ -484,23 +499,29 @@ def build_parser() -> argparse.ArgumentParser:
     p_write.add_argument("--review", action="store_true", help="生成后自动执行审稿循环")
     p_write.add_argument("--max-rounds", type=int, default=3, help="审稿最大轮数（默认3）")
     p_write.add_argument("--threshold", type=float, default=75.0, help="审稿通过阈值（默认75）")
+    p_write.add_argument("--no-cache", action="store_true", help="跳过磁盘缓存，强制重新调用 API（也可设置 JUBEN_GEN_NO_CACHE=1）")
+    p_write.add_argument("--concurrency", type=int, default=None, help="并发请求数（默认取 config.concurrency.max_workers；>1 时逐集并发生成，前情改用上一集节拍表）")
     p_write.set_defaults(func=cmd_write)
 
-    # validate
+
+def _add_validate_parser(sub: argparse._SubParsersAction) -> None:
     p_validate = sub.add_parser("validate", help="校验剧本格式/行数/比例")
     p_validate.add_argument("script", help="剧本 TXT 文件路径")
     p_validate.add_argument("--profile", default="juben_gen/style_profile.json", help="风格画像 JSON 路径")
     p_validate.add_argument("--json", action="store_true", help="输出 JSON 格式")
+    p_validate.add_argument("--jsonl", action="store_true", help="输出 JSON Lines 格式（每集一行）")
     p_validate.set_defaults(func=cmd_validate)
 
-    # evaluate
+
+def _add_evaluate_parser(sub: argparse._SubParsersAction) -> None:
     p_eval = sub.add_parser("evaluate", help="样例对比评估：生成剧本 vs 样例均值")
     p_eval.add_argument("script", help="剧本 TXT 文件路径")
     p_eval.add_argument("--profile", default="juben_gen/style_profile.json", help="风格画像 JSON 路径")
     p_eval.add_argument("--out", default=None, help="报告输出目录（可选）")
     p_eval.set_defaults(func=cmd_evaluate)
 
-    # review
+
+def _add_review_parser(sub: argparse._SubParsersAction) -> None:
     p_review = sub.add_parser("review", help="对已生成的剧本执行审稿循环（校验+评分+返修）")
     p_review.add_argument("--episodes", required=True, help="剧本目录（含 ep1.txt, ep2.txt, ...）")
     p_review.add_argument("--plan", default=None, help="节拍表 JSON 路径（可选，提供时加入评审上下文）")
@@ -512,8 +533,69 @@ def build_parser() -> argparse.ArgumentParser:
     p_review.add_argument("--out", required=True, help="输出目录路径")
     p_review.add_argument("--max-rounds", type=int, default=3, help="最大返修轮数（默认3）")
     p_review.add_argument("--threshold", type=float, default=75.0, help="通过阈值（默认75）")
+    p_review.add_argument("--concurrency", type=int, default=None, help="同时审稿的集数（默认取 config.concurrency.max_workers）")
+    p_review.add_argument("--judge-every-round", action="store_true", help="每轮都调用 judge 评分（默认格式校验有 error 的轮次跳过 judge、直接按校验问题返修，最后一轮仍评分）")
     p_review.set_defaults(func=cmd_review)
 
+
+def _add_judge_parser(sub: argparse._SubParsersAction) -> None:
+    p_judge = sub.add_parser("judge", help="只对已生成的剧本逐集评分（不返修，可走批处理半价）")
+    p_judge.add_argument("--episodes", required=True, help="剧本目录（含 ep1.txt, ep2.txt, ...）")
+    p_judge.add_argument("--plan", default=None, help="节拍表 JSON 路径（可选，提供时加入评审上下文）")
+    p_judge.add_argument("--rhythm", required=True, help="节奏适配注意事项 docx")
+    p_judge.add_argument("--end_hook", required=True, help="每集结尾钩子核心 docx")
+    p_judge.add_argument("--template", required=True, help="短剧一卡通用模板 docx")
+    p_judge.add_argument("--constraints", default="juben_gen/constraints.fused.json", help="融合约束 JSON 路径")
+    p_judge.add_argument("--config", default=None, help="配置文件路径")
+    p_judge.add_argument("--out", required=True, help="输出目录路径（评分保存到 {out}/reviews/）")
+    p_judge.add_argument("--threshold", type=float, default=75.0, help="通过阈值（默认75）")
+    p_judge.add_argument("--concurrency", type=int, default=None, help="同时评分的集数（默认取 config.concurrency.max_workers；--batch 时不生效）")
+    p_judge.add_argument("--batch", action="store_true", help="所有集合并为一个 Message Batches 批处理提交（费用约减半，完成时间取决于排队）")
+    p_judge.add_argument("--batch-max-wait", type=float, default=3600.0, help="批处理最长等待秒数（默认3600），超时取消批处理并改走同步评分")
+    p_judge.add_argument("--force", action="store_true", help="跳过评审缓存，所有集重新评分")
+    p_judge.set_defaults(func=cmd_judge)
+
+
+# 子命令名 -> 子解析器构建函数（顺序即 --help 中的展示顺序）
+_SUBCOMMANDS = {
+    "generate": _add_generate_parser,
+    "profile": _add_profile_parser,
+    "constraints": _add_constraints_parser,
+    "bible": _add_bible_parser,
+    "plan": _add_plan_parser,
+    "write": _add_write_parser,
+    "validate": _add_validate_parser,
+    "evaluate": _add_evaluate_parser,
+    "judge": _add_judge_parser,
+    "review": _add_review_parser,
+}
+
+
+def _sniff_subcommand(argv: Optional[Sequence[str]]) -> Optional[str]:
+    """从 argv 中找出子命令名；出现在子命令前的 -h/--help 或未知命令返回 None。"""
+    if argv is None:
+        return None
+    for tok in argv:
+        if tok in ("-h", "--help"):
+            return None
+        if not tok.startswith("-"):
+            return tok if tok in _SUBCOMMANDS else None
+    return None
+
+
+def build_parser(argv: Optional[Sequence[str]] = None) -> argparse.ArgumentParser:
+    """构建命令行解析器。
+
+    传入 argv 且能识别出子命令时只构建该子命令的参数树（启动更快）；
+    否则（如 ``juben_gen --help``、未知命令）构建全部子命令。
+    """
+    p = argparse.ArgumentParser(prog="juben_gen")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    only = _sniff_subcommand(argv)
+    for name, add_parser in _SUBCOMMANDS.items():
+        if only is None or name == only:
+            add_parser(sub)
     return p
 
 
@@ -525,11 +607,24 @@ def _cmd_bible_wrapper(args: argparse.Namespace) -> int:
     return cmd_bible(args)
 
 
-def main() -> int:
-    parser = build_parser()
-    args = parser.parse_args()
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    parser = build_parser(argv)
+    args = parser.parse_args(argv)
+    _setup_logging(args)
     return args.func(args)
 
 
+def _setup_logging(args: argparse.Namespace) -> None:
+    """进程内只初始化一次根日志（已有 handler 时不覆盖调用方的配置）。"""
+    import logging
+
+    root = logging.getLogger()
+    if root.handlers:
+        return
+    level = logging.DEBUG if getattr(args, "verbose", False) else logging.INFO
+    logging.basicConfig(level=level, format="%(levelname)s: %(message)s")
+
+
 if __name__ == "__main__":
     raise SystemExit(main())
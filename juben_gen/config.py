@@ -7,10 +7,13 @@
 
 from __future__ import annotations
 
-import json
+import os
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, Optional
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from . import jsonio
 
 
 # ---------- 角色配置 ----------
@@ -21,9 +24,16 @@ ROLE_DEFAULTS: Dict[str, Dict[str, Any]] = {
     "plan": {"model": "claude-sonnet-4-20250514", "thinking": True, "budget_tokens": 10000},
     "write": {"model": "claude-sonnet-4-20250514", "thinking": False},
     "judge": {"model": "claude-haiku-4-20250414", "thinking": True, "budget_tokens": 10000},
-    "rewrite": {"model": "claude-sonnet-4-20250514", "thinking": False},
+    "rewrite": {"model": "claude-sonnet-4-20250514", "thinking": False, "service_tier": "auto"},
 }
 
+# Messages API 的 service_tier 取值：auto = 有 Priority Tier 额度时优先使用（延迟更低），
+# standard_only = 只用标准容量
+SERVICE_TIERS = ("auto", "standard_only")
+
+# 合并返修单次最多合并的集数（每集按 8192 输出 token 预留，4 集即到合并请求的输出上限）
+MAX_REWRITE_BATCH = 4
+
 
 @dataclass(frozen=True)
 class RoleConfig:
@@ -32,6 +42,8 @@ class RoleConfig:
     model: str
     thinking: bool = False
     budget_tokens: int = 10000
+    # 为 None 时不传 service_tier（按 API 默认）
+    service_tier: Optional[str] = None
 
 
 # ---------- 通用配置 ----------
@@ -52,31 +64,78 @@ class OutputConfig:
     save_intermediates: bool = True
 
 
+@dataclass(frozen=True)
+class CacheConfig:
+    """响应缓存参数（精确缓存之外的语义缓存兜底）。"""
+
+    semantic: bool = False
+    semantic_threshold: float = 0.97
+
+
+@dataclass(frozen=True)
+class ConcurrencyConfig:
+    """并发参数：同时在途的 API 请求数（1 = 串行，保持原有行为）。
+
+    rewrite_batch 为返修首轮合并进一次请求的集数（1 = 逐集请求，保持原有行为；最大 MAX_REWRITE_BATCH）。
+    """
+
+    max_workers: int = 1
+    rewrite_batch: int = 1
+
+
 @dataclass(frozen=True)
 class AppConfig:
-    roles: Dict[str, RoleConfig]
+    roles: Mapping[str, RoleConfig]
     retry: RetryConfig = field(default_factory=RetryConfig)
     output: OutputConfig = field(default_factory=OutputConfig)
+    cache: CacheConfig = field(default_factory=CacheConfig)
+    concurrency: ConcurrencyConfig = field(default_factory=ConcurrencyConfig)
+
+
+def _section(data: Dict[str, Any], name: str) -> Dict[str, Any]:
+    """取配置中的一个小节；缺失或为 null 时返回空 dict。"""
+
+    return data.get(name) or {}
+
+
+# 进程内缓存：(绝对路径, st_mtime_ns) -> 已解析的配置；文件更新后 mtime 变化自动失效
+_CONFIG_MEMO: Dict[Tuple[str, int], AppConfig] = {}
 
 
 def load_config(config_path: str) -> AppConfig:
-    """读取配置文件（JSON）。缺失字段使用默认值。"""
+    """读取配置文件（JSON）。缺失字段使用默认值。
+
+    按 (路径, mtime) 缓存解析结果，同一进程内重复加载只解析一次。
+    """
+
+    p = Path(config_path).resolve()
+    key = (str(p), p.stat().st_mtime_ns)
+    cfg = _CONFIG_MEMO.get(key)
+    if cfg is None:
+        cfg = _CONFIG_MEMO[key] = _parse_config(p)
+    return cfg
+
 
-    data = json.loads(Path(config_path).read_text(encoding="utf-8"))
+def _parse_config(p: Path) -> AppConfig:
+    # 直接按字节解析（装了 orjson 时走 orjson），不再先解码成 str
+    data = jsonio.loads(p.read_bytes())
 
     # roles
-    roles_raw = data.get("roles", {}) or {}
+    roles_raw = _section(data, "roles")
     roles: Dict[str, RoleConfig] = {}
     for role, defaults in ROLE_DEFAULTS.items():
-        raw = roles_raw.get(role, {}) or {}
+        raw = _section(roles_raw, role)
         roles[role] = RoleConfig(
             model=str(raw.get("model", defaults["model"])),
             thinking=bool(raw.get("thinking", defaults.get("thinking", False))),
             budget_tokens=int(raw.get("budget_tokens", defaults.get("budget_tokens", 10000))),
+            service_tier=raw.get("service_tier", defaults.get("service_tier")),
         )
+        if roles[role].service_tier not in (None, *SERVICE_TIERS):
+            raise ValueError(f"config.roles.{role}.service_tier 必须是 {' / '.join(SERVICE_TIERS)} 之一")
 
     # retry
-    retry_raw = data.get("retry", {}) or {}
+    retry_raw = _section(data, "retry")
     retry = RetryConfig(
         max_attempts=int(retry_raw.get("max_attempts", RetryConfig.max_attempts)),
         base_delay=float(retry_raw.get("base_delay", RetryConfig.base_delay)),
@@ -87,10 +146,36 @@ def load_config(config_path: str) -> AppConfig:
         raise ValueError("config.retry.base_delay 必须 >= 0")
 
     # output
-    output_raw = data.get("output", {}) or {}
+    output_raw = _section(data, "output")
     output = OutputConfig(save_intermediates=bool(output_raw.get("save_intermediates", True)))
 
-    return AppConfig(roles=roles, retry=retry, output=output)
+    # cache
+    cache_raw = _section(data, "cache")
+    cache = CacheConfig(
+        semantic=bool(cache_raw.get("semantic", CacheConfig.semantic)),
+        semantic_threshold=float(cache_raw.get("semantic_threshold", CacheConfig.semantic_threshold)),
+    )
+    if not 0 < cache.semantic_threshold <= 1:
+        raise ValueError("config.cache.semantic_threshold 必须在 (0, 1] 区间内")
+
+    # concurrency
+    concurrency_raw = _section(data, "concurrency")
+    concurrency = ConcurrencyConfig(
+        max_workers=int(concurrency_raw.get("max_workers", ConcurrencyConfig.max_workers)),
+        rewrite_batch=int(concurrency_raw.get("rewrite_batch", ConcurrencyConfig.rewrite_batch)),
+    )
+    if concurrency.max_workers < 1:
+        raise ValueError("config.concurrency.max_workers 必须 >= 1")
+    if not 1 <= concurrency.rewrite_batch <= MAX_REWRITE_BATCH:
+        raise ValueError(f"config.concurrency.rewrite_batch 必须在 1~{MAX_REWRITE_BATCH} 之间")
+
+    return AppConfig(
+        roles=roles,
+        retry=retry,
+        output=output,
+        cache=cache,
+        concurrency=concurrency,
+    )
 
 
 def load_role_configs(config_path: str) -> Dict[str, RoleConfig]:
@@ -99,20 +184,27 @@ def load_role_configs(config_path: str) -> Dict[str, RoleConfig]:
     return load_config(config_path).roles
 
 
+_DEFAULT_CONFIG_PATH = str(Path(__file__).with_name("config.json"))
+
+# 无配置文件时使用的默认配置：导入时构建一次，roles 只读（进程内共享同一对象）
+_DEFAULT_CONFIG = AppConfig(
+    roles=MappingProxyType({k: RoleConfig(**v) for k, v in ROLE_DEFAULTS.items()}),
+)
+
+
 def default_config_path() -> str:
     """默认配置文件路径（juben_gen/config.json）。"""
 
-    return str(Path(__file__).with_name("config.json"))
+    return _DEFAULT_CONFIG_PATH
 
 
 def maybe_load_config(config_path: Optional[str] = None) -> AppConfig:
     """尽量加载配置：优先用户传入，其次默认路径；都不存在则返回默认值。"""
 
     path = config_path or default_config_path()
-    if Path(path).exists():
+    if os.path.exists(path):
         return load_config(path)
 
     # 无配置文件时也可运行（使用默认配置）
-    roles = {k: RoleConfig(**v) for k, v in ROLE_DEFAULTS.items()}
-    return AppConfig(roles=roles)
+    return _DEFAULT_CONFIG
 
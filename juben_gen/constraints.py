@@ -1,11 +1,28 @@
 from __future__ import annotations
 
+import io
 import json
 from pathlib import Path
+from types import MappingProxyType
 from typing import Dict, List, Optional, Tuple, Union
 
-from .rules import load_rules_from_docx
-from .style_profile import build_combined_profile, save_json
+
+# 剧本格式规范（常量，只读）
+_FORMAT_SPEC = MappingProxyType({
+    "episode_header": "第{ep}集",
+    "scene_header_pattern": "{ep}-{scene}场  {place}\\t{day_or_night}\\t{in_or_out}",
+    "cast_line_prefix": "人物：",
+    "stage_direction_prefix": "▲",
+    "dialogue_pattern": "{角色名}：{台词}",
+    "allowed_markers": ("【切】", "【转】", "【闪回】", "【闪出】"),
+})
+
+# 样例与规则的融合策略说明（常量，只读）
+_FUSION_POLICY = MappingProxyType({
+    "numeric": "两套样例取均值做suggest；range取适配1-2分钟/集的可控区间（可拍+高密度）。",
+    "rhythm": "以《节奏适配关键注意事项》为硬规则；冲突密度与结尾钩子必须满足。",
+    "format": "以两份样例共有格式为准：第N集/场次/人物/▲/角色：台词。",
+})
 
 
 def build_constraints(
@@ -22,6 +39,10 @@ def build_constraints(
     ----------
     genre : 题材标识（如 "apocalypse" 或 "末世"），提供时融合题材特定约束。
     """
+    # 延迟导入：只用 write_style_guide_md 等轻量函数时不必加载 docx 解析链路
+    from .rules import load_rules_from_docx
+    from .style_profile import build_combined_profile
+
     style_profile = build_combined_profile([str(p) for p in scripts], genre=genre)
     rules = load_rules_from_docx(
         rhythm_docx=rhythm_docx,
@@ -29,28 +50,16 @@ def build_constraints(
         template_docx=template_docx,
     )
 
-    format_spec = {
-        "episode_header": "第{ep}集",
-        "scene_header_pattern": "{ep}-{scene}场  {place}\\t{day_or_night}\\t{in_or_out}",
-        "cast_line_prefix": "人物：",
-        "stage_direction_prefix": "▲",
-        "dialogue_pattern": "{角色名}：{台词}",
-        "allowed_markers": ["【切】", "【转】", "【闪回】", "【闪出】"],
-    }
-
     result: Dict[str, object] = {
         "style_target": style_profile["target"],
-        "format_spec": format_spec,
+        # 常量模板的浅拷贝；allowed_markers 另拷一份 list，调用方修改结果不会污染模板
+        "format_spec": {**_FORMAT_SPEC, "allowed_markers": list(_FORMAT_SPEC["allowed_markers"])},
         "rules_text": {
             "rhythm_notes": rules.rhythm_notes,
             "end_hook_notes": rules.end_hook_notes,
             "card_template_notes": rules.card_template_notes,
         },
-        "fusion_policy": {
-            "numeric": "两套样例取均值做suggest；range取适配1-2分钟/集的可控区间（可拍+高密度）。",
-            "rhythm": "以《节奏适配关键注意事项》为硬规则；冲突密度与结尾钩子必须满足。",
-            "format": "以两份样例共有格式为准：第N集/场次/人物/▲/角色：台词。",
-        },
+        "fusion_policy": dict(_FUSION_POLICY),
     }
 
     # 注入题材层约束
@@ -75,7 +84,14 @@ def write_style_guide_md(constraints: Dict[str, object], path: Union[str, Path])
             return ""
         return f"- **{name}**：建议 {v.get('suggest')}，范围 {v.get('range')}"
 
-    lines = [
+    buf = io.StringIO()
+
+    def w(*lines: str) -> None:
+        for line in lines:
+            buf.write(line)
+            buf.write("\n")
+
+    w(
         "# 融合风格约束（基于两套优秀样例）",
         "",
         "## 结构指标（1-2分钟/集，通用层）",
@@ -101,27 +117,28 @@ def write_style_guide_md(constraints: Dict[str, object], path: Union[str, Path])
         "## 结尾钩子四选一（必须明确到\u201c最后一镜/最后一句\u201d）",
         "- 冲突卡点钩 / 信息反转钩 / 危机升级钩 / 情感抉择钩",
         "",
-    ]
+    )
 
     # 题材层信息
     if genre_data and isinstance(genre_data, dict):
-        lines.extend([
+        w(
             f"## 题材层约束（{genre_data.get('genre', '')}）",
             "",
             f"- **核心特征**：{', '.join(genre_data.get('traits', []))}",
             f"- **冲突模式**：{'; '.join(genre_data.get('conflict_patterns', []))}",
             f"- **标志性场景**：{'; '.join(genre_data.get('iconic_scenes', []))}",
-        ])
+        )
         hooks = genre_data.get("hook_preferences", {})
         if hooks:
-            lines.append(f"- **主力钩子**：{hooks.get('primary', '')}（辅助：{hooks.get('secondary', '')}）")
-            lines.append(f"- **钩子说明**：{hooks.get('notes', '')}")
+            w(f"- **主力钩子**：{hooks.get('primary', '')}（辅助：{hooks.get('secondary', '')}）")
+            w(f"- **钩子说明**：{hooks.get('notes', '')}")
         overrides = genre_data.get("style_overrides", {})
         for key, val in overrides.items():
-            lines.append(f"- **{key}**：{val}")
-        lines.append("")
+            w(f"- **{key}**：{val}")
+        w("")
 
-    p.write_text("\n".join([x for x in lines if x is not None]), encoding="utf-8")
+    # 每行后都写了换行，去掉最后一个，输出与逐行 "\n".join 一致
+    p.write_text(buf.getvalue()[:-1], encoding="utf-8")
 
 
 def save_constraints(
@@ -134,6 +151,8 @@ def save_constraints(
     out_md: Union[str, Path],
     genre: Optional[str] = None,
 ) -> None:
+    from .style_profile import save_json
+
     c = build_constraints(
         scripts=scripts,
         rhythm_docx=rhythm_docx,
@@ -1,34 +1,237 @@
 from __future__ import annotations
 
+import importlib.util
+import io
+import json
+import logging
+import re
+import zipfile
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from xml.sax.saxutils import escape as xml_escape
 
-from docx import Document
+from .cache import cache_disabled_by_env, cache_key, cache_root
+from .fileio import write_bytes_atomic
 
+logger = logging.getLogger(__name__)
 
-def read_docx_lines(path: str | Path) -> List[str]:
+
+def iter_docx_lines(path: str | Path) -> Iterator[str]:
     """
-    读取 docx 的段落与表格文本，按“行”返回（空行剔除）。
+    逐行产出 docx 的段落与表格文本（空行剔除），顺序：先全部段落，再各表格行。
+
+    直接用 lxml 流式解析 word/document.xml（不构建 python-docx 的 Paragraph/_Cell 对象），
+    文本提取规则与 python-docx 的 ``paragraph.text`` / ``row.cells`` 保持一致
+    （含 tab/换行、超链接、横向合并 gridSpan、纵向合并 vMerge）。
+    解析失败时回退到 python-docx。
+
+    不走缓存，每次都会解析 docx；一般应使用 read_docx_lines / read_docx_text。
     """
-    p = Path(path)
-    doc = Document(str(p))
-    lines: List[str] = []
+    try:
+        lines = _read_docx_lines_lxml(path)
+    except (KeyError, ValueError, SyntaxError, zipfile.BadZipFile) as e:
+        logger.debug("docx 快速解析失败，回退 python-docx（%s）：%s", path, e)
+        yield from _iter_docx_lines_python_docx(path)
+        return
+
+    yield from lines
+
+
+_W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+_W = "{%s}" % _W_NS
+_W_P, _W_R, _W_T, _W_TBL, _W_TR, _W_TC = (_W + t for t in ("p", "r", "t", "tbl", "tr", "tc"))
+_W_BODY = _W + "body"
+_W_HYPERLINK = _W + "hyperlink"
+# run 内非 w:t 元素的文本等价物（与 python-docx 一致；w:br 另按 type 处理）
+_RUN_SPECIAL_TEXT = {_W + "tab": "\t", _W + "ptab": "\t", _W + "cr": "\n", _W + "noBreakHyphen": "-"}
+_W_BR = _W + "br"
+_OFFICE_DOCUMENT_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
 
-    for para in doc.paragraphs:
-        text = (para.text or "").strip()
+
+def _read_docx_lines_lxml(path: str | Path) -> List[str]:
+    """用 lxml iterparse 流式解析主文档，返回与 iter_docx_lines 相同顺序的行列表。
+
+    每处理完一个 body 级 w:p / w:tbl 就清空它并删掉已处理的兄弟节点，
+    解析时内存中只保留当前这一段/一张表，峰值内存与文档大小无关。
+    全部解析成功才返回（失败时调用方整体回退，不会产出半份结果）。
+    """
+    from lxml import etree  # python-docx 的依赖，随用随导入
+
+    paragraphs: List[str] = []
+    table_lines: List[str] = []  # 表格行排在全部段落之后输出，先暂存
+    with zipfile.ZipFile(str(path)) as z:
+        part = "word/document.xml"
+        try:
+            rels = etree.fromstring(z.read("_rels/.rels"))
+            for rel in rels:
+                if rel.get("Type") == _OFFICE_DOCUMENT_REL:
+                    part = rel.get("Target", part).lstrip("/")
+                    break
+        except KeyError:
+            pass
+
+        with z.open(part) as stream:
+            for _, el in etree.iterparse(stream, events=("end",), tag=(_W_P, _W_TBL)):
+                parent = el.getparent()
+                if parent is None or parent.tag != _W_BODY:
+                    continue  # 表格内的段落 / 嵌套表格：随外层表格一起处理
+                if el.tag == _W_P:
+                    text = _paragraph_text(el).strip()
+                    if text:
+                        paragraphs.append(text)
+                else:
+                    table_lines.extend(_iter_table_lines(el))
+                el.clear()
+                while el.getprevious() is not None:
+                    del parent[0]
+
+    paragraphs.extend(table_lines)
+    return paragraphs
+
+
+def _run_text(r) -> str:
+    parts: List[str] = []
+    for c in r:
+        tag = c.tag
+        if tag == _W_T:
+            parts.append(c.text or "")
+        elif tag == _W_BR:
+            if c.get(_W + "type", "textWrapping") == "textWrapping":
+                parts.append("\n")
+        else:
+            special = _RUN_SPECIAL_TEXT.get(tag)
+            if special:
+                parts.append(special)
+    return "".join(parts)
+
+
+def _paragraph_text(p) -> str:
+    """等价于 python-docx 的 Paragraph.text（直接子级 w:r 与 w:hyperlink/w:r）。"""
+    parts: List[str] = []
+    for c in p:
+        if c.tag == _W_R:
+            parts.append(_run_text(c))
+        elif c.tag == _W_HYPERLINK:
+            parts.extend(_run_text(r) for r in c.iterchildren(_W_R))
+    return "".join(parts)
+
+
+def _tc_property(tc, name: str):
+    """返回 w:tcPr/<name> 元素（不存在时为 None）。"""
+    tc_pr = tc.find(_W + "tcPr")
+    return None if tc_pr is None else tc_pr.find(_W + name)
+
+
+def _iter_table_lines(tbl) -> Iterator[str]:
+    """按行产出表格文本：单元格以 " | " 连接，合并单元格按 python-docx 规则重复。"""
+    above: Dict[int, Tuple[str, int]] = {}  # 上一行：起始网格列 -> (单元格文本, 跨列数)
+    for tr in tbl.iterchildren(_W_TR):
+        offset = 0
+        tr_pr = tr.find(_W + "trPr")
+        if tr_pr is not None:
+            grid_before = tr_pr.find(_W + "gridBefore")
+            if grid_before is not None:
+                offset = int(grid_before.get(_W + "val", "0"))
+
+        row: Dict[int, Tuple[str, int]] = {}
+        cells: List[str] = []
+        for tc in tr.iterchildren(_W_TC):
+            span_el = _tc_property(tc, "gridSpan")
+            span = int(span_el.get(_W + "val", "1")) if span_el is not None else 1
+            v_merge = _tc_property(tc, "vMerge")
+            if v_merge is not None and v_merge.get(_W + "val", "continue") == "continue" and offset in above:
+                # 纵向合并的延续格：内容取上一行同列的根单元格
+                text, root_span = above[offset]
+            else:
+                text = "\n".join(_paragraph_text(p) for p in tc.iterchildren(_W_P))
+                root_span = span
+            row[offset] = (text, root_span)
+            cells.extend([text.strip()] * root_span)
+            offset += span
+        above = row
+
+        if any(cells):
+            yield " | ".join(cells)
+
+
+def _iter_docx_lines_python_docx(path: str | Path) -> Iterator[str]:
+    """python-docx 版本的 iter_docx_lines（快速解析失败时的兜底）。
+
+    只借用 python-docx 打开文档包（兼容非常规的部件路径/关系），文本直接从
+    body 的 XML 元素提取：不经 ``table.rows`` / ``row.cells``（每次访问都会
+    重新计算网格与合并关系），规则与快速路径相同。
+    """
+    from docx import Document  # python-docx 较重，只在真正读写 docx 时导入
+
+    body = Document(str(Path(path))).element.body
+
+    for el in body.iterchildren(_W_P):
+        text = _paragraph_text(el).strip()
         if text:
-            lines.append(text)
+            yield text
+
+    for tbl in body.iterchildren(_W_TBL):
+        yield from _iter_table_lines(tbl)
+
+
+# 进程内缓存：(绝对路径, st_mtime_ns, st_size) -> 行列表
+_LINES_MEMO: Dict[Tuple[str, int, int], List[str]] = {}
+# 磁盘缓存格式版本（解析规则变化时递增）
+_LINES_CACHE_VERSION = "1"
 
-    for table in doc.tables:
-        for row in table.rows:
-            cells = [(c.text or "").strip() for c in row.cells]
-            if any(cells):
-                lines.append(" | ".join(cells))
 
+def load_docx_lines_shared(path: str | Path) -> List[str]:
+    """解析 docx 为行列表，按文件 (路径, mtime, size) 缓存（返回共享列表，勿修改）。
+
+    两层缓存：进程内 dict + 磁盘 JSON（``<cache_root>/docx/<sha>.json``）；
+    规则 docx / 样例剧本在多次 CLI 运行间不变时完全跳过 python-docx 解析。
+    设置 JUBEN_GEN_NO_CACHE=1 时跳过磁盘层。
+    """
+    p = Path(path).resolve()
+    st = p.stat()
+    memo_key = (str(p), st.st_mtime_ns, st.st_size)
+    lines = _LINES_MEMO.get(memo_key)
+    if lines is not None:
+        return lines
+
+    use_disk = not cache_disabled_by_env()
+    cache_path = cache_root() / "docx" / (cache_key(_LINES_CACHE_VERSION, *map(str, memo_key)) + ".json")
+    if use_disk:
+        try:
+            lines = json.loads(cache_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning("读取 docx 缓存失败（%s）：%s", cache_path, e)
+
+    if lines is None:
+        lines = list(iter_docx_lines(p))
+        if use_disk:
+            try:
+                write_bytes_atomic(cache_path, json.dumps(lines, ensure_ascii=False).encode("utf-8"))
+            except OSError as e:
+                logger.warning("写入 docx 缓存失败（%s）：%s", cache_path, e)
+
+    _LINES_MEMO[memo_key] = lines
     return lines
 
 
+def read_docx_lines(path: str | Path) -> List[str]:
+    """
+    读取 docx 的段落与表格文本，按“行”返回（空行剔除）。
+    """
+    return list(load_docx_lines_shared(path))
+
+
+def read_docx_text(path: str | Path) -> str:
+    """
+    读取 docx 全文（行之间以换行分隔），等价于 ``"\n".join(read_docx_lines(path))``，
+    直接拼接缓存中的行列表，不额外复制。
+    """
+    return "\n".join(load_docx_lines_shared(path))
+
+
 def write_docx_lines(
     path: str | Path,
     lines: Iterable[str],
@@ -36,11 +239,80 @@ def write_docx_lines(
     title: Optional[str] = None,
 ) -> None:
     """
-    将“行”写入 docx：每行一个段落。
+    将“行”写入 docx：每行一个段落（title 不为空时首段为一级标题）。
+
+    以 python-docx 自带的空白模板为底，直接拼接 ``<w:p>`` 片段写入 word/document.xml，
+    不逐段构建 python-docx 对象；生成的文档与 ``Document().add_paragraph`` 逐行写入一致。
+    找不到模板时回退到 python-docx。
     """
     p = Path(path)
     p.parent.mkdir(parents=True, exist_ok=True)
 
+    template = _blank_docx_template()
+    if template is None:
+        _write_docx_lines_python_docx(p, lines, title=title)
+        return
+
+    parts: List[str] = []
+    if title:
+        parts.append(f'<w:p><w:pPr><w:pStyle w:val="Heading1"/></w:pPr>{_run_xml(title)}</w:p>')
+    for line in lines:
+        t = (line or "").rstrip()
+        parts.append(f"<w:p>{_run_xml(t)}</w:p>" if t else "<w:p/>")
+
+    with zipfile.ZipFile(io.BytesIO(template)) as src, zipfile.ZipFile(str(p), "w", zipfile.ZIP_DEFLATED) as dst:
+        for item in src.infolist():
+            data = src.read(item.filename)
+            if item.filename == "word/document.xml":
+                xml = data.decode("utf-8")
+                i = xml.index("<w:sectPr", xml.index("<w:body>"))
+                data = (xml[:i] + "".join(parts) + xml[i:]).encode("utf-8")
+            dst.writestr(item, data)
+
+
+# XML 1.0 不允许的控制字符（python-docx 遇到会直接报错，这里剔除）
+_XML_INVALID_RE = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+_BLANK_TEMPLATE: List[bytes] = []
+
+
+def _blank_docx_template() -> Optional[bytes]:
+    """python-docx 自带的 default.docx 模板字节（进程内只读一次）；找不到时返回 None。"""
+    if not _BLANK_TEMPLATE:
+        spec = importlib.util.find_spec("docx")  # 只定位包目录，不导入 python-docx
+        if spec is None or not spec.submodule_search_locations:
+            return None
+        tpl = Path(list(spec.submodule_search_locations)[0]) / "templates" / "default.docx"
+        try:
+            _BLANK_TEMPLATE.append(tpl.read_bytes())
+        except OSError:
+            return None
+    return _BLANK_TEMPLATE[0]
+
+
+def _run_xml(text: str) -> str:
+    """单个 w:r 片段：\t 转 w:tab，换行转 w:br（与 python-docx 的 run.text 赋值规则一致）。"""
+    text = _XML_INVALID_RE.sub("", text)
+    out: List[str] = ["<w:r>"]
+    for piece in re.split(r"(\t|\r\n|\r|\n)", text):
+        if piece == "\t":
+            out.append("<w:tab/>")
+        elif piece in ("\n", "\r", "\r\n"):
+            out.append("<w:br/>")
+        elif piece:
+            out.append(f'<w:t xml:space="preserve">{xml_escape(piece)}</w:t>')
+    out.append("</w:r>")
+    return "".join(out)
+
+
+def _write_docx_lines_python_docx(
+    p: Path,
+    lines: Iterable[str],
+    *,
+    title: Optional[str] = None,
+) -> None:
+    """python-docx 版本的 write_docx_lines（找不到模板时的兜底）。"""
+    from docx import Document
+
     doc = Document()
     if title:
         doc.add_heading(title, level=1)
@@ -0,0 +1,39 @@
+"""剧本目录 / 节拍表的小工具 — judge / review_loop / rewriter 共用。"""
+
+from __future__ import annotations
+
+import os
+import re
+from operator import itemgetter
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# 剧本文件名中的集号（ep1.txt -> 1）
+_EP_NUM_RE = re.compile(r"ep(\d+)")
+
+
+def scan_episode_files(ep_dir: Path) -> List[Tuple[int, Path]]:
+    """列出目录中的 ep*.txt，返回按集号排序的 (集号, 路径) 列表。
+
+    os.scandir 直接给出文件名，集号每个文件只解析一次（排序时不再重复跑正则）；
+    文件名中取不到集号的忽略。
+    """
+    entries: List[Tuple[int, Path]] = []
+    with os.scandir(ep_dir) as it:
+        for e in it:
+            name = e.name
+            if not (name.startswith("ep") and name.endswith(".txt")):
+                continue
+            m = _EP_NUM_RE.search(name)
+            if m and e.is_file():
+                entries.append((int(m.group(1)), Path(e.path)))
+    entries.sort(key=itemgetter(0))
+    return entries
+
+
+def index_plan(plan: List[Dict]) -> Dict[int, Dict]:
+    """节拍表按集号建索引（集号重复时取第一条，与顺序查找一致）。"""
+    index: Dict[int, Dict] = {}
+    for item in plan:
+        index.setdefault(item.get("ep"), item)
+    return index
@@ -2,15 +2,16 @@
 
 from __future__ import annotations
 
-import json
-import statistics as st
+import io
+import os
 from dataclasses import dataclass
+from operator import attrgetter
 from pathlib import Path
 from typing import Dict, List, Optional
 
+from . import jsonio
 from .style_profile import (
-    _parse_episodes,
-    _episode_stats,
+    stream_episode_stats,
     EpisodeStats,
 )
 
@@ -49,6 +50,10 @@ METRIC_MAP = {
     "vo_os_lines_per_ep": ("旁白行/集", "vo_os_lines"),
 }
 
+# 模块加载时按 METRIC_MAP 顺序预先展开：(target 键, 中文指标名) 与对应的 EpisodeStats 字段
+_METRIC_KEYS = tuple((key, cn_name) for key, (cn_name, _) in METRIC_MAP.items())
+_get_avg_fields = attrgetter(*(attr for _, attr in METRIC_MAP.values()))
+
 
 # ── 核心逻辑 ────────────────────────────────────────────────────
 
@@ -68,33 +73,28 @@ def evaluate_script(
     -------
     EvaluationReport
     """
-    lines = script_text.split("\n")
-    eps = _parse_episodes(lines)
+    # 逐行流式统计，不先 split 出整份行列表、也不按集分组出行列表
+    lines = (ln.rstrip("\n") for ln in io.StringIO(script_text))
+    per_ep = stream_episode_stats(lines)
 
-    if not eps:
+    if not per_ep:
         return EvaluationReport(
             episode_count=0,
             per_episode=[],
             comparisons=[],
         )
 
-    per_ep = [_episode_stats(ep, eps[ep]) for ep in sorted(eps)]
-
-    # 计算各集均值
-    avg = {
-        "scenes": float(st.mean(e.scenes for e in per_ep)),
-        "total_lines": float(st.mean(e.total_lines for e in per_ep)),
-        "dialogue_lines": float(st.mean(e.dialogue_lines for e in per_ep)),
-        "stage_lines": float(st.mean(e.stage_lines for e in per_ep)),
-        "vo_os_lines": float(st.mean(e.vo_os_lines for e in per_ep)),
-    }
+    # 计算各集均值：一次遍历按列转置后求和（不再对每个字段各跑一遍 statistics.mean）
+    n = len(per_ep)
+    means = [sum(col) / n for col in zip(*map(_get_avg_fields, per_ep))]
 
+    # 均值与指标按同一顺序对齐，直接 zip 比较，不再经中间 dict 按字段名回查
     comparisons: List[MetricComparison] = []
-    for key, (cn_name, attr_name) in METRIC_MAP.items():
+    for (key, cn_name), mean in zip(_METRIC_KEYS, means):
         spec = target.get(key)
         if spec is None:
             continue
-        gen_val = round(avg[attr_name], 2)
+        gen_val = round(mean, 2)
         lo, hi = spec["range"]
         comparisons.append(MetricComparison(
             name=cn_name,
@@ -113,12 +113,15 @@ def evaluate_script(
 
 
 def load_target(profile_path: str | Path = "juben_gen/style_profile.json") -> Dict[str, Dict]:
-    """从 style_profile.json 加载 target 区间。"""
-    p = Path(profile_path)
-    if not p.exists():
+    """从 style_profile.json 加载 target 区间。
+
+    与 validator.load_target 共用按 (路径, mtime, 大小) 缓存的解析结果（同一进程内先校验再评估时只解析一次），
+    返回共享对象，调用方不应修改。
+    """
+    if not os.path.exists(profile_path):
         from .validator import DEFAULT_TARGET
         return DEFAULT_TARGET
-    data = json.loads(p.read_text(encoding="utf-8"))
+    data = jsonio.load_json_cached(profile_path)
     return data.get("target", {})
 
 
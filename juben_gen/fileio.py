@@ -0,0 +1,31 @@
+"""文件写入小工具 — 原子写（先写临时文件再 os.replace）。
+
+缓存 / 中间 JSON 都走这里：进程中途崩溃或多线程同时写同一文件时，
+读方看到的要么是旧文件，要么是完整的新文件，不会读到半截内容。
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+
+
+def write_bytes_atomic(path: str | Path, data: bytes) -> Path:
+    """把 data 原子地写入 path（自动创建父目录）。
+
+    临时文件与目标同目录，文件名带进程号与线程号，同一进程内多个线程
+    （如并发构建画像时解析同一份 docx）写同一目标也不会互相覆盖临时文件。
+    写入失败时删除临时文件并照常抛出异常。
+    """
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    tmp = p.with_name(f"{p.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, p)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return p
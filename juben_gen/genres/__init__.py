@@ -20,12 +20,15 @@
 from __future__ import annotations
 
 import json
+import os
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
 
 # 题材 JSON 文件所在目录
 _GENRE_DIR = Path(__file__).parent
+_GENRE_DIR_STR = str(_GENRE_DIR)
 
 # 内置题材名 -> 文件名映射
 _BUILTIN_GENRES: Dict[str, str] = {
@@ -53,7 +56,7 @@ _CN_TO_EN: Dict[str, str] = {
 class CharacterType:
     """题材典型角色类型。"""
     role: str
-    typical_traits: List[str]
+    typical_traits: Tuple[str, ...]
     speech_style: str
 
 
@@ -70,64 +73,68 @@ class GenreTemplate:
     """题材模板，包含通用层不覆盖的题材专属信息。"""
     genre: str                          # 中文名
     genre_en: str                       # 英文标识
-    traits: List[str]                   # 题材核心特征
-    character_types: List[CharacterType]  # 典型角色类型
-    conflict_patterns: List[str]        # 冲突模式
-    iconic_scenes: List[str]            # 标志性场景
+    traits: Tuple[str, ...]             # 题材核心特征
+    character_types: Tuple[CharacterType, ...]  # 典型角色类型
+    conflict_patterns: Tuple[str, ...]  # 冲突模式
+    iconic_scenes: Tuple[str, ...]      # 标志性场景
     hook_primary: str                   # 主力钩子类型
     hook_secondary: str                 # 辅助钩子类型
     hook_notes: str                     # 钩子使用说明
-    style_overrides: Dict[str, str] = field(default_factory=dict)  # 风格覆盖
+    style_overrides: Mapping[str, str] = field(default_factory=lambda: MappingProxyType({}))  # 风格覆盖（只读）
 
     def to_dict(self) -> Dict:
-        """转为可序列化的 dict。"""
+        """转为可序列化的 dict（列表/字典字段均为新副本）。"""
         return {
             "genre": self.genre,
             "genre_en": self.genre_en,
-            "traits": self.traits,
+            "traits": list(self.traits),
             "character_types": [
                 {
                     "role": ct.role,
-                    "typical_traits": ct.typical_traits,
+                    "typical_traits": list(ct.typical_traits),
                     "speech_style": ct.speech_style,
                 }
                 for ct in self.character_types
             ],
-            "conflict_patterns": self.conflict_patterns,
-            "iconic_scenes": self.iconic_scenes,
+            "conflict_patterns": list(self.conflict_patterns),
+            "iconic_scenes": list(self.iconic_scenes),
             "hook_preferences": {
                 "primary": self.hook_primary,
                 "secondary": self.hook_secondary,
                 "notes": self.hook_notes,
             },
-            "style_overrides": self.style_overrides,
+            "style_overrides": dict(self.style_overrides),
         }
 
 
 # ── 加载逻辑 ──────────────────────────────────────────────────
 
 
+# 进程内缓存：(绝对路径, st_mtime_ns) -> 已解析的题材模板；JSON 更新后 mtime 变化自动失效
+_GENRE_MEMO: Dict[Tuple[str, int], GenreTemplate] = {}
+
+
 def _parse_genre(data: Dict) -> GenreTemplate:
-    """将 JSON dict 解析为 GenreTemplate。"""
+    """将 JSON dict 解析为 GenreTemplate（列表字段转为 tuple，style_overrides 只读）。"""
     hooks = data.get("hook_preferences", {})
     return GenreTemplate(
         genre=data["genre"],
         genre_en=data["genre_en"],
-        traits=data.get("traits", []),
-        character_types=[
+        traits=tuple(data.get("traits", ())),
+        character_types=tuple(
             CharacterType(
                 role=ct["role"],
-                typical_traits=ct.get("typical_traits", []),
+                typical_traits=tuple(ct.get("typical_traits", ())),
                 speech_style=ct.get("speech_style", ""),
             )
-            for ct in data.get("character_types", [])
-        ],
-        conflict_patterns=data.get("conflict_patterns", []),
-        iconic_scenes=data.get("iconic_scenes", []),
+            for ct in data.get("character_types", ())
+        ),
+        conflict_patterns=tuple(data.get("conflict_patterns", ())),
+        iconic_scenes=tuple(data.get("iconic_scenes", ())),
         hook_primary=hooks.get("primary", ""),
         hook_secondary=hooks.get("secondary", ""),
         hook_notes=hooks.get("notes", ""),
-        style_overrides=data.get("style_overrides", {}),
+        style_overrides=MappingProxyType(dict(data.get("style_overrides", {}))),
     )
 
 
@@ -142,6 +149,7 @@ def load_genre(name: str) -> GenreTemplate:
     Returns
     -------
     GenreTemplate
+        同一文件（路径 + mtime 不变）重复加载时返回同一个不可变对象。
 
     Raises
     ------
@@ -152,22 +160,29 @@ def load_genre(name: str) -> GenreTemplate:
 
     # 内置题材
     if en_name in _BUILTIN_GENRES:
-        json_path = _GENRE_DIR / _BUILTIN_GENRES[en_name]
+        json_path = os.path.join(_GENRE_DIR_STR, _BUILTIN_GENRES[en_name])
     else:
         # 尝试作为文件路径
-        json_path = Path(name)
-        if not json_path.exists():
+        json_path = name
+        if not os.path.exists(json_path):
             # 尝试在 genres 目录下查找
-            json_path = _GENRE_DIR / f"{en_name}.json"
+            json_path = os.path.join(_GENRE_DIR_STR, f"{en_name}.json")
 
-    if not json_path.exists():
+    # 存在性检查与缓存 key 共用一次 os.stat（不构建 Path 对象）
+    try:
+        mtime_ns = os.stat(json_path).st_mtime_ns
+    except FileNotFoundError:
         available = ", ".join(sorted(_BUILTIN_GENRES.keys()))
         raise FileNotFoundError(
             f"题材 '{name}' 不存在。可用题材：{available}"
-        )
-
-    data = json.loads(json_path.read_text(encoding="utf-8"))
-    return _parse_genre(data)
+        ) from None
+
+    key = (os.path.abspath(json_path), mtime_ns)
+    genre = _GENRE_MEMO.get(key)
+    if genre is None:
+        data = json.loads(Path(json_path).read_text(encoding="utf-8"))
+        genre = _GENRE_MEMO[key] = _parse_genre(data)
+    return genre
 
 
 def list_genres() -> List[str]:
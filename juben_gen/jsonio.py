@@ -0,0 +1,97 @@
+"""JSON 读写小工具 — 可选使用 orjson 加速。
+
+安装了 orjson 时 loads / dumps 走 orjson（大 JSON 解析快 2~3 倍、序列化快 3~10 倍），
+否则回退到标准库 json；两者行为一致（解析失败均抛 json.JSONDecodeError 子类）。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+from .fileio import write_bytes_atomic
+
+try:  # 可选依赖
+    import orjson
+except ImportError:  # pragma: no cover - 取决于运行环境
+    orjson = None
+
+
+# (绝对路径, st_mtime_ns, st_size) -> 已解析的 JSON；文件被改写后自动失效
+_FILE_MEMO: Dict[Tuple[str, int, int], Any] = {}
+_FILE_MEMO_MAX = 32
+
+
+def loads(text: str | bytes) -> Any:
+    """解析 JSON 文本（优先 orjson）。"""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def load_json_cached(path: str | Path) -> Any:
+    """读取并解析 JSON 文件，按 (路径, mtime, 大小) 缓存解析结果。
+
+    一次全流程中 plan / write / review 各步骤重复加载同一份 bible / 节拍表时只读盘、解析一次。
+    返回的对象为共享对象，调用方不应修改。文件不存在时抛 FileNotFoundError。
+    """
+    p = os.path.abspath(path)
+    st = os.stat(p)
+    key = (p, st.st_mtime_ns, st.st_size)
+    data = _FILE_MEMO.get(key)
+    if data is None:
+        with open(p, "rb") as f:
+            data = loads(f.read())
+        if len(_FILE_MEMO) >= _FILE_MEMO_MAX:
+            _FILE_MEMO.clear()
+        _FILE_MEMO[key] = data
+    return data
+
+
+def strip_code_fence(text: str) -> str:
+    """去掉 LLM 响应外层的 markdown 代码块（```json ... ```），返回 strip 后的文本。
+
+    以 ``` 开头时取首行之后、最后一个 ``` 之前的内容；代码块后跟说明文字
+    （如 "```json\\n{...}\\n```\\n以上为输出。"）同样能剥掉。不以 ``` 开头时原样返回。
+    """
+    cleaned = text.strip()
+    if cleaned.startswith("```"):
+        first_newline = cleaned.find("\n")
+        last_fence = cleaned.rfind("```")
+        if 0 <= first_newline < last_fence:
+            cleaned = cleaned[first_newline + 1:last_fence].strip()
+    return cleaned
+
+
+def dumps_pretty(obj: Any) -> bytes:
+    """序列化为 UTF-8 字节（2 空格缩进、不转义中文），与
+    ``json.dumps(obj, ensure_ascii=False, indent=2)`` 输出一致。"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def dumps_compact(obj: Any) -> bytes:
+    """序列化为单行 UTF-8 字节（无多余空格、不转义中文），用于 JSON Lines 输出。"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps_prompt(obj: Any) -> str:
+    """序列化为嵌入 prompt 的紧凑 JSON 文本（无缩进、不转义中文）。
+
+    模型不依赖缩进，去掉空白可减少 prompt token；落盘文件仍用 dumps_pretty。
+    """
+    return dumps_compact(obj).decode("utf-8")
+
+
+def write_json(path: str | Path, obj: Any) -> Path:
+    """把 obj 原子地写成格式化 JSON 文件（自动创建父目录）。
+
+    经 fileio.write_bytes_atomic 先写同目录临时文件再 os.replace，进程中途崩溃也不会留下半截 JSON
+    （下游步骤读到的要么是旧文件，要么是完整的新文件）。
+    """
+    return write_bytes_atomic(path, dumps_pretty(obj))
@@ -10,11 +10,15 @@ from __future__ import annotations
 
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 
+from . import jsonio
+from .cache import ResponseCache, llm_cache_key
 from .config import AppConfig, RoleConfig, maybe_load_config
-from .llm_clients import ClaudeClient, LLMResponse
+from .episodes import index_plan, scan_episode_files
+from .llm_clients import DEFAULT_BATCH_MAX_WAIT, ClaudeClient, LLMResponse
 from .prompts import build_system_prompt, load_fused_constraints, prompt_judge_episode
 from .rules import AdaptRules
 
@@ -23,6 +27,12 @@ logger = logging.getLogger(__name__)
 # 默认通过阈值：overall >= 75
 DEFAULT_PASS_THRESHOLD = 75.0
 
+# 评分的 9 个维度（overall 取其均值）
+_JUDGE_DIMS = (
+    "open_hook", "core_conflict", "turn", "highlight",
+    "rhythm", "character", "shootable", "end_hook", "safety",
+)
+
 
 def judge_episode(
     *,
@@ -32,9 +42,13 @@ def judge_episode(
     config: Optional[AppConfig] = None,
     constraints_path: str = "juben_gen/constraints.fused.json",
     pass_threshold: float = DEFAULT_PASS_THRESHOLD,
+    client: Optional[ClaudeClient] = None,
+    cache: Optional[ResponseCache] = None,
 ) -> Dict:
     """对单集剧本做审稿评分。
 
+    cache 不为 None 时，剧本 + system prompt + 模型完全一致则直接复用上次的评审响应。
+
     Parameters
     ----------
     episode_script : 单集剧本纯文本
@@ -43,6 +57,8 @@ def judge_episode(
     config : 应用配置，为 None 时使用默认配置
     constraints_path : 融合约束 JSON 路径
     pass_threshold : 通过阈值（overall >= 此值为通过）
+    client : 复用的 Claude 客户端（多集循环中共享连接池），为 None 时新建
+    cache : 评审响应缓存（可选）
 
     Returns
     -------
@@ -51,6 +67,63 @@ def judge_episode(
     cfg = config or maybe_load_config()
     role_cfg: RoleConfig = cfg.roles["judge"]
 
+    request = _build_judge_request(
+        episode_script=episode_script,
+        episode_plan=episode_plan,
+        rules=rules,
+        role_cfg=role_cfg,
+        constraints_path=constraints_path,
+    )
+    key = _judge_cache_key(request)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return _finish_review(LLMResponse(text=cached), pass_threshold)
+
+    # 调用 Claude API（extended thinking）
+    client = client or ClaudeClient(
+        max_attempts=cfg.retry.max_attempts,
+        base_delay=cfg.retry.base_delay,
+    )
+    logger.info(
+        "调用 Claude API（judge 角色，模型=%s，thinking=%s）",
+        role_cfg.model,
+        role_cfg.thinking,
+    )
+    response: LLMResponse = client.chat(**request)
+
+    review = _finish_review(response, pass_threshold)
+    # 解析成功后才写缓存，避免把格式错误的响应固化下来
+    if cache is not None:
+        cache.put(key, response.text)
+    return review
+
+
+def _judge_cache_key(request: Dict) -> str:
+    """审稿请求的缓存 key：system prompt + user prompt（含剧本与节拍表上下文）+ 模型 + 生成参数。
+
+    thinking / budget_tokens / max_tokens 改动后旧评审失效；pass_threshold 不计入——
+    缓存的是原始响应文本，通过判定由 _finish_review 按当次阈值重新计算。
+    """
+    return llm_cache_key(
+        request["system"],
+        request["messages"][0]["content"],
+        model=request["model"],
+        max_tokens=request["max_tokens"],
+        thinking=request["thinking"],
+        budget_tokens=request["budget_tokens"],
+    )
+
+
+def _build_judge_request(
+    *,
+    episode_script: str,
+    episode_plan: Optional[Dict],
+    rules: AdaptRules,
+    role_cfg: RoleConfig,
+    constraints_path: str,
+) -> Dict:
+    """组装单集审稿请求，返回 ClaudeClient.chat 的关键字参数。"""
     # 1. 加载融合约束
     constraints = None
     style_target: Dict = {}
@@ -64,7 +137,7 @@ def judge_episode(
     # 如果有节拍表规划，追加到剧本文本前面作为上下文
     script_with_context = episode_script
     if episode_plan:
-        plan_text = json.dumps(episode_plan, ensure_ascii=False, indent=2)
+        plan_text = jsonio.dumps_prompt(episode_plan)
         script_with_context = (
             f"【本集节拍表规划（评审参考）】\n{plan_text}\n\n"
             f"【剧本正文】\n{episode_script}"
@@ -76,32 +149,27 @@ def judge_episode(
         style_target=style_target or None,
     )
 
-    # 3. 调用 Claude API（extended thinking）
-    client = ClaudeClient(
-        max_attempts=cfg.retry.max_attempts,
-        base_delay=cfg.retry.base_delay,
-    )
-    logger.info(
-        "调用 Claude API（judge 角色，模型=%s，thinking=%s）",
-        role_cfg.model,
-        role_cfg.thinking,
-    )
-    response: LLMResponse = client.chat(
-        model=role_cfg.model,
-        system=system,
-        messages=[{"role": "user", "content": user_msg}],
-        thinking=role_cfg.thinking,
-        budget_tokens=role_cfg.budget_tokens,
-        max_tokens=8192,
-    )
+    return {
+        "model": role_cfg.model,
+        "system": system,
+        "messages": [{"role": "user", "content": user_msg}],
+        "thinking": role_cfg.thinking,
+        "budget_tokens": role_cfg.budget_tokens,
+        "max_tokens": 8192,
+    }
+
 
+def _finish_review(response: LLMResponse, pass_threshold: float) -> Dict:
+    """解析评分 JSON，计算 overall 分数与通过判定。"""
     if response.thinking:
         logger.info("Extended thinking 输出（前200字）：%s", response.thinking[:200])
+    if response.raw.get("stop_reason") == "max_tokens":
+        logger.warning("评分响应达到 max_tokens 上限，输出可能被截断")
 
-    # 4. 解析评分 JSON
+    # 解析评分 JSON
     review = _parse_review_json(response.text)
 
-    # 5. 计算 overall 分数和通过判定
+    # 计算 overall 分数和通过判定
     review = _enrich_review(review, pass_threshold)
 
     ep = review.get("episode", "?")
@@ -114,10 +182,7 @@ def judge_episode(
 
 def save_review(review: Dict, output_dir: str | Path, ep_num: int) -> Path:
     """保存评分 JSON 到 {output_dir}/reviews/ep{N}_review.json。"""
-    d = Path(output_dir) / "reviews"
-    d.mkdir(parents=True, exist_ok=True)
-    p = d / f"ep{ep_num}_review.json"
-    p.write_text(json.dumps(review, ensure_ascii=False, indent=2), encoding="utf-8")
+    p = jsonio.write_json(Path(output_dir) / "reviews" / f"ep{ep_num}_review.json", review)
     logger.info("评分 JSON 已保存：%s", p)
     return p
 
@@ -131,9 +196,16 @@ def judge_all_episodes(
     constraints_path: str = "juben_gen/constraints.fused.json",
     output_dir: str | Path,
     pass_threshold: float = DEFAULT_PASS_THRESHOLD,
+    max_workers: Optional[int] = None,
+    use_batch: bool = False,
+    batch_poll_interval: float = 30.0,
+    batch_max_wait: float = DEFAULT_BATCH_MAX_WAIT,
+    force_rejudge: bool = False,
 ) -> List[Dict]:
     """对所有已生成的剧本逐集评分。
 
+    剧本、prompt 与模型都未变化的集直接复用上次的评审响应（``judge`` 缓存），不再调用 API。
+
     Parameters
     ----------
     episodes_dir : 剧本目录（含 ep1.txt, ep2.txt, ...）
@@ -143,6 +215,13 @@ def judge_all_episodes(
     constraints_path : 融合约束 JSON 路径
     output_dir : 输出目录（评分文件保存到 {output_dir}/reviews/）
     pass_threshold : 通过阈值
+    max_workers : 同时评分的集数，为 None 时取 config.concurrency.max_workers
+        （各集评分互不依赖，结果顺序与剧本顺序一致）
+    use_batch : 为 True 时所有集合并为一个 Message Batches 批处理提交（费用约减半，
+        完成时间取决于排队情况）；批处理中失败的集改走同步调用
+    batch_poll_interval : 批处理状态轮询间隔（秒）
+    batch_max_wait : 批处理最长等待秒数，超时取消批处理、所有未完成的集改走同步调用
+    force_rejudge : 为 True 时跳过评审缓存，所有集重新调用 API 评分
 
     Returns
     -------
@@ -153,22 +232,22 @@ def judge_all_episodes(
         raise FileNotFoundError(f"剧本目录不存在：{ep_dir}")
 
     # 收集所有 epN.txt 文件，按集号排序
-    ep_files = sorted(ep_dir.glob("ep*.txt"), key=lambda f: _extract_ep_num(f.name))
+    ep_files = scan_episode_files(ep_dir)
     if not ep_files:
         raise FileNotFoundError(f"剧本目录中未找到 ep*.txt 文件：{ep_dir}")
 
     # 可选加载节拍表
     plan: List[Dict] = []
     if plan_path and Path(plan_path).exists():
-        plan = json.loads(Path(plan_path).read_text(encoding="utf-8"))
+        plan = jsonio.load_json_cached(plan_path)
+    plan_by_ep = index_plan(plan)
 
-    reviews: List[Dict] = []
-    for ep_file in ep_files:
-        ep_num = _extract_ep_num(ep_file.name)
+    def _judge_one(ep: Tuple[int, Path]) -> Dict:
+        ep_num, ep_file = ep
         script = ep_file.read_text(encoding="utf-8")
 
         # 匹配节拍表中对应集
-        episode_plan = _find_episode_plan(plan, ep_num)
+        episode_plan = plan_by_ep.get(ep_num)
 
         review = judge_episode(
             episode_script=script,
@@ -177,11 +256,43 @@ def judge_all_episodes(
             config=config,
             constraints_path=constraints_path,
             pass_threshold=pass_threshold,
+            client=client,
+            cache=cache,
         )
         review["episode"] = ep_num
 
         save_review(review, output_dir, ep_num)
-        reviews.append(review)
+        return review
+
+    cfg = config or maybe_load_config()
+    workers = max_workers or cfg.concurrency.max_workers
+    # 所有集共用一个客户端（底层 httpx 连接池线程安全），省去逐集重建连接与 TLS 握手
+    client = ClaudeClient(
+        max_attempts=cfg.retry.max_attempts,
+        base_delay=cfg.retry.base_delay,
+    )
+    cache = ResponseCache("judge", enabled=not force_rejudge)
+    if use_batch:
+        reviews = _judge_batch(
+            ep_files=ep_files,
+            plan_by_ep=plan_by_ep,
+            rules=rules,
+            cfg=cfg,
+            constraints_path=constraints_path,
+            output_dir=output_dir,
+            pass_threshold=pass_threshold,
+            poll_interval=batch_poll_interval,
+            max_wait=batch_max_wait,
+            fallback=_judge_one,
+            client=client,
+            cache=cache,
+        )
+    elif workers <= 1:
+        reviews = [_judge_one(f) for f in ep_files]
+    else:
+        logger.info("并发评分（max_workers=%d）", workers)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            reviews = list(pool.map(_judge_one, ep_files))
 
     # 汇总统计
     passed_count = sum(1 for r in reviews if r.get("pass", False))
@@ -195,19 +306,79 @@ def judge_all_episodes(
     return reviews
 
 
+def _judge_batch(
+    *,
+    ep_files: List[Tuple[int, Path]],
+    plan_by_ep: Dict[int, Dict],
+    rules: AdaptRules,
+    cfg: AppConfig,
+    constraints_path: str,
+    output_dir: str | Path,
+    pass_threshold: float,
+    poll_interval: float,
+    max_wait: float,
+    fallback: Callable[[Tuple[int, Path]], Dict],
+    client: ClaudeClient,
+    cache: ResponseCache,
+) -> List[Dict]:
+    """把所有集的审稿请求合并为一个批处理提交；未成功的集调用 fallback 同步评分。
+
+    已命中评审缓存的集不进入批处理。
+    """
+    role_cfg: RoleConfig = cfg.roles["judge"]
+    requests: Dict[str, Dict] = {}
+    cached: Dict[str, str] = {}
+    for ep_num, ep_file in ep_files:
+        request = _build_judge_request(
+            episode_script=ep_file.read_text(encoding="utf-8"),
+            episode_plan=plan_by_ep.get(ep_num),
+            rules=rules,
+            role_cfg=role_cfg,
+            constraints_path=constraints_path,
+        )
+        text = cache.get(_judge_cache_key(request))
+        if text is not None:
+            cached[f"ep{ep_num}"] = text
+        else:
+            requests[f"ep{ep_num}"] = request
+
+    responses: Dict[str, LLMResponse] = {}
+    if requests:
+        logger.info("批处理审稿：%d 集（judge 角色，模型=%s）", len(requests), role_cfg.model)
+        responses = client.chat_batch(requests, poll_interval=poll_interval, max_wait=max_wait)
+
+    reviews: List[Dict] = []
+    for ep in ep_files:
+        ep_num = ep[0]
+        custom_id = f"ep{ep_num}"
+        if custom_id in cached:
+            review = _finish_review(LLMResponse(text=cached[custom_id]), pass_threshold)
+        else:
+            response = responses.get(custom_id)
+            if response is None:
+                logger.warning("第 %d 集批处理未成功，改为同步评分", ep_num)
+                reviews.append(fallback(ep))
+                continue
+            review = _finish_review(response, pass_threshold)
+            cache.put(_judge_cache_key(requests[custom_id]), response.text)
+        review["episode"] = ep_num
+        save_review(review, output_dir, ep_num)
+        reviews.append(review)
+    return reviews
+
+
 def _parse_review_json(text: str) -> Dict:
     """从 LLM 响应文本中提取评分 JSON。"""
-    cleaned = text.strip()
-
     # 去除 markdown 代码块标记
-    if cleaned.startswith("```"):
-        first_newline = cleaned.index("\n")
-        last_fence = cleaned.rfind("```")
-        if last_fence > first_newline:
-            cleaned = cleaned[first_newline + 1 : last_fence].strip()
+    cleaned = jsonio.strip_code_fence(text)
+
+    # 结尾不是 } 的必然不完整（多为 max_tokens 截断），不必整段解析再报错
+    if not cleaned.endswith("}"):
+        logger.error("评分 JSON 不完整（结尾缺少 }）\n原始响应（末尾200字符）：%s", text[-200:])
+        raise ValueError("LLM 返回的评分 JSON 不完整（疑似被截断）：结尾缺少 }")
 
     try:
-        result = json.loads(cleaned)
+        result = jsonio.loads(cleaned)
     except json.JSONDecodeError as e:
         logger.error(
             "评分 JSON 解析失败：%s\n原始响应（前500字符）：%s", e, text[:500]
@@ -227,39 +398,18 @@ def _enrich_review(review: Dict, pass_threshold: float) -> Dict:
     """
     scores = review.get("scores", {})
 
-    # 9个维度
-    dimensions = [
-        "open_hook", "core_conflict", "turn", "highlight",
-        "rhythm", "character", "shootable", "end_hook", "safety",
-    ]
-    raw_scores = [scores.get(d, 0) for d in dimensions]
-    valid_scores = [s for s in raw_scores if isinstance(s, (int, float))]
-
-    if valid_scores:
-        avg_raw = sum(valid_scores) / len(valid_scores)
-        overall = round(avg_raw * 20, 1)  # 0-5 映射到 0-100
-    else:
-        overall = 0.0
+    # 单次遍历累加，不构造中间列表
+    total = 0.0
+    n = 0
+    for d in _JUDGE_DIMS:
+        v = scores.get(d, 0)
+        if isinstance(v, (int, float)):
+            total += v
+            n += 1
+    overall = round(total / n * 20, 1) if n else 0.0  # 0-5 映射到 0-100
 
     scores["overall"] = overall
     review["scores"] = scores
     review["pass"] = overall >= pass_threshold
 
     return review
-
-
-def _extract_ep_num(filename: str) -> int:
-    """从文件名（如 ep1.txt）中提取集号。"""
-    import re
-    match = re.search(r"ep(\d+)", filename)
-    if not match:
-        raise ValueError(f"无法从文件名提取集号：{filename}")
-    return int(match.group(1))
-
-
-def _find_episode_plan(plan: List[Dict], ep_num: int) -> Optional[Dict]:
-    """在节拍表中查找对应集号的规划。"""
-    for item in plan:
-        if item.get("ep") == ep_num:
-            return item
-    return None
@@ -4,20 +4,37 @@ from __future__ import annotations
 
 import logging
 import os
+import random
 import time
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
-
-import anthropic
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple, Type, TypedDict, Union
 
 # 配置相关定义集中在 config.py；这里保留同名导出，避免外部调用断裂
 from .config import RoleConfig, load_role_configs
 
+if TYPE_CHECKING:  # anthropic（连带 httpx / pydantic）导入约 1 秒，推迟到首次创建客户端
+    import anthropic
+
 logger = logging.getLogger(__name__)
 
 # ---------- 公共类型 ----------
 
-Message = Dict[str, str]  # {"role": "user" | "assistant", "content": "..."}
+class Message(TypedDict):
+    """单条对话消息：{"role": "user" | "assistant", "content": "..."}。
+
+    content 也可以是 content block 列表（如带 cache_control 的 text block）。
+    """
+    role: str
+    content: Union[str, List[Dict[str, Any]]]
+
+
+# 服务端 prompt 缓存标记（5 分钟有效，命中时该前缀按缓存读取计费）
+EPHEMERAL_CACHE: Dict[str, str] = {"type": "ephemeral"}
+
+
+def cached_text_block(text: str) -> Dict[str, Any]:
+    """组装带 cache_control 的 text block：请求中截至该 block 的前缀会写入 prompt 缓存。"""
+    return {"type": "text", "text": text, "cache_control": EPHEMERAL_CACHE}
 
 
 @dataclass(frozen=True)
@@ -25,17 +42,44 @@ class LLMResponse:
     """统一的 LLM 响应。"""
     text: str
     thinking: str = ""
+    # 响应元数据（id / model / stop_reason / usage ...），不含 content
     raw: Dict[str, Any] = field(default_factory=dict)
 
 # ---------- Claude 客户端 ----------
 
-# 可重试的异常类型
-_RETRYABLE = (
-    anthropic.RateLimitError,
-    anthropic.APIConnectionError,
-    anthropic.APITimeoutError,
-    anthropic.InternalServerError,
-)
+# chat() 的默认参数（chat_batch 组装单条请求时补齐未指定的字段）
+_CHAT_DEFAULTS: Dict[str, Any] = {
+    "system": "",
+    "temperature": 0.7,
+    "max_tokens": 4096,
+    "thinking": False,
+    "budget_tokens": 10000,
+    "service_tier": None,
+    "cache_system": False,
+}
+
+# chat_batch 默认最长等待 1 小时（超时取消批处理，由调用方改走同步调用）
+DEFAULT_BATCH_MAX_WAIT = 3600.0
+# 取消批处理后等待其进入 ended 状态的最长秒数（之后才能取回已成功的结果）
+_BATCH_CANCEL_WAIT = 300.0
+
+# 可重试的异常类型（首次使用时从 anthropic 取）
+_RETRYABLE: Optional[Tuple[Type[Exception], ...]] = None
+
+
+def _retryable() -> Tuple[Type[Exception], ...]:
+    """返回可重试的 anthropic 异常类型元组。"""
+    global _RETRYABLE
+    if _RETRYABLE is None:
+        import anthropic
+
+        _RETRYABLE = (
+            anthropic.RateLimitError,
+            anthropic.APIConnectionError,
+            anthropic.APITimeoutError,
+            anthropic.InternalServerError,
+        )
+    return _RETRYABLE
 
 
 class ClaudeClient:
@@ -44,7 +88,10 @@ class ClaudeClient:
     特性：
     - 通过 anthropic.Anthropic 调用 Messages API
     - 支持 extended thinking（budget_tokens）
-    - 自动重试：max_attempts 次 + 指数退避（base_delay * 2^n）
+    - 支持流式输出（chat_stream，逐段返回文本增量）
+    - 支持 Message Batches 批处理（chat_batch，半价、异步完成）
+    - 自动重试：max_attempts 次 + 指数退避（base_delay * 2^n，乘 0.5~1.5 随机抖动，
+      避免并发请求同时撞上限流后又在同一时刻重试）
     - 仅捕获速率限制、网络错误和服务端错误
 
     环境变量：
@@ -68,6 +115,8 @@ class ClaudeClient:
 
         self._max_attempts = int(max_attempts)
         self._base_delay = float(base_delay)
+        # 第 n 次失败后的基础等待时间（base_delay * 2^n），实际等待再乘随机抖动
+        self._delay_schedule = tuple(self._base_delay * (1 << i) for i in range(self._max_attempts))
 
         # 给出更可操作的错误信息（避免 anthropic SDK 抛出不直观的异常）
         if not api_key and not os.getenv("ANTHROPIC_API_KEY"):
@@ -82,27 +131,35 @@ class ClaudeClient:
             kwargs["api_key"] = api_key
         if base_url:
             kwargs["base_url"] = base_url
+
+        import anthropic
+
         self._client = anthropic.Anthropic(**kwargs)
+        self._retryable = _retryable()
 
-    def chat(
-        self,
+    @staticmethod
+    def _build_params(
         *,
         model: str,
-        system: str = "",
+        system: str,
         messages: List[Message],
-        temperature: float = 0.7,
-        max_tokens: int = 4096,
-        thinking: bool = False,
-        budget_tokens: int = 10000,
-    ) -> LLMResponse:
-        """发送消息并返回响应，自动重试可恢复的错误。"""
+        temperature: float,
+        max_tokens: int,
+        thinking: bool,
+        budget_tokens: int,
+        service_tier: Optional[str] = None,
+        cache_system: bool = False,
+    ) -> Dict[str, Any]:
+        """组装 Messages API 请求参数。"""
         params: Dict[str, Any] = {
             "model": model,
-            "messages": [{"role": m["role"], "content": m["content"]} for m in messages],
+            # 调用方传入的已是 {"role", "content"} 结构（见 Message），直接透传不逐条复制
+            "messages": messages,
             "max_tokens": max_tokens,
         }
         if system:
-            params["system"] = system
+            # cache_system 时把 system 作为带缓存标记的 block 发送，跨请求复用同一前缀
+            params["system"] = [cached_text_block(system)] if cache_system else system
 
         if thinking:
             params["thinking"] = {"type": "enabled", "budget_tokens": budget_tokens}
@@ -110,24 +167,167 @@ class ClaudeClient:
         else:
             params["temperature"] = temperature
 
+        if service_tier:
+            params["service_tier"] = service_tier
+
+        return params
+
+    def chat(
+        self,
+        *,
+        model: str,
+        system: str = "",
+        messages: List[Message],
+        temperature: float = 0.7,
+        max_tokens: int = 4096,
+        thinking: bool = False,
+        budget_tokens: int = 10000,
+        service_tier: Optional[str] = None,
+        cache_system: bool = False,
+    ) -> LLMResponse:
+        """发送消息并返回响应，自动重试可恢复的错误。
+
+        service_tier 为 "auto" 时有 Priority Tier 额度则优先使用（首字延迟更低），为 None 时按 API 默认。
+        cache_system=True 时 system prompt 标记为可缓存，多次请求共用同一 system 时
+        服务端直接复用已缓存的前缀（短于模型最小缓存长度时自动忽略）。
+        """
+        params = self._build_params(
+            model=model, system=system, messages=messages, temperature=temperature,
+            max_tokens=max_tokens, thinking=thinking, budget_tokens=budget_tokens,
+            service_tier=service_tier, cache_system=cache_system,
+        )
         return self._call_with_retry(params)
 
-    def _call_with_retry(self, params: Dict[str, Any]) -> LLMResponse:
-        """带指数退避的重试逻辑。"""
+    def chat_stream(
+        self,
+        *,
+        model: str,
+        system: str = "",
+        messages: List[Message],
+        temperature: float = 0.7,
+        max_tokens: int = 4096,
+        thinking: bool = False,
+        budget_tokens: int = 10000,
+        service_tier: Optional[str] = None,
+        cache_system: bool = False,
+    ) -> Iterator[str]:
+        """流式发送消息，逐段 yield 文本增量（不含思维链）。
+
+        只在尚未收到任何文本时重试；已输出部分内容后出错直接抛出，
+        避免调用方收到重复片段。调用方中途停止迭代即中止该次请求。
+        """
+        params = self._build_params(
+            model=model, system=system, messages=messages, temperature=temperature,
+            max_tokens=max_tokens, thinking=thinking, budget_tokens=budget_tokens,
+            service_tier=service_tier, cache_system=cache_system,
+        )
         last_error: Exception | None = None
         for attempt in range(self._max_attempts):
+            started = False
             try:
-                response = self._client.messages.create(**params)
-                return self._parse_response(response)
-            except _RETRYABLE as e:
+                with self._client.messages.stream(**params) as stream:
+                    for delta in stream.text_stream:
+                        started = True
+                        yield delta
+                return
+            except self._retryable as e:
+                if started:
+                    raise RuntimeError(f"流式响应中断：{e}") from e
                 last_error = e
                 if attempt >= self._max_attempts - 1:
                     break
-                delay = self._base_delay * (2**attempt)
-                logger.warning("API 调用失败（第 %d 次），%s 秒后重试：%s", attempt + 1, delay, e)
+                delay = self._backoff(attempt)
+                logger.warning("流式 API 调用失败（第 %d 次），%.2f 秒后重试：%s", attempt + 1, delay, e)
                 time.sleep(delay)
         raise RuntimeError(f"API 调用失败，已尝试 {self._max_attempts} 次：{last_error}") from last_error
 
+    def chat_batch(
+        self,
+        requests: Dict[str, Dict[str, Any]],
+        *,
+        poll_interval: float = 30.0,
+        max_wait: float = DEFAULT_BATCH_MAX_WAIT,
+    ) -> Dict[str, LLMResponse]:
+        """通过 Message Batches API 一次提交多条请求，轮询到整批结束后返回结果。
+
+        批处理异步执行、费用约为同步调用的一半，适合不赶时间的离线步骤（如逐集审稿）。
+
+        Parameters
+        ----------
+        requests : custom_id -> chat() 的关键字参数（model / system / messages / thinking ...）
+        poll_interval : 轮询批处理状态的间隔（秒）
+        max_wait : 最长等待秒数；超时仍未结束时取消该批处理，再最多等 _BATCH_CANCEL_WAIT 秒
+            到批处理结束后照常收集已成功的请求（批处理最长可排队 24 小时，不设上限会一直阻塞进程）
+
+        Returns
+        -------
+        custom_id -> LLMResponse；失败、过期、被取消或等待超时的请求不在结果中（已记 warning），
+        由调用方决定是否改走同步调用。
+        """
+        batch_requests = [
+            {"custom_id": custom_id, "params": self._build_params(**{**_CHAT_DEFAULTS, **kwargs})}
+            for custom_id, kwargs in requests.items()
+        ]
+        batches = self._client.messages.batches
+        batch = self._with_retry(lambda: batches.create(requests=batch_requests))
+        logger.info("已提交批处理 %s（%d 条请求）", batch.id, len(batch_requests))
+
+        deadline = time.monotonic() + max_wait
+        canceled = False
+        while batch.processing_status != "ended":
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                if canceled:
+                    logger.warning("批处理 %s 取消后 %.0f 秒内仍未结束，放弃收集结果", batch.id, _BATCH_CANCEL_WAIT)
+                    return {}
+                logger.warning("批处理 %s 等待超过 %.0f 秒仍未结束，取消该批处理", batch.id, max_wait)
+                try:
+                    self._with_retry(lambda: batches.cancel(batch.id))
+                except Exception as e:  # 取消失败不影响调用方改走同步调用
+                    logger.warning("取消批处理 %s 失败：%s", batch.id, e)
+                    return {}
+                # 取消后已完成（已计费）的请求结果仍可取回：再等一小段时间到批处理结束
+                canceled = True
+                deadline = time.monotonic() + _BATCH_CANCEL_WAIT
+                remaining = _BATCH_CANCEL_WAIT
+            time.sleep(min(poll_interval, remaining))
+            batch = self._with_retry(lambda: batches.retrieve(batch.id))
+            logger.debug("批处理 %s 状态：%s", batch.id, batch.processing_status)
+
+        results: Dict[str, LLMResponse] = {}
+        for item in self._with_retry(lambda: batches.results(batch.id)):
+            if item.result.type == "succeeded":
+                results[item.custom_id] = self._parse_response(item.result.message)
+            else:
+                detail = getattr(item.result, "error", None)
+                logger.warning("批处理请求 %s 未成功（%s）：%s", item.custom_id, item.result.type, detail)
+        logger.info("批处理 %s 完成：%d/%d 成功", batch.id, len(results), len(batch_requests))
+        return results
+
+    def _backoff(self, attempt: int) -> float:
+        """第 attempt 次（从 0 计）失败后的等待秒数：指数退避 × 0.5~1.5 随机抖动。"""
+        return self._delay_schedule[attempt] * (0.5 + random.random())
+
+    def _with_retry(self, fn):
+        """执行一次 API 调用，可恢复的错误按指数退避重试。"""
+        last_error: Exception | None = None
+        for attempt in range(self._max_attempts):
+            try:
+                return fn()
+            except self._retryable as e:
+                last_error = e
+                if attempt >= self._max_attempts - 1:
+                    break
+                delay = self._backoff(attempt)
+                logger.warning("API 调用失败（第 %d 次），%.2f 秒后重试：%s", attempt + 1, delay, e)
+                time.sleep(delay)
+        raise RuntimeError(f"API 调用失败，已尝试 {self._max_attempts} 次：{last_error}") from last_error
+
+    def _call_with_retry(self, params: Dict[str, Any]) -> LLMResponse:
+        """带指数退避的重试逻辑。"""
+        response = self._with_retry(lambda: self._client.messages.create(**params))
+        return self._parse_response(response)
+
     @staticmethod
     def _parse_response(response: anthropic.types.Message) -> LLMResponse:
         """从 API 响应中提取文本和思维链。"""
@@ -141,5 +341,6 @@ class ClaudeClient:
         return LLMResponse(
             text="".join(text_parts),
             thinking="".join(thinking_parts),
-            raw=response.model_dump(),
+            # content 已拆成 text / thinking，不再重复序列化（长思维链时开销明显）
+            raw=response.model_dump(exclude={"content"}),
         )
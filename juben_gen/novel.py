@@ -15,31 +15,63 @@ class Chapter:
     text: str   # 章节正文（不含标题行）
 
 
-_CHAPTER_RE = re.compile(r"^第(\d+)章[\\s\\u3000]*(.*)$")
+# 章节标题行：行首（可有空白）“第N章”，N 为阿拉伯数字或中文数字
+_CHAPTER_RE = re.compile(r"^[^\S\n]*第(\d+|[零〇一二两三四五六七八九十百千]+)章[^\n]*$", re.M)
+
+_CN_DIGITS = {"零": 0, "〇": 0, "一": 1, "二": 2, "两": 2, "三": 3, "四": 4, "五": 5, "六": 6, "七": 7, "八": 8, "九": 9}
+_CN_UNITS = {"十": 10, "百": 100, "千": 1000}
+
+
+def _chapter_number(token: str) -> int:
+    """章节编号转整数：'12' -> 12，'十二' -> 12，'一百零五' -> 105。"""
+    if token.isdigit():
+        return int(token)
+    total, num = 0, 0
+    for ch in token:
+        if ch in _CN_UNITS:
+            total += (num or 1) * _CN_UNITS[ch]
+            num = 0
+        else:
+            num = _CN_DIGITS[ch]
+    return total + num
 
 
 def split_chapters(novel_text: str) -> List[Chapter]:
     """
     按 “第N章” 拆分章节。
     """
-    lines = novel_text.splitlines()
+    return _split_chapters(novel_text, stop_index=None)
+
+
+def split_chapters_until(novel_text: str, stop_index: int) -> List[Chapter]:
+    """
+    按 “第N章” 拆分章节，遇到编号大于 stop_index 的章节标题即停止扫描。
+
+    只需要前若干章时（如 1000 章的小说只取 1-10 章）不必扫描全书；
+    假定章节编号在正文中递增出现。
+    """
+    return _split_chapters(novel_text, stop_index=stop_index)
+
 
-    starts: List[Tuple[int, int, str]] = []
-    for i, line in enumerate(lines):
-        m = _CHAPTER_RE.match(line.strip())
-        if not m:
-            continue
-        idx = int(m.group(1))
-        starts.append((i, idx, line.strip()))
+def _split_chapters(novel_text: str, *, stop_index: Optional[int]) -> List[Chapter]:
+    # 统一换行符，保证 ^/$ 与按行拆分时一致
+    if "\r" in novel_text:
+        novel_text = novel_text.replace("\r\n", "\n").replace("\r", "\n")
 
-    if not starts:
-        return []
+    # 整篇文本一次 finditer 定位标题行，正文直接按偏移切片（不再逐行 match + join）
+    heads: List[Tuple[re.Match, int]] = []
+    end_of_last = len(novel_text)
+    for m in _CHAPTER_RE.finditer(novel_text):
+        idx = _chapter_number(m.group(1))
+        if stop_index is not None and idx > stop_index:
+            end_of_last = m.start()
+            break
+        heads.append((m, idx))
 
     chapters: List[Chapter] = []
-    for k, (start_i, idx, title_line) in enumerate(starts):
-        end_i = starts[k + 1][0] if k + 1 < len(starts) else len(lines)
-        body = "\n".join(lines[start_i + 1 : end_i]).strip()
-        chapters.append(Chapter(index=idx, title=title_line, text=body))
+    for k, (m, idx) in enumerate(heads):
+        end = heads[k + 1][0].start() if k + 1 < len(heads) else end_of_last
+        chapters.append(Chapter(index=idx, title=m.group(0).strip(), text=novel_text[m.end():end].strip()))
     return chapters
 
 
@@ -14,6 +14,8 @@ import logging
 from pathlib import Path
 from typing import Dict, List, Optional
 
+from . import jsonio
+from .cache import ResponseCache, llm_cache_key
 from .config import AppConfig, RoleConfig, maybe_load_config
 from .llm_clients import ClaudeClient, LLMResponse
 from .prompts import (
@@ -26,13 +28,16 @@ from .rules import AdaptRules
 
 logger = logging.getLogger(__name__)
 
+# 节拍表请求的输出上限（同时计入响应缓存 key）
+_PLAN_MAX_TOKENS = 16384
+
 
 def load_bible(bible_path: str | Path) -> Dict:
-    """读取 Bible JSON 文件。"""
+    """读取 Bible JSON 文件（按修改时间缓存，返回共享对象，调用方不应修改）。"""
     p = Path(bible_path)
     if not p.exists():
         raise FileNotFoundError(f"Bible JSON 不存在：{p}")
-    return json.loads(p.read_text(encoding="utf-8"))
+    return jsonio.load_json_cached(p)
 
 
 def generate_plan(
@@ -43,6 +48,7 @@ def generate_plan(
     constraints_path: str = "juben_gen/constraints.fused.json",
     episode_count: int = 10,
     sample_plan_json: str = "",
+    use_cache: bool = True,
 ) -> List[Dict]:
     """执行完整的节拍表规划流程。
 
@@ -54,6 +60,7 @@ def generate_plan(
     constraints_path : 融合约束 JSON 路径
     episode_count : 规划集数（默认10集）
     sample_plan_json : 样例节拍表 JSON 字符串（few-shot），为空则跳过
+    use_cache : 是否启用磁盘缓存（prompt + 模型不变时跳过 API 调用）
 
     Returns
     -------
@@ -64,7 +71,7 @@ def generate_plan(
 
     # 1. 加载 Bible
     bible = load_bible(bible_path)
-    bible_json_str = json.dumps(bible, ensure_ascii=False, indent=2)
+    bible_json_str = jsonio.dumps_prompt(bible)
     logger.info("已加载 Bible：logline=%s", bible.get("logline", "")[:50])
 
     # 2. 加载融合约束
@@ -84,7 +91,20 @@ def generate_plan(
         sample_plan_json=sample_plan_json,
     )
 
-    # 4. 调用 Claude API（extended thinking）
+    # 4. 查缓存
+    cache = ResponseCache("plan", enabled=use_cache)
+    key = llm_cache_key(
+        system, user_msg,
+        model=role_cfg.model,
+        max_tokens=_PLAN_MAX_TOKENS,
+        thinking=role_cfg.thinking,
+        budget_tokens=role_cfg.budget_tokens,
+    )
+    cached = cache.get(key)
+    if cached is not None:
+        return jsonio.loads(cached)
+
+    # 5. 调用 Claude API（extended thinking）
     client = ClaudeClient(
         max_attempts=cfg.retry.max_attempts,
         base_delay=cfg.retry.base_delay,
@@ -100,23 +120,24 @@ def generate_plan(
         messages=[{"role": "user", "content": user_msg}],
         thinking=role_cfg.thinking,
         budget_tokens=role_cfg.budget_tokens,
-        max_tokens=16384,
+        max_tokens=_PLAN_MAX_TOKENS,
     )
 
     if response.thinking:
         logger.info("Extended thinking 输出（前200字）：%s", response.thinking[:200])
+    if response.raw.get("stop_reason") == "max_tokens":
+        logger.warning("节拍表响应达到 max_tokens 上限，输出可能被截断")
 
-    # 5. 解析 JSON 数组
+    # 6. 解析 JSON 数组
     plan = _parse_plan_json(response.text)
     logger.info("节拍表生成完成：共 %d 集", len(plan))
+    cache.put(key, json.dumps(plan, ensure_ascii=False))
     return plan
 
 
 def save_plan(plan: List[Dict], output_path: str | Path) -> Path:
     """保存节拍表 JSON 到文件。"""
-    p = Path(output_path)
-    p.parent.mkdir(parents=True, exist_ok=True)
-    p.write_text(json.dumps(plan, ensure_ascii=False, indent=2), encoding="utf-8")
+    p = jsonio.write_json(output_path, plan)
     logger.info("节拍表 JSON 已保存：%s", p)
     return p
 
@@ -128,17 +149,16 @@ def _parse_plan_json(text: str) -> List[Dict]:
     - 纯 JSON 数组响应
     - 被 ```json ... ``` 包裹的响应
     """
-    cleaned = text.strip()
-
     # 去除 markdown 代码块标记
-    if cleaned.startswith("```"):
-        first_newline = cleaned.index("\n")
-        last_fence = cleaned.rfind("```")
-        if last_fence > first_newline:
-            cleaned = cleaned[first_newline + 1 : last_fence].strip()
+    cleaned = jsonio.strip_code_fence(text)
+
+    # 结尾不是 ] 的必然不完整（多为 max_tokens 截断），不必整段解析再报错
+    if not cleaned.endswith("]"):
+        logger.error("节拍表 JSON 不完整（结尾缺少 ]）\n原始响应（末尾200字符）：%s", text[-200:])
+        raise ValueError("LLM 返回的节拍表 JSON 不完整（疑似被截断）：结尾缺少 ]")
 
     try:
-        result = json.loads(cleaned)
+        result = jsonio.loads(cleaned)
     except json.JSONDecodeError as e:
         logger.error(
             "节拍表 JSON 解析失败：%s\n原始响应（前500字符）：%s", e, text[:500]
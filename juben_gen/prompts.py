@@ -1,16 +1,16 @@
 """Prompt 模板库 — 针对 Claude 长上下文 + extended thinking 优化。
 
 每个 prompt 函数返回 user message 文本，system prompt 通过 build_system_prompt() 生成。
-plan / judge 角色建议搭配 extended thinking 使用（由 llm_clients.RoleConfig 控制）。
+plan / judge 角色建议搭配 extended thinking 使用（由 config.RoleConfig 控制）。
 """
 
 from __future__ import annotations
 
-import json
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
+from . import jsonio
 from .rules import AdaptRules, redfruit_safety_notes
 
 # ---------- 公共数据类 ----------
@@ -28,14 +28,34 @@ class EpisodeSpec:
 # ---------- 融合约束加载 ----------
 
 
+# (绝对路径, st_mtime_ns) -> 已解析的融合约束；文件更新后 mtime 变化自动失效
+_CONSTRAINTS_MEMO: Dict[Tuple[str, int], Dict] = {}
+
+
 def load_fused_constraints(path: Union[str, Path] = "juben_gen/constraints.fused.json") -> Dict:
-    """读取融合约束 JSON（style_target + format_spec + rules_text）。"""
-    return json.loads(Path(path).read_text(encoding="utf-8"))
+    """读取融合约束 JSON（style_target + format_spec + rules_text）。
+
+    按 (路径, mtime) 缓存解析结果：一次全流程中 bible/plan/write/review 各步骤
+    重复加载同一文件时只解析一次。返回的 dict 为共享对象，调用方不应修改。
+    """
+    p = Path(path).resolve()
+    key = (str(p), p.stat().st_mtime_ns)
+    data = _CONSTRAINTS_MEMO.get(key)
+    if data is None:
+        data = jsonio.loads(p.read_bytes())
+        _CONSTRAINTS_MEMO[key] = data
+    return data
 
 
 # ---------- System Prompt ----------
 
 
+# (id(constraints), sample_snippet) -> (constraints, system prompt)；
+# 同时持有 constraints 引用，保证缓存期间 id 不会被其他对象复用
+_SYSTEM_PROMPT_MEMO: Dict[Tuple[int, str], Tuple[Optional[Dict], str]] = {}
+_SYSTEM_PROMPT_MEMO_MAX = 32
+
+
 def build_system_prompt(
     *,
     constraints: Optional[Dict] = None,
@@ -48,11 +68,26 @@ def build_system_prompt(
     constraints : 融合约束 dict（来自 constraints.fused.json），为 None 时使用精简版。
                   若含 "genre" 键，会自动注入题材特定约束。
     sample_snippet : 样例剧本片段（few-shot），为空则跳过。
+
+    同一个 constraints 对象（load_fused_constraints 返回的共享 dict）重复调用时
+    直接返回已拼好的字符串，多集循环中只组装一次；调用方不应原地修改 constraints。
     """
-    sections: List[str] = [
-        "你是资深短剧编剧与改编策划，擅长把小说改写成1-2分钟/集的红果风格短剧剧本。",
-        "输出必须信息密度高、冲突强、节奏快、结尾有钩子；不要写散文化小说。",
-    ]
+    key = (id(constraints), sample_snippet)
+    hit = _SYSTEM_PROMPT_MEMO.get(key)
+    if hit is not None and hit[0] is constraints:
+        return hit[1]
+
+    system = _assemble_system_prompt(constraints, sample_snippet)
+    if len(_SYSTEM_PROMPT_MEMO) >= _SYSTEM_PROMPT_MEMO_MAX:
+        _SYSTEM_PROMPT_MEMO.clear()
+    _SYSTEM_PROMPT_MEMO[key] = (constraints, system)
+    return system
+
+
+def _assemble_system_prompt(constraints: Optional[Dict], sample_snippet: str) -> str:
+    # 固定段落（角色设定、节奏规则、禁止事项、合规约束）已在模块加载时拼好，
+    # 这里只拼随 constraints / 样例变化的部分
+    sections: List[str] = [_SYSTEM_HEAD]
 
     # 注入格式规范
     fmt_rules = _FORMAT_RULES
@@ -61,25 +96,18 @@ def build_system_prompt(
         fmt_rules = _build_format_rules(fmt)
     sections.append("【格式硬约束】\n" + fmt_rules)
 
-    # 注入结构指标
     if constraints:
+        # 注入结构指标
         target = constraints.get("style_target", {})
         sections.append("【结构指标约束】\n" + _build_target_summary(target))
 
-    # 注入题材特定约束
-    if constraints:
+        # 注入题材特定约束
         genre_section = _build_genre_section(constraints.get("genre"))
         if genre_section:
             sections.append(genre_section)
 
-    # 注入节奏硬规则
-    sections.append(_RHYTHM_RULES)
-
-    # 注入禁止事项
-    sections.append(_PROHIBITION_LIST)
-
-    # 合规约束
-    sections.append(redfruit_safety_notes())
+    # 节奏硬规则 + 禁止事项 + 合规约束
+    sections.append(_SYSTEM_TAIL)
 
     # 样例片段（few-shot）
     if sample_snippet:
@@ -91,6 +119,23 @@ def build_system_prompt(
 # ---------- User Prompts ----------
 
 
+# id(style_target) -> (style_target, 紧凑 JSON)；同一风格目标 dict 在逐集 prompt 中只序列化一次
+_STYLE_TARGET_JSON_MEMO: Dict[int, Tuple[Dict, str]] = {}
+_STYLE_TARGET_JSON_MEMO_MAX = 16
+
+
+def _dumps_style_target(style_target: Dict) -> str:
+    """序列化风格目标（按对象身份缓存，调用方不应原地修改 style_target）。"""
+    hit = _STYLE_TARGET_JSON_MEMO.get(id(style_target))
+    if hit is not None and hit[0] is style_target:
+        return hit[1]
+    text = jsonio.dumps_prompt(style_target)
+    if len(_STYLE_TARGET_JSON_MEMO) >= _STYLE_TARGET_JSON_MEMO_MAX:
+        _STYLE_TARGET_JSON_MEMO.clear()
+    _STYLE_TARGET_JSON_MEMO[id(style_target)] = (style_target, text)
+    return text
+
+
 def prompt_story_bible(
     *,
     rules: AdaptRules,
@@ -137,7 +182,7 @@ def prompt_plan_first10(
         "【输出格式】只输出JSON数组，不要解释。每集对象字段：\n" + _PLAN_SCHEMA,
         "【起承转合参考（前10集付费卡点）】\n" + rules.card_template_notes,
         "【结尾钩子方法】\n" + rules.end_hook_notes,
-        "【样例风格目标（统计画像）】\n" + json.dumps(style_target, ensure_ascii=False, indent=2),
+        "【样例风格目标（统计画像）】\n" + _dumps_style_target(style_target),
     ]
 
     if sample_plan_json:
@@ -169,7 +214,7 @@ def prompt_write_episode(
         "【节奏要求】\n" + _WRITE_RHYTHM_RULES,
         "【禁止事项】\n" + _WRITE_PROHIBITIONS,
         "【参考规则：节奏适配关键注意事项】\n" + rules.rhythm_notes,
-        "【样例风格目标（统计画像）】\n" + json.dumps(style_target, ensure_ascii=False, indent=2),
+        "【样例风格目标（统计画像）】\n" + _dumps_style_target(style_target),
     ]
 
     if sample_script:
@@ -207,7 +252,7 @@ def prompt_judge_episode(
     if style_target:
         sections.append(
             "【结构指标约束（用于校验行数/比例）】\n"
-            + json.dumps(style_target, ensure_ascii=False, indent=2)
+            + _dumps_style_target(style_target)
         )
 
     sections.append("【剧本】\n" + episode_script)
@@ -227,18 +272,56 @@ def prompt_rewrite_episode(
     ----------
     scores_json : 审稿评分 JSON（提供上下文），为空则跳过。
     """
-    sections: List[str] = [
-        '【任务】按"修改清单"对剧本做最小改动返修：只改列出的问题，不要重写整集。',
-        "【输出】只输出返修后的完整剧本纯文本（同原格式）。",
-        "【返修原则】\n" + _REWRITE_PRINCIPLES,
-    ]
+    return "\n\n".join(prompt_rewrite_episode_parts(
+        fix_list_json=fix_list_json,
+        episode_script=episode_script,
+        scores_json=scores_json,
+    ))
+
 
+def prompt_rewrite_episode_parts(
+    *,
+    fix_list_json: str,
+    episode_script: str,
+    scores_json: str = "",
+) -> Tuple[str, str]:
+    """最小改动返修 prompt，拆成 (固定前缀, 本集内容) 两段。
+
+    固定前缀（任务/输出/返修原则）对所有集相同，可单独标记为 prompt 缓存；
+    两段以空行拼接即为 prompt_rewrite_episode 的完整文本。
+    """
+    sections: List[str] = []
     if scores_json:
         sections.append("【审稿评分JSON（上下文参考）】\n" + scores_json)
 
     sections.append("【修改清单JSON】\n" + fix_list_json)
     sections.append("【原剧本】\n" + episode_script)
 
+    return _REWRITE_HEAD, "\n\n".join(sections)
+
+
+def prompt_rewrite_episodes_batch(items: List[Dict[str, Any]]) -> str:
+    """多集合并返修 prompt：每集一个 ``<ep id=N>`` 块，要求模型按同样的块格式逐集输出。
+
+    Parameters
+    ----------
+    items : 每项含 ep（集号）、fix_list_json、episode_script，可选 scores_json。
+    """
+    sections: List[str] = [
+        f'【任务】以下共 {len(items)} 集剧本，逐集按各自的"修改清单"做最小改动返修：只改列出的问题，不要重写整集。',
+        "【输出】每集返修后的完整剧本纯文本（同原格式）包在 <ep id=集号> 与 </ep> 之间，"
+        "按输入顺序逐集输出，块外不要输出任何内容。",
+        "【返修原则】\n" + _REWRITE_PRINCIPLES,
+    ]
+
+    for item in items:
+        block: List[str] = []
+        if item.get("scores_json"):
+            block.append("【审稿评分JSON（上下文参考）】\n" + item["scores_json"])
+        block.append("【修改清单JSON】\n" + item["fix_list_json"])
+        block.append("【原剧本】\n" + item["episode_script"])
+        sections.append(f"<ep id={item['ep']}>\n" + "\n\n".join(block) + "\n</ep>")
+
     return "\n\n".join(sections)
 
 
@@ -273,6 +356,13 @@ _PROHIBITION_LIST = """\
 - 禁止寒暄废话/重复信息
 - 禁止使用非标准转场标记"""
 
+# system prompt 中与 constraints 无关的固定首尾段落（模块加载时拼接一次）
+_SYSTEM_HEAD = "\n\n".join([
+    "你是资深短剧编剧与改编策划，擅长把小说改写成1-2分钟/集的红果风格短剧剧本。",
+    "输出必须信息密度高、冲突强、节奏快、结尾有钩子；不要写散文化小说。",
+])
+_SYSTEM_TAIL = "\n\n".join([_RHYTHM_RULES, _PROHIBITION_LIST, redfruit_safety_notes()])
+
 # ---------- Schema 常量 ----------
 
 _BIBLE_SCHEMA = """\
@@ -385,6 +475,13 @@ _REWRITE_PRINCIPLES = """\
 - 如果修改涉及删减行数，确保总行数仍在合理范围内
 - 如果修改涉及新增台词/动作，确保不破坏节奏密度"""
 
+# 单集返修 prompt 的固定前缀（与集内容无关，import 时拼好）
+_REWRITE_HEAD = "\n\n".join([
+    '【任务】按"修改清单"对剧本做最小改动返修：只改列出的问题，不要重写整集。',
+    "【输出】只输出返修后的完整剧本纯文本（同原格式）。",
+    "【返修原则】\n" + _REWRITE_PRINCIPLES,
+])
+
 
 # ---------- 辅助函数 ----------
 
@@ -472,8 +569,19 @@ def _build_genre_section(genre_data: Optional[Dict]) -> str:
     return "\n".join(lines)
 
 
+# EpisodeSpec（frozen，可哈希）-> 硬约束文本；plan / write 各集共用同一 spec 时只拼一次
+_HARD_CONSTRAINTS_MEMO: Dict[EpisodeSpec, str] = {}
+
+
 def _build_hard_constraints(spec: EpisodeSpec) -> str:
-    """从 EpisodeSpec 构建硬约束文本块。"""
+    """从 EpisodeSpec 构建硬约束文本块（按 spec 缓存）。"""
+    text = _HARD_CONSTRAINTS_MEMO.get(spec)
+    if text is None:
+        text = _HARD_CONSTRAINTS_MEMO[spec] = _format_hard_constraints(spec)
+    return text
+
+
+def _format_hard_constraints(spec: EpisodeSpec) -> str:
     return "\n".join([
         "【硬约束】",
         f"- 单集时长：{spec.seconds_min}-{spec.seconds_max}秒",
@@ -6,16 +6,19 @@
 
 from __future__ import annotations
 
-import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
+from . import jsonio
 from .config import AppConfig, maybe_load_config
+from .episodes import index_plan, scan_episode_files
 from .judge import judge_episode, DEFAULT_PASS_THRESHOLD
+from .llm_clients import ClaudeClient
 from .rewriter import rewrite_episode
 from .rules import AdaptRules
-from .validator import ValidationResult, validate_episode, load_target
+from .validator import IssueLevel, ValidationIssue, ValidationResult, validate_episode, load_target
 
 logger = logging.getLogger(__name__)
 
@@ -23,76 +26,78 @@ logger = logging.getLogger(__name__)
 DEFAULT_MAX_ROUNDS = 3
 
 
+def _load_round_log(reviews_dir: Path, ep_num: int) -> List[Dict]:
+    """读取 {reviews_dir}/ep{N}_log.json 中已有的日志（不存在则为空列表）。"""
+    log_path = reviews_dir / f"ep{ep_num}_log.json"
+    if log_path.exists():
+        return jsonio.loads(log_path.read_bytes())
+    return []
+
+
 def _save_round_log(
-    log_entry: Dict,
-    output_dir: str | Path,
+    logs: List[Dict],
+    reviews_dir: Path,
     ep_num: int,
 ) -> Path:
-    """追加一条日志到 {output_dir}/reviews/ep{N}_log.json。"""
-    d = Path(output_dir) / "reviews"
-    d.mkdir(parents=True, exist_ok=True)
-    log_path = d / f"ep{ep_num}_log.json"
-
-    # 读取已有日志或初始化
-    if log_path.exists():
-        logs = json.loads(log_path.read_text(encoding="utf-8"))
-    else:
-        logs = []
+    """把完整日志列表写到 {reviews_dir}/ep{N}_log.json。
 
-    logs.append(log_entry)
-    log_path.write_text(
-        json.dumps(logs, ensure_ascii=False, indent=2), encoding="utf-8"
-    )
+    调用方在内存中累积日志，每轮只写不读，避免逐轮重新解析越来越长的日志文件。
+    """
+    log_path = reviews_dir / f"ep{ep_num}_log.json"
+    jsonio.write_json(log_path, logs)
     return log_path
 
 
 def _save_round_script(
     script: str,
-    output_dir: str | Path,
+    reviews_dir: Path,
     ep_num: int,
     round_num: int,
 ) -> Path:
-    """保存某轮的剧本到 {output_dir}/reviews/ep{N}_round{M}.txt。"""
-    d = Path(output_dir) / "reviews"
-    d.mkdir(parents=True, exist_ok=True)
-    p = d / f"ep{ep_num}_round{round_num}.txt"
+    """保存某轮的剧本到 {reviews_dir}/ep{N}_round{M}.txt。"""
+    p = reviews_dir / f"ep{ep_num}_round{round_num}.txt"
     p.write_text(script, encoding="utf-8")
     return p
 
 
 def _save_round_review(
     review: Dict,
-    output_dir: str | Path,
+    reviews_dir: Path,
     ep_num: int,
     round_num: int,
 ) -> Path:
-    """保存某轮的评分到 {output_dir}/reviews/ep{N}_round{M}_review.json。"""
-    d = Path(output_dir) / "reviews"
-    d.mkdir(parents=True, exist_ok=True)
-    p = d / f"ep{ep_num}_round{round_num}_review.json"
-    p.write_text(
-        json.dumps(review, ensure_ascii=False, indent=2), encoding="utf-8"
-    )
+    """保存某轮的评分到 {reviews_dir}/ep{N}_round{M}_review.json。"""
+    p = reviews_dir / f"ep{ep_num}_round{round_num}_review.json"
+    jsonio.write_json(p, review)
     return p
 
 
+def _partition_issues(
+    validation: ValidationResult,
+) -> Tuple[List[ValidationIssue], List[ValidationIssue]]:
+    """把校验问题按级别拆成 (errors, warnings)，一次遍历。"""
+    errors: List[ValidationIssue] = []
+    warnings: List[ValidationIssue] = []
+    for iss in validation.issues:
+        (errors if iss.level is IssueLevel.ERROR else warnings).append(iss)
+    return errors, warnings
+
+
 def _build_log_entry(
     round_num: int,
     validation: ValidationResult,
     review: Optional[Dict],
     action: str,
+    partition: Optional[Tuple[List[ValidationIssue], List[ValidationIssue]]] = None,
 ) -> Dict:
-    """构建单轮日志条目。"""
+    """构建单轮日志条目（partition 为已拆好的 (errors, warnings)，缺省时现拆）。"""
+    errors, warnings = partition or _partition_issues(validation)
     entry: Dict = {
         "round": round_num,
         "validation": {
             "passed": validation.passed,
-            "error_count": sum(
-                1 for iss in validation.issues if iss.level.value == "error"
-            ),
-            "warning_count": sum(
-                1 for iss in validation.issues if iss.level.value == "warning"
-            ),
+            "error_count": len(errors),
+            "warning_count": len(warnings),
             "stats": {
                 "scene_count": validation.stats.scene_count,
                 "total_lines": validation.stats.total_lines,
@@ -125,6 +130,8 @@ def review_episode(
     max_rounds: int = DEFAULT_MAX_ROUNDS,
     episode_plan: Optional[Dict] = None,
     style_target: Optional[Dict] = None,
+    client: Optional[ClaudeClient] = None,
+    skip_judge_on_format_error: bool = True,
 ) -> tuple[str, Dict, int]:
     """对单集剧本执行完整审稿循环。
 
@@ -147,6 +154,10 @@ def review_episode(
     max_rounds : 最大返修轮数
     episode_plan : 节拍表中该集规划（可选）
     style_target : 风格目标区间（可选，为 None 时从 style_profile.json 加载）
+    client : 复用的 Claude 客户端，为 None 时新建（各轮审稿与返修共用）
+    skip_judge_on_format_error : 为 True（默认）时，格式校验有 error 的轮次（最后一轮除外）
+        不调用 judge，直接按校验问题返修——这类轮次无论 judge 打多少分都不会通过；
+        False 时每轮都评分
 
     Returns
     -------
@@ -154,35 +165,51 @@ def review_episode(
     """
     cfg = config or maybe_load_config()
     target = style_target or load_target()
+    client = client or ClaudeClient(
+        max_attempts=cfg.retry.max_attempts,
+        base_delay=cfg.retry.base_delay,
+    )
 
     current_script = episode_script
     best_script = episode_script
     best_review: Dict = {}
     best_score: float = 0.0
+    # 各轮中间结果目录只创建一次，下面的 _save_round_* 直接写入
+    reviews_dir = Path(output_dir) / "reviews"
+    reviews_dir.mkdir(parents=True, exist_ok=True)
+    # 已有日志只读一次，之后逐轮在内存中追加
+    logs = _load_round_log(reviews_dir, ep_num)
 
     for round_num in range(max_rounds + 1):
         is_initial = round_num == 0
 
         # ── 步骤 1：validator 格式校验 ──
         validation = validate_episode(current_script, target)
+        errors, warnings = _partition_issues(validation)
         logger.info(
             "第 %d 集第 %d 轮校验：%s（error=%d, warning=%d）",
             ep_num,
             round_num,
             "PASS" if validation.passed else "FAIL",
-            sum(1 for iss in validation.issues if iss.level.value == "error"),
-            sum(1 for iss in validation.issues if iss.level.value == "warning"),
+            len(errors),
+            len(warnings),
         )
 
         # ── 步骤 2：judge LLM 审稿 ──
-        review = judge_episode(
-            episode_script=current_script,
-            episode_plan=episode_plan,
-            rules=rules,
-            config=cfg,
-            constraints_path=constraints_path,
-            pass_threshold=pass_threshold,
-        )
+        if skip_judge_on_format_error and errors and round_num < max_rounds:
+            # 校验未过必然返修，省掉本轮 judge 调用；最后一轮仍评分以保留真实分数
+            logger.info("第 %d 集第 %d 轮格式校验未通过，跳过 judge 直接返修", ep_num, round_num)
+            review = {"scores": {}, "pass": False, "judge_skipped": True}
+        else:
+            review = judge_episode(
+                episode_script=current_script,
+                episode_plan=episode_plan,
+                rules=rules,
+                config=cfg,
+                constraints_path=constraints_path,
+                pass_threshold=pass_threshold,
+                client=client,
+            )
         review["episode"] = ep_num
 
         overall = review.get("scores", {}).get("overall", 0)
@@ -195,8 +222,8 @@ def review_episode(
         )
 
         # 保存本轮结果
-        _save_round_script(current_script, output_dir, ep_num, round_num)
-        _save_round_review(review, output_dir, ep_num, round_num)
+        _save_round_script(current_script, reviews_dir, ep_num, round_num)
+        _save_round_review(review, reviews_dir, ep_num, round_num)
 
         # 更新最佳版本
         if overall > best_score:
@@ -215,8 +242,8 @@ def review_episode(
             action = "触发返修"
 
         # 记录日志
-        log_entry = _build_log_entry(round_num, validation, review, action)
-        _save_round_log(log_entry, output_dir, ep_num)
+        logs.append(_build_log_entry(round_num, validation, review, action, (errors, warnings)))
+        _save_round_log(logs, reviews_dir, ep_num)
 
         if both_passed:
             logger.info(
@@ -230,7 +257,7 @@ def review_episode(
 
         # ── 步骤 4：返修 ──
         # 将 validator 的问题注入到 review 的 fix_list 中
-        review_with_validation = _inject_validation_issues(review, validation)
+        review_with_validation = _inject_validation_issues(review, validation, errors)
 
         logger.info(
             "第 %d 集第 %d 轮返修开始（校验 %s，审稿 %s）",
@@ -244,6 +271,7 @@ def review_episode(
             review=review_with_validation,
             config=cfg,
             constraints_path=constraints_path,
+            client=client,
         )
 
     # 达到最大轮数仍未通过
@@ -254,29 +282,48 @@ def review_episode(
     return best_script, best_review, max_rounds
 
 
-def _inject_validation_issues(review: Dict, validation: ValidationResult) -> Dict:
+def _inject_validation_issues(
+    review: Dict,
+    validation: ValidationResult,
+    errors: Optional[List[ValidationIssue]] = None,
+) -> Dict:
     """将 validator 发现的格式问题注入到 review 的 fix_list 和 fatal_issues 中。
 
-    这样 rewriter 能同时修复格式问题和内容问题。
+    这样 rewriter 能同时修复格式问题和内容问题。errors 为调用方已拆出的 error 级问题，
+    缺省时从 validation 现拆。
     """
     if validation.passed:
         return review
 
+    if errors is None:
+        errors = _partition_issues(validation)[0]
+    if not errors:
+        # 只有 warning 时无需注入，直接返回原 review（不复制）
+        return review
+
     review = {**review}  # 浅拷贝
 
-    # 注入到 fatal_issues
+    # 注入到 fatal_issues / fix_list；已有的同一条问题不重复注入（避免返修 prompt 重复指令）
     fatal_issues = list(review.get("fatal_issues", []))
     fix_list = list(review.get("fix_list", []))
-
-    for iss in validation.issues:
-        if iss.level.value == "error":
-            fatal_issues.append(f"[格式校验] {iss.description}")
-            fix_list.append({
-                "scene": f"L{iss.line_num}" if iss.line_num else "整集",
-                "line_hint": "",
-                "problem": f"[格式校验] {iss.description}",
-                "fix": f"请修复：{iss.description}",
-            })
+    seen_fatal = {x for x in fatal_issues if isinstance(x, str)}
+    seen_fix = {(it.get("scene", ""), it.get("problem", "")) for it in fix_list if isinstance(it, dict)}
+
+    for iss in errors:
+        problem = f"[格式校验] {iss.description}"
+        if problem not in seen_fatal:
+            seen_fatal.add(problem)
+            fatal_issues.append(problem)
+        scene = f"L{iss.line_num}" if iss.line_num else "整集"
+        if (scene, problem) in seen_fix:
+            continue
+        seen_fix.add((scene, problem))
+        fix_list.append({
+            "scene": scene,
+            "line_hint": "",
+            "problem": problem,
+            "fix": f"请修复：{iss.description}",
+        })
 
     review["fatal_issues"] = fatal_issues
     review["fix_list"] = fix_list
@@ -293,6 +340,8 @@ def review_all_episodes(
     output_dir: str | Path,
     pass_threshold: float = DEFAULT_PASS_THRESHOLD,
     max_rounds: int = DEFAULT_MAX_ROUNDS,
+    max_workers: Optional[int] = None,
+    skip_judge_on_format_error: bool = True,
 ) -> List[Dict]:
     """对目录中所有剧本执行审稿循环。
 
@@ -306,28 +355,28 @@ def review_all_episodes(
     output_dir : 输出目录
     pass_threshold : 通过阈值
     max_rounds : 最大返修轮数
+    max_workers : 同时审稿的集数，为 None 时取 config.concurrency.max_workers
+        （各集审稿互不依赖，结果顺序与剧本顺序一致）
+    skip_judge_on_format_error : 格式校验未通过的轮次跳过 judge 直接返修（见 review_episode）
 
     Returns
     -------
     所有集的最终评分结果列表。
     """
-    import re
-
     ep_dir = Path(episodes_dir)
     if not ep_dir.exists():
         raise FileNotFoundError(f"剧本目录不存在：{ep_dir}")
 
-    ep_files = sorted(
-        ep_dir.glob("ep*.txt"),
-        key=lambda f: int(re.search(r"ep(\d+)", f.name).group(1)),
-    )
+    # 按集号排序的 (集号, 路径)，集号每个文件只解析一次
+    ep_files = scan_episode_files(ep_dir)
     if not ep_files:
         raise FileNotFoundError(f"剧本目录中未找到 ep*.txt 文件：{ep_dir}")
 
     # 可选加载节拍表
     plan: List[Dict] = []
     if plan_path and Path(plan_path).exists():
-        plan = json.loads(Path(plan_path).read_text(encoding="utf-8"))
+        plan = jsonio.load_json_cached(plan_path)
+    plan_by_ep = index_plan(plan)
 
     # 加载风格目标
     from .prompts import load_fused_constraints
@@ -335,19 +384,15 @@ def review_all_episodes(
     if Path(constraints_path).exists():
         constraints = load_fused_constraints(constraints_path)
         style_target = constraints.get("style_target", {})
+    # 融合约束中没有风格目标时回退到 style_profile.json，全部集共用一份
+    style_target = style_target or load_target()
 
-    results: List[Dict] = []
-
-    for ep_file in ep_files:
-        ep_num = int(re.search(r"ep(\d+)", ep_file.name).group(1))
+    def _review_one(ep: Tuple[int, Path]) -> Dict:
+        ep_num, ep_file = ep
         script = ep_file.read_text(encoding="utf-8")
 
         # 匹配节拍表中对应集
-        episode_plan = None
-        for item in plan:
-            if item.get("ep") == ep_num:
-                episode_plan = item
-                break
+        episode_plan = plan_by_ep.get(ep_num)
 
         best_script, best_review, rounds = review_episode(
             episode_script=script,
@@ -359,19 +404,36 @@ def review_all_episodes(
             pass_threshold=pass_threshold,
             max_rounds=max_rounds,
             episode_plan=episode_plan,
-            style_target=style_target or None,
+            style_target=style_target,
+            client=client,
+            skip_judge_on_format_error=skip_judge_on_format_error,
         )
 
-        # 覆盖原剧本为最佳版本
-        ep_file.write_text(best_script, encoding="utf-8")
+        # 覆盖原剧本为最佳版本（最佳版本就是原稿时不重写，保留文件修改时间）
+        if best_script != script:
+            ep_file.write_text(best_script, encoding="utf-8")
 
-        results.append(best_review)
         logger.info(
             "第 %d 集审稿完成：%d 轮，最终 overall=%.1f（%s）",
             ep_num, rounds,
             best_review.get("scores", {}).get("overall", 0),
             "通过" if best_review.get("pass", False) else "未通过",
         )
+        return best_review
+
+    cfg = config or maybe_load_config()
+    workers = max_workers or cfg.concurrency.max_workers
+    # 所有集、所有轮共用一个客户端（底层 httpx 连接池线程安全）
+    client = ClaudeClient(
+        max_attempts=cfg.retry.max_attempts,
+        base_delay=cfg.retry.base_delay,
+    )
+    if workers <= 1:
+        results = [_review_one(f) for f in ep_files]
+    else:
+        logger.info("并发审稿（max_workers=%d）", workers)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_review_one, ep_files))
 
     # 汇总
     passed = sum(1 for r in results if r.get("pass", False))
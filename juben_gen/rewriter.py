@@ -9,21 +9,59 @@
 
 from __future__ import annotations
 
-import json
 import logging
+import os
+import re
+from concurrent.futures import Future, ThreadPoolExecutor
+from operator import itemgetter
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Sequence, Tuple
 
+from . import jsonio
 from .config import AppConfig, RoleConfig, maybe_load_config
+from .episodes import index_plan
 from .judge import judge_episode, save_review, DEFAULT_PASS_THRESHOLD
-from .llm_clients import ClaudeClient, LLMResponse
-from .prompts import build_system_prompt, load_fused_constraints, prompt_rewrite_episode
+from .llm_clients import ClaudeClient, LLMResponse, cached_text_block
+from .prompts import (
+    build_system_prompt,
+    load_fused_constraints,
+    prompt_rewrite_episode_parts,
+    prompt_rewrite_episodes_batch,
+)
 from .rules import AdaptRules
 
 logger = logging.getLogger(__name__)
 
 # 默认最大返修轮数
 DEFAULT_MAX_ROUNDS = 3
+# 连续多少轮提分不足 MIN_IMPROVEMENT 即提前停止返修（0 = 不提前停止）
+DEFAULT_PATIENCE = 2
+# 视为“有进步”的最小 overall 提升
+MIN_IMPROVEMENT = 0.5
+
+# 单集返修的输出 token 预留；合并返修按集数累加，但不超过 _BATCH_MAX_TOKENS
+# （Claude 4 系列模型的最小输出上限，超出时 API 直接返回不可重试的 400）
+_EPISODE_MAX_TOKENS = 8192
+_BATCH_MAX_TOKENS = 32000
+
+# 合并返修输出中的单集块：<ep id=N>...</ep>
+_BATCH_EP_RE = re.compile(r"<ep id=(\d+)>(.*?)</ep>", re.S)
+
+# 单集评分文件名：epN_review.json（不匹配 epN_roundM_review.json 等各轮中间结果）
+_REVIEW_FILE_RE = re.compile(r"^ep(\d+)_review\.json$")
+
+
+def _rewrite_system_prompt(constraints_path: str) -> str:
+    """加载融合约束（文件存在时）并组装返修用 system prompt。
+
+    约束与 system prompt 均为进程内缓存的结果（按 mtime 失效），每轮返修只 stat 一次；
+    文件缺失时按无约束处理。
+    """
+    try:
+        constraints = load_fused_constraints(constraints_path)
+    except FileNotFoundError:
+        constraints = None
+    return build_system_prompt(constraints=constraints)
 
 
 def rewrite_episode(
@@ -32,6 +70,7 @@ def rewrite_episode(
     review: Dict,
     config: Optional[AppConfig] = None,
     constraints_path: str = "juben_gen/constraints.fused.json",
+    client: Optional[ClaudeClient] = None,
 ) -> str:
     """对单集剧本做一次返修。
 
@@ -41,6 +80,7 @@ def rewrite_episode(
     review : 评分 JSON（含 fix_list、scores 等）
     config : 应用配置，为 None 时使用默认配置
     constraints_path : 融合约束 JSON 路径
+    client : 复用的 Claude 客户端（多轮/多集循环中共享连接池），为 None 时新建
 
     Returns
     -------
@@ -49,25 +89,22 @@ def rewrite_episode(
     cfg = config or maybe_load_config()
     role_cfg: RoleConfig = cfg.roles["rewrite"]
 
-    # 加载融合约束
-    constraints = None
-    if Path(constraints_path).exists():
-        constraints = load_fused_constraints(constraints_path)
-
     # 组装 prompt
-    system = build_system_prompt(constraints=constraints)
+    system = _rewrite_system_prompt(constraints_path)
 
     fix_list = review.get("fix_list", [])
     scores = review.get("scores", {})
 
-    user_msg = prompt_rewrite_episode(
-        fix_list_json=json.dumps(fix_list, ensure_ascii=False, indent=2),
+    head, body = prompt_rewrite_episode_parts(
+        fix_list_json=jsonio.dumps_prompt(fix_list),
         episode_script=episode_script,
-        scores_json=json.dumps(scores, ensure_ascii=False, indent=2),
+        scores_json=jsonio.dumps_prompt(scores),
     )
+    # system 与 user 固定前缀在整次运行中不变，标记 prompt 缓存，后续轮次/集只计增量部分
+    user_content = [cached_text_block(head + "\n\n"), {"type": "text", "text": body}]
 
     # 调用 Claude API
-    client = ClaudeClient(
+    client = client or ClaudeClient(
         max_attempts=cfg.retry.max_attempts,
         base_delay=cfg.retry.base_delay,
     )
@@ -78,10 +115,12 @@ def rewrite_episode(
     response: LLMResponse = client.chat(
         model=role_cfg.model,
         system=system,
-        messages=[{"role": "user", "content": user_msg}],
+        messages=[{"role": "user", "content": user_content}],
         thinking=role_cfg.thinking,
         budget_tokens=role_cfg.budget_tokens,
-        max_tokens=8192,
+        service_tier=role_cfg.service_tier,
+        cache_system=True,
+        max_tokens=_EPISODE_MAX_TOKENS,
     )
 
     script = response.text.strip()
@@ -89,6 +128,86 @@ def rewrite_episode(
     return script
 
 
+def rewrite_episodes_batch(
+    *,
+    items: Sequence[Tuple[int, str, Dict]],
+    config: Optional[AppConfig] = None,
+    constraints_path: str = "juben_gen/constraints.fused.json",
+    client: Optional[ClaudeClient] = None,
+) -> Dict[int, str]:
+    """把多集的一次返修合并成一次 Claude 调用。
+
+    system prompt 与返修原则只发送一次，由同一批的各集分摊。
+
+    Parameters
+    ----------
+    items : (集号, 原剧本纯文本, 评分 JSON) 列表
+    config : 应用配置，为 None 时使用默认配置
+    constraints_path : 融合约束 JSON 路径
+    client : 复用的 Claude 客户端，为 None 时新建
+
+    Returns
+    -------
+    {集号: 返修后的剧本纯文本}。输出中缺失或为空的集不在结果内，由调用方逐集返修兜底；
+    合并请求本身失败（重试耗尽、参数错误等）时返回空 dict，整批改为逐集返修。
+
+    合并输出较长，走流式请求，避免非流式调用等待整段输出时超时。
+    """
+    cfg = config or maybe_load_config()
+    role_cfg: RoleConfig = cfg.roles["rewrite"]
+
+    system = _rewrite_system_prompt(constraints_path)
+    user_msg = prompt_rewrite_episodes_batch([
+        {
+            "ep": ep_num,
+            "fix_list_json": jsonio.dumps_prompt(review.get("fix_list", [])),
+            "scores_json": jsonio.dumps_prompt(review.get("scores", {})),
+            "episode_script": script,
+        }
+        for ep_num, script, review in items
+    ])
+
+    client = client or ClaudeClient(
+        max_attempts=cfg.retry.max_attempts,
+        base_delay=cfg.retry.base_delay,
+    )
+    logger.info(
+        "调用 Claude API（rewrite 角色，模型=%s，合并返修 %d 集）",
+        role_cfg.model, len(items),
+    )
+    try:
+        text = "".join(client.chat_stream(
+            model=role_cfg.model,
+            system=system,
+            messages=[{"role": "user", "content": user_msg}],
+            thinking=role_cfg.thinking,
+            budget_tokens=role_cfg.budget_tokens,
+            service_tier=role_cfg.service_tier,
+            cache_system=True,
+            max_tokens=min(_EPISODE_MAX_TOKENS * len(items), _BATCH_MAX_TOKENS),
+        ))
+    except Exception as e:  # 合并只是优化：任何失败都整批退回逐集返修，不中断其他集
+        logger.warning(
+            "合并返修第 %s 集失败，改为逐集返修：%s",
+            "、".join(str(ep_num) for ep_num, _, _ in items), e,
+        )
+        return {}
+
+    wanted = {ep_num for ep_num, _, _ in items}
+    scripts: Dict[int, str] = {}
+    for m in _BATCH_EP_RE.finditer(text):
+        ep_num = int(m.group(1))
+        script = m.group(2).strip()
+        if ep_num in wanted and script:
+            scripts.setdefault(ep_num, script)
+
+    missing = sorted(wanted - scripts.keys())
+    if missing:
+        logger.warning("合并返修输出缺少第 %s 集，改为逐集返修", "、".join(map(str, missing)))
+    logger.info("合并返修完成（%d/%d 集）", len(scripts), len(items))
+    return scripts
+
+
 def _save_round_result(
     script: str,
     review: Dict,
@@ -108,10 +227,7 @@ def _save_round_result(
     script_path = d / f"ep{ep_num}_round{round_num}.txt"
     script_path.write_text(script, encoding="utf-8")
 
-    review_path = d / f"ep{ep_num}_round{round_num}_review.json"
-    review_path.write_text(
-        json.dumps(review, ensure_ascii=False, indent=2), encoding="utf-8"
-    )
+    review_path = jsonio.write_json(d / f"ep{ep_num}_round{round_num}_review.json", review)
 
     logger.info("第 %d 集第 %d 轮结果已保存：%s, %s", ep_num, round_num, script_path, review_path)
     return script_path, review_path
@@ -129,6 +245,9 @@ def rewrite_loop(
     pass_threshold: float = DEFAULT_PASS_THRESHOLD,
     max_rounds: int = DEFAULT_MAX_ROUNDS,
     episode_plan: Optional[Dict] = None,
+    client: Optional[ClaudeClient] = None,
+    first_rewrite: Optional[str] = None,
+    patience: int = DEFAULT_PATIENCE,
 ) -> tuple[str, Dict, int]:
     """返修循环：重写 → 评分 → 判断，最多 max_rounds 轮。
 
@@ -144,6 +263,9 @@ def rewrite_loop(
     pass_threshold : 通过阈值
     max_rounds : 最大返修轮数
     episode_plan : 节拍表中该集规划（可选，传给 judge）
+    client : 复用的 Claude 客户端，为 None 时新建（各轮返修与评分共用）
+    first_rewrite : 已由合并返修得到的第 1 轮返修稿，给出时第 1 轮不再调用 rewrite
+    patience : 连续 patience 轮 overall 比最高分提升不足 MIN_IMPROVEMENT 时提前停止（0 = 不提前停止）
 
     Returns
     -------
@@ -153,72 +275,105 @@ def rewrite_loop(
     - total_rounds: 实际执行的返修轮数
     """
     cfg = config or maybe_load_config()
+    client = client or ClaudeClient(
+        max_attempts=cfg.retry.max_attempts,
+        base_delay=cfg.retry.base_delay,
+    )
 
     current_script = episode_script
     current_review = review
     best_script = episode_script
     best_review = review
     best_score = current_review.get("scores", {}).get("overall", 0)
-
-    # 保存初始版本（round 0）
-    _save_round_result(current_script, current_review, output_dir, ep_num, 0)
-
-    for round_num in range(1, max_rounds + 1):
-        logger.info(
-            "第 %d 集：开始第 %d/%d 轮返修（当前 overall=%.1f，阈值=%.1f）",
-            ep_num, round_num, max_rounds, best_score, pass_threshold,
+    stale = 0  # 连续未明显提分的轮数
+
+    # 各轮结果交给后台线程落盘，与下一轮 API 调用重叠；单线程保证写入顺序，
+    # 返回前等待全部写完，写入出错时照常抛出
+    io_pool = ThreadPoolExecutor(max_workers=1)
+    saves: List[Future] = []
+    try:
+        # 保存初始版本（round 0）
+        saves.append(io_pool.submit(_save_round_result, current_script, current_review, output_dir, ep_num, 0))
+
+        for round_num in range(1, max_rounds + 1):
+            logger.info(
+                "第 %d 集：开始第 %d/%d 轮返修（当前 overall=%.1f，阈值=%.1f）",
+                ep_num, round_num, max_rounds, best_score, pass_threshold,
+            )
+
+            # 1. 返修
+            if round_num == 1 and first_rewrite is not None:
+                new_script = first_rewrite
+            else:
+                new_script = rewrite_episode(
+                    episode_script=current_script,
+                    review=current_review,
+                    config=cfg,
+                    constraints_path=constraints_path,
+                    client=client,
+                )
+
+            # 2. 重新评分（返修稿与上一版逐字相同时评分必然不变，沿用上一轮评分，省一次 judge 调用）
+            if new_script == current_script:
+                logger.info("第 %d 集第 %d 轮返修未改动剧本，沿用上一轮评分", ep_num, round_num)
+                new_review = dict(current_review)
+            else:
+                new_review = judge_episode(
+                    episode_script=new_script,
+                    episode_plan=episode_plan,
+                    rules=rules,
+                    config=cfg,
+                    constraints_path=constraints_path,
+                    pass_threshold=pass_threshold,
+                    client=client,
+                )
+            new_review["episode"] = ep_num
+
+            # 3. 保存本轮结果
+            saves.append(io_pool.submit(_save_round_result, new_script, new_review, output_dir, ep_num, round_num))
+
+            new_score = new_review.get("scores", {}).get("overall", 0)
+            logger.info(
+                "第 %d 集第 %d 轮返修结果：overall=%.1f（%s）",
+                ep_num, round_num, new_score,
+                "通过" if new_review.get("pass", False) else "未通过",
+            )
+
+            stale = stale + 1 if new_score - best_score < MIN_IMPROVEMENT else 0
+
+            # 更新最高分版本
+            if new_score > best_score:
+                best_script = new_script
+                best_review = new_review
+                best_score = new_score
+
+            # 4. 达标则停止
+            if new_review.get("pass", False):
+                logger.info("第 %d 集在第 %d 轮达标（overall=%.1f）", ep_num, round_num, new_score)
+                return best_script, best_review, round_num
+
+            # 连续多轮没有明显进步，再改大概率也是白费一次调用
+            if patience and stale >= patience and round_num < max_rounds:
+                logger.warning(
+                    "第 %d 集连续 %d 轮提分不足 %.1f，提前停止返修（最高分=%.1f）",
+                    ep_num, stale, MIN_IMPROVEMENT, best_score,
+                )
+                return best_script, best_review, round_num
+
+            # 未达标，用新版本继续下一轮
+            current_script = new_script
+            current_review = new_review
+
+        # 达到最大轮数仍未通过
+        logger.warning(
+            "第 %d 集经过 %d 轮返修仍未达标（最高分=%.1f，阈值=%.1f），保留最高分版本",
+            ep_num, max_rounds, best_score, pass_threshold,
         )
-
-        # 1. 返修
-        new_script = rewrite_episode(
-            episode_script=current_script,
-            review=current_review,
-            config=cfg,
-            constraints_path=constraints_path,
-        )
-
-        # 2. 重新评分
-        new_review = judge_episode(
-            episode_script=new_script,
-            episode_plan=episode_plan,
-            rules=rules,
-            config=cfg,
-            constraints_path=constraints_path,
-            pass_threshold=pass_threshold,
-        )
-        new_review["episode"] = ep_num
-
-        # 3. 保存本轮结果
-        _save_round_result(new_script, new_review, output_dir, ep_num, round_num)
-
-        new_score = new_review.get("scores", {}).get("overall", 0)
-        logger.info(
-            "第 %d 集第 %d 轮返修结果：overall=%.1f（%s）",
-            ep_num, round_num, new_score,
-            "通过" if new_review.get("pass", False) else "未通过",
-        )
-
-        # 更新最高分版本
-        if new_score > best_score:
-            best_script = new_script
-            best_review = new_review
-            best_score = new_score
-
-        # 4. 达标则停止
-        if new_review.get("pass", False):
-            logger.info("第 %d 集在第 %d 轮达标（overall=%.1f）", ep_num, round_num, new_score)
-            return best_script, best_review, round_num
-
-        # 未达标，用新版本继续下一轮
-        current_script = new_script
-        current_review = new_review
-
-    # 达到最大轮数仍未通过
-    logger.warning(
-        "第 %d 集经过 %d 轮返修仍未达标（最高分=%.1f，阈值=%.1f），保留最高分版本",
-        ep_num, max_rounds, best_score, pass_threshold,
-    )
-    return best_script, best_review, max_rounds
+        return best_script, best_review, max_rounds
+    finally:
+        io_pool.shutdown(wait=True)
+        for f in saves:
+            f.result()
 
 
 def rewrite_all_episodes(
@@ -232,6 +387,8 @@ def rewrite_all_episodes(
     output_dir: str | Path,
     pass_threshold: float = DEFAULT_PASS_THRESHOLD,
     max_rounds: int = DEFAULT_MAX_ROUNDS,
+    max_workers: Optional[int] = None,
+    patience: int = DEFAULT_PATIENCE,
 ) -> List[Dict]:
     """对所有未通过的剧本执行返修循环。
 
@@ -246,13 +403,17 @@ def rewrite_all_episodes(
     output_dir : 输出目录
     pass_threshold : 通过阈值
     max_rounds : 最大返修轮数
+    max_workers : 同时返修的集数，为 None 时取 config.concurrency.max_workers
+        （各集返修互不依赖，结果顺序与评分文件顺序一致）
+    patience : 单集连续未明显提分的轮数上限，见 rewrite_loop
 
     Returns
     -------
     所有集的最终评分结果列表。
-    """
-    import re
 
+    config.concurrency.rewrite_batch > 1 时，待返修的集每 rewrite_batch 集合并为一次请求完成
+    第 1 轮返修（共享 system prompt），后续轮次仍逐集进行。
+    """
     ep_dir = Path(episodes_dir)
     rev_dir = Path(reviews_dir)
 
@@ -262,40 +423,71 @@ def rewrite_all_episodes(
         raise FileNotFoundError(f"评分目录不存在：{rev_dir}")
 
     # 收集所有 epN_review.json
-    review_files = sorted(
-        rev_dir.glob("ep*_review.json"),
-        key=lambda f: int(re.search(r"ep(\d+)", f.name).group(1)),
-    )
+    review_files = _scan_review_files(rev_dir)
     if not review_files:
         raise FileNotFoundError(f"评分目录中未找到 ep*_review.json 文件：{rev_dir}")
 
     # 可选加载节拍表
     plan: List[Dict] = []
     if plan_path and Path(plan_path).exists():
-        plan = json.loads(Path(plan_path).read_text(encoding="utf-8"))
+        plan = jsonio.load_json_cached(plan_path)
+    plan_by_ep = index_plan(plan)
+
+    cfg = config or maybe_load_config()
+    # 所有待返修集共用一个客户端，省去逐集重建连接
+    client = ClaudeClient(
+        max_attempts=cfg.retry.max_attempts,
+        base_delay=cfg.retry.base_delay,
+    )
 
-    results: List[Dict] = []
-    rewritten_count = 0
+    workers = max_workers or cfg.concurrency.max_workers
 
-    for review_file in review_files:
-        ep_num = int(re.search(r"ep(\d+)", review_file.name).group(1))
-        review = json.loads(review_file.read_text(encoding="utf-8"))
+    def _map(fn, items: List) -> List:
+        if workers <= 1 or len(items) <= 1:
+            return [fn(item) for item in items]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(fn, items))
+
+    def _load_one(entry: Tuple[int, Path]) -> Tuple[int, Dict, Optional[str]]:
+        """读取单集评分与剧本，返回 (集号, 评分, 剧本)；无需返修时剧本为 None。"""
+        ep_num, review_file = entry
+        review = jsonio.loads(review_file.read_bytes())
 
         # 已通过的集直接跳过
         if review.get("pass", False):
             logger.info("第 %d 集已通过（overall=%.1f），跳过返修", ep_num, review.get("scores", {}).get("overall", 0))
-            results.append(review)
-            continue
+            return ep_num, review, None
 
         # 读取对应剧本
         script_path = ep_dir / f"ep{ep_num}.txt"
         if not script_path.exists():
             logger.warning("第 %d 集剧本文件不存在：%s，跳过", ep_num, script_path)
-            results.append(review)
-            continue
-
-        script = script_path.read_text(encoding="utf-8")
-        episode_plan = _find_episode_plan(plan, ep_num)
+            return ep_num, review, None
+
+        return ep_num, review, script_path.read_text(encoding="utf-8")
+
+    entries = [_load_one(f) for f in review_files]
+    pending = [(ep_num, script, review) for ep_num, review, script in entries if script is not None]
+
+    # 可选：每 rewrite_batch 集合并一次请求完成第 1 轮返修
+    batch_size = cfg.concurrency.rewrite_batch
+    first_rewrites: Dict[int, str] = {}
+    if batch_size > 1 and len(pending) > 1 and max_rounds >= 1:
+        chunks = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+        logger.info("合并返修：%d 集分 %d 批（rewrite_batch=%d）", len(pending), len(chunks), batch_size)
+        for part in _map(
+            lambda chunk: rewrite_episodes_batch(
+                items=chunk, config=cfg, constraints_path=constraints_path, client=client,
+            ),
+            chunks,
+        ):
+            first_rewrites.update(part)
+
+    def _rewrite_one(entry: Tuple[int, Dict, Optional[str]]) -> Tuple[Dict, bool]:
+        """返修单集，返回 (最终评分, 是否执行了返修)。"""
+        ep_num, review, script = entry
+        if script is None:
+            return review, False
 
         # 执行返修循环
         best_script, best_review, rounds = rewrite_loop(
@@ -308,23 +500,33 @@ def rewrite_all_episodes(
             output_dir=output_dir,
             pass_threshold=pass_threshold,
             max_rounds=max_rounds,
-            episode_plan=episode_plan,
+            episode_plan=plan_by_ep.get(ep_num),
+            client=client,
+            first_rewrite=first_rewrites.get(ep_num),
+            patience=patience,
         )
 
-        # 覆盖原剧本为最佳版本
-        script_path.write_text(best_script, encoding="utf-8")
+        # 覆盖原剧本为最佳版本（最佳版本就是原稿时不重写，保留文件修改时间）
+        if best_script != script:
+            (ep_dir / f"ep{ep_num}.txt").write_text(best_script, encoding="utf-8")
 
         # 更新评分文件
         save_review(best_review, output_dir, ep_num)
 
-        results.append(best_review)
-        rewritten_count += 1
         logger.info(
             "第 %d 集返修完成：%d 轮，最终 overall=%.1f（%s）",
             ep_num, rounds,
             best_review.get("scores", {}).get("overall", 0),
             "通过" if best_review.get("pass", False) else "未通过",
         )
+        return best_review, True
+
+    if workers > 1:
+        logger.info("并发返修（max_workers=%d）", workers)
+    outcomes = _map(_rewrite_one, entries)
+
+    results: List[Dict] = [review for review, _ in outcomes]
+    rewritten_count = sum(1 for _, rewritten in outcomes if rewritten)
 
     # 汇总
     passed = sum(1 for r in results if r.get("pass", False))
@@ -335,9 +537,16 @@ def rewrite_all_episodes(
     return results
 
 
-def _find_episode_plan(plan: List[Dict], ep_num: int) -> Optional[Dict]:
-    """在节拍表中查找对应集号的规划。"""
-    for item in plan:
-        if item.get("ep") == ep_num:
-            return item
-    return None
+def _scan_review_files(rev_dir: Path) -> List[Tuple[int, Path]]:
+    """列出目录中的 epN_review.json，返回按集号排序的 (集号, 路径) 列表。
+
+    一次 os.scandir 遍历，文件名用预编译正则整名匹配，集号只解析一次。
+    """
+    entries: List[Tuple[int, Path]] = []
+    with os.scandir(rev_dir) as it:
+        for e in it:
+            m = _REVIEW_FILE_RE.match(e.name)
+            if m and e.is_file():
+                entries.append((int(m.group(1)), Path(e.path)))
+    entries.sort(key=itemgetter(0))
+    return entries
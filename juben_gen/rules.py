@@ -1,10 +1,11 @@
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import List
 
-from .docx_io import read_docx_lines
+from .docx_io import read_docx_text
 
 
 @dataclass(frozen=True)
@@ -20,10 +21,11 @@ def load_rules_from_docx(
     end_hook_docx: str | Path,
     template_docx: str | Path,
 ) -> AdaptRules:
-    # 这些 docx 很短，直接拼成文本即可
-    rhythm = "\n".join(read_docx_lines(rhythm_docx))
-    end_hook = "\n".join(read_docx_lines(end_hook_docx))
-    template = "\n".join(read_docx_lines(template_docx))
+    # 这些 docx 很短，直接拼成文本即可；三份互不依赖，并行读取（解压 + lxml 解析可重叠）
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        rhythm, end_hook, template = pool.map(
+            read_docx_text, (rhythm_docx, end_hook_docx, template_docx)
+        )
 
     return AdaptRules(
         rhythm_notes=rhythm,
@@ -0,0 +1,104 @@
+"""语义缓存 — 小说片段近似重复时复用已生成的 Story Bible。
+
+精确缓存（cache.py）在片段/规则改动一个字时就会失效；这里做第二层兜底：
+对 novel_excerpt 做轻量向量化，与历史片段做余弦相似度比对，
+相似度 >= 阈值（默认 0.97）且模型、适用范围（scope）完全一致时直接复用对应的 Bible。
+
+向量只覆盖片段前 EMBED_CHARS 字，开头相同的不同章节范围（如 1-10 与 1-30 章）相似度为 1.0，
+因此调用方必须通过 scope 限定章节范围、片段长度以及 prompt 其余部分（规则 / 样例 / 生成参数）的哈希。
+
+向量化默认使用「字符二元组哈希」（纯标准库，无需下载模型），
+可通过 embed_fn 注入其他嵌入函数（需返回 L2 归一化的向量）。
+索引为一个小 JSON 文件，每行记录 (vector, key, model, scope)，key 指向 bible 精确缓存中的条目。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .fileio import write_bytes_atomic
+
+logger = logging.getLogger(__name__)
+
+EmbedFn = Callable[[str], List[float]]
+
+# 片段只取前 4096 字做向量化：足以区分不同章节，且开销可控
+EMBED_CHARS = 4096
+_DIM = 1024
+
+
+def hashed_bigram_embedding(text: str) -> List[float]:
+    """字符二元组哈希向量（L2 归一化）。"""
+    vec = [0.0] * _DIM
+    s = text[:EMBED_CHARS]
+    for i in range(len(s) - 1):
+        vec[zlib.crc32(s[i:i + 2].encode("utf-8")) % _DIM] += 1.0
+    norm = math.sqrt(sum(v * v for v in vec))
+    if norm:
+        vec = [v / norm for v in vec]
+    return vec
+
+
+class SemanticCache:
+    """近似重复检索索引（线性扫描，条目数通常只有几十条）。"""
+
+    def __init__(self, index_path: str | Path, embed_fn: Optional[EmbedFn] = None) -> None:
+        self._path = Path(index_path)
+        self._embed = embed_fn or hashed_bigram_embedding
+        self._lock = threading.Lock()
+
+    def embed(self, text: str) -> List[float]:
+        return self._embed(text)
+
+    def _load_rows(self) -> List[dict]:
+        try:
+            return json.loads(self._path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError) as e:
+            logger.warning("语义缓存索引读取失败（%s）：%s", self._path, e)
+            return []
+
+    def lookup(
+        self,
+        vector: List[float],
+        *,
+        model: str,
+        threshold: float,
+        scope: Optional[Dict[str, Any]] = None,
+    ) -> Optional[Tuple[str, float]]:
+        """返回 (key, similarity)；无满足阈值的条目时返回 None。
+
+        只比较 model 与 scope 都完全一致的条目（scope 需为可 JSON 往返的 dict，列表不要用 tuple）。
+        """
+        best: Optional[Tuple[str, float]] = None
+        for row in self._load_rows():
+            if row.get("model") != model or row.get("scope") != scope:
+                continue
+            sim = sum(a * b for a, b in zip(vector, row["vector"]))
+            if sim >= threshold and (best is None or sim > best[1]):
+                best = (row["key"], sim)
+        return best
+
+    def add(
+        self,
+        vector: List[float],
+        *,
+        key: str,
+        model: str,
+        scope: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """追加一条索引记录（同 key 覆盖）。"""
+        with self._lock:
+            rows = [r for r in self._load_rows() if r.get("key") != key]
+            rows.append({"key": key, "model": model, "scope": scope, "vector": [round(v, 6) for v in vector]})
+            try:
+                write_bytes_atomic(self._path, json.dumps(rows).encode("utf-8"))
+            except OSError as e:
+                logger.warning("语义缓存索引写入失败（%s）：%s", self._path, e)
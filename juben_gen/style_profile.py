@@ -1,12 +1,17 @@
 from __future__ import annotations
 
-import json
+import logging
 import re
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, asdict
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 
-from .docx_io import read_docx_lines
+from . import jsonio
+from .cache import ResponseCache, cache_key
+from .docx_io import load_docx_lines_shared
+
+logger = logging.getLogger(__name__)
 
 
 FULL_COLON = "\uFF1A"  # ：
@@ -40,8 +45,16 @@ class ScriptStyleProfile:
     per_episode: List[EpisodeStats]
 
 
-def _parse_episodes(lines: List[str]) -> Dict[int, List[str]]:
-    ep_re = re.compile(r"^" + EP_PREFIX + r"(\d+)" + EP_SUFFIX)
+_EP_RE = re.compile(r"^" + EP_PREFIX + r"(\d+)" + EP_SUFFIX)
+# 场次行：1-2 ...
+_SCENE_RE = re.compile(r"^(\d+)-(\d+)")
+# 舞台/镜头提示行前缀（元组交给 str.startswith 一次判断）
+_STAGE_PREFIXES = (TRI, LBR)
+
+
+def _parse_episodes(lines: Iterable[str]) -> Dict[int, List[str]]:
+    """按“第N集”标记把行分组；lines 可以是任意可迭代对象（只遍历一次）。"""
+    ep_re = _EP_RE
     eps: Dict[int, List[str]] = {}
     current: Optional[int] = None
 
@@ -59,70 +72,144 @@ def _parse_episodes(lines: List[str]) -> Dict[int, List[str]]:
 
 
 def _episode_stats(ep: int, ep_lines: List[str]) -> EpisodeStats:
-    scene_re = re.compile(r"^(\d+)-(\d+)")
+    """统计单集指标；ep_lines 为 _parse_episodes 分组后的该集各行（不含集标题）。"""
+    return _to_stats(ep, _tally_episodes(ep_lines, first_ep=ep)[ep])
+
+
+def stream_episode_stats(lines: Iterable[str]) -> List[EpisodeStats]:
+    """单次遍历统计各集指标，返回按集号排序的 EpisodeStats 列表（无“第N集”标记时为空）。
+
+    边读行边计数，不先按集分组出行列表再逐集统计；lines 可以是任意可迭代对象（只遍历一次）。
+    """
+    counts = _tally_episodes(lines)
+    return [_to_stats(ep, counts[ep]) for ep in sorted(counts)]
+
+
+def _to_stats(ep: int, c: List[int]) -> EpisodeStats:
+    scenes, total, dialogue, stage, vo_os = c
+    return EpisodeStats(
+        episode=ep,
+        scenes=scenes,
+        total_lines=total,
+        dialogue_lines=dialogue,
+        stage_lines=stage,
+        vo_os_lines=vo_os,
+    )
+
+
+def _tally_episodes(lines: Iterable[str], first_ep: Optional[int] = None) -> Dict[int, List[int]]:
+    """逐行计数：集号 -> [场数, 非空行数, 台词行, 舞台/镜头提示行, VO/OS 行]。
 
-    scenes = 0
-    dialogue = 0
-    stage = 0
-    vo_os = 0
+    遇到“第N集”标记切换当前集（同一集号重复出现时累加）；首个标记之前的行
+    计入 first_ep，为 None 时忽略。
+    """
+    ep_match = _EP_RE.match
+    scene_match = _SCENE_RE.match
+    counts: Dict[int, List[int]] = {}
+    cur: Optional[List[int]] = None if first_ep is None else counts.setdefault(first_ep, [0, 0, 0, 0, 0])
 
-    for line in ep_lines:
+    for line in lines:
         s = line.strip()
-        if not s:
+        m = ep_match(s)
+        if m:
+            cur = counts.setdefault(int(m.group(1)), [0, 0, 0, 0, 0])
+            continue
+        if cur is None or not s:
             continue
+        cur[1] += 1
 
-        if scene_re.match(s):
-            scenes += 1
+        # 场次行必以数字开头：先看首字符，绝大多数行免跑正则
+        if s[0].isdecimal() and scene_match(s):
+            cur[0] += 1
             continue
 
         if s.startswith(RENWU_PREFIX):
             continue
 
-        if s.startswith(TRI) or s.startswith(LBR):
-            stage += 1
+        if s.startswith(_STAGE_PREFIXES):
+            cur[3] += 1
             continue
 
         # OS/VO 归到“舞台/镜头提示”类
         if s.startswith("VO") or ("VO" + FULL_COLON in s) or ("OS" in s):
-            stage += 1
-            vo_os += 1
+            cur[3] += 1
+            cur[4] += 1
             continue
 
         if FULL_COLON in s:
-            dialogue += 1
+            cur[2] += 1
 
-    total = sum(1 for x in ep_lines if (x or "").strip())
-    return EpisodeStats(
-        episode=ep,
-        scenes=scenes,
-        total_lines=total,
-        dialogue_lines=dialogue,
-        stage_lines=stage,
-        vo_os_lines=vo_os,
-    )
+    return counts
 
 
-def build_style_profile(docx_path: str | Path) -> ScriptStyleProfile:
-    p = Path(docx_path)
-    lines = read_docx_lines(p)
-    eps = _parse_episodes(lines)
-    if not eps:
-        raise ValueError(f"未识别到“第N集”标记：{p}")
+# 进程内缓存：(绝对路径, st_mtime_ns, st_size) -> 单个样例的风格画像
+_FILE_PROFILE_MEMO: Dict[Tuple[str, int, int], ScriptStyleProfile] = {}
+
 
-    per_ep = [_episode_stats(ep, eps[ep]) for ep in sorted(eps)]
+def build_style_profile(docx_path: str | Path) -> ScriptStyleProfile:
+    """统计单个样例剧本的风格画像。
 
-    import statistics as st
+    按 (路径, mtime, 大小) 缓存：进程内 dict + 磁盘 JSON（与合并画像同在 ``profile/`` 子目录），
+    样例组合变化时未改动的文件不必重新统计。
+    """
+    p = Path(docx_path).resolve()
+    st = p.stat()
+    fp = (str(p), st.st_mtime_ns, st.st_size)
+    prof = _FILE_PROFILE_MEMO.get(fp)
+    if prof is not None:
+        return prof
+
+    disk = ResponseCache("profile")
+    key = cache_key(_PROFILE_CACHE_VERSION, "file", "|".join(map(str, fp)))
+    cached = disk.get(key)
+    if cached is not None:
+        try:
+            prof = _profile_from_dict(jsonio.loads(cached))
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning("样例画像缓存损坏，重新统计：%s", e)
+
+    if prof is None:
+        prof = _build_style_profile(p)
+        disk.put(key, jsonio.dumps_prompt(asdict(prof)))
+
+    _FILE_PROFILE_MEMO[fp] = prof
+    return prof
+
+
+def _profile_from_dict(d: Dict) -> ScriptStyleProfile:
+    """asdict(ScriptStyleProfile) 的逆操作（episode_range 还原为元组、per_episode 还原为 EpisodeStats）。"""
+    return ScriptStyleProfile(**{
+        **d,
+        "episode_range": tuple(d["episode_range"]),
+        "per_episode": [EpisodeStats(**e) for e in d["per_episode"]],
+    })
+
+
+def _build_style_profile(p: Path) -> ScriptStyleProfile:
+    # 直接遍历缓存中的共享行列表（只读），不像 read_docx_lines 那样先复制一份
+    per_ep = stream_episode_stats(load_docx_lines_shared(p))
+    if not per_ep:
+        raise ValueError(f"未识别到“第N集”标记：{p}")
 
-    avg_scenes = float(st.mean(s.scenes for s in per_ep))
-    avg_total = float(st.mean(s.total_lines for s in per_ep))
-    avg_dialogue = float(st.mean(s.dialogue_lines for s in per_ep))
-    avg_stage = float(st.mean(s.stage_lines for s in per_ep))
-    avg_vo_os = float(st.mean(s.vo_os_lines for s in per_ep))
+    # 一次遍历累加各项计数再除以集数（计数都是整数，不需要 statistics.mean 的精确求和）
+    scenes = total = dialogue = stage = vo_os = 0
+    for s in per_ep:
+        scenes += s.scenes
+        total += s.total_lines
+        dialogue += s.dialogue_lines
+        stage += s.stage_lines
+        vo_os += s.vo_os_lines
+    n = len(per_ep)
+    avg_scenes = scenes / n
+    avg_total = total / n
+    avg_dialogue = dialogue / n
+    avg_stage = stage / n
+    avg_vo_os = vo_os / n
 
     return ScriptStyleProfile(
         file=p.name,
         episodes=len(per_ep),
-        episode_range=(min(eps), max(eps)),
+        episode_range=(per_ep[0].episode, per_ep[-1].episode),
         avg_scenes_per_ep=avg_scenes,
         avg_total_lines_per_ep=avg_total,
         avg_dialogue_lines_per_ep=avg_dialogue,
@@ -143,7 +230,64 @@ def build_combined_profile(
     docx_paths : 样例剧本路径列表
     genre : 题材标识（如 "apocalypse" 或 "末世"），提供时会附加题材层信息。
     """
-    profiles = [build_style_profile(p) for p in docx_paths]
+    result: Dict[str, object] = dict(_load_combined_profile(docx_paths))
+
+    # 附加题材层信息
+    if genre:
+        from .genres import load_genre
+        genre_template = load_genre(genre)
+        result["genre_specific"] = genre_template.to_dict()
+
+    return result
+
+
+# 进程内缓存：各样例 (绝对路径, st_mtime_ns, st_size) 组合 -> 合并画像（不含题材层）
+_PROFILE_MEMO: Dict[Tuple[Tuple[str, int, int], ...], Dict[str, object]] = {}
+# 磁盘缓存格式版本（统计规则变化时递增）
+_PROFILE_CACHE_VERSION = "1"
+
+
+def _load_combined_profile(docx_paths: List[Union[str, Path]]) -> Dict[str, object]:
+    """按样例文件指纹缓存合并画像（返回共享 dict，勿修改）。
+
+    两层缓存：进程内 dict + 磁盘 JSON（``<cache_root>/profile/<sha>.json``），
+    constraints / profile 对同一批样例重复运行时跳过 docx 解析与逐集统计。
+    任一样例文件被修改（mtime 或大小变化）后自动失效；JUBEN_GEN_NO_CACHE=1 时跳过磁盘层。
+    """
+    fingerprints = []
+    for path in docx_paths:
+        p = Path(path).resolve()
+        st = p.stat()
+        fingerprints.append((str(p), st.st_mtime_ns, st.st_size))
+    memo_key = tuple(fingerprints)
+    combined = _PROFILE_MEMO.get(memo_key)
+    if combined is not None:
+        return combined
+
+    disk = ResponseCache("profile")
+    key = cache_key(_PROFILE_CACHE_VERSION, *("|".join(map(str, fp)) for fp in fingerprints))
+    cached = disk.get(key)
+    if cached is not None:
+        try:
+            combined = jsonio.loads(cached)
+        except ValueError as e:
+            logger.warning("profile 缓存损坏，重新统计：%s", e)
+
+    if combined is None:
+        combined = _build_combined_profile(docx_paths)
+        disk.put(key, jsonio.dumps_prompt(combined))
+
+    _PROFILE_MEMO[memo_key] = combined
+    return combined
+
+
+def _build_combined_profile(docx_paths: List[Union[str, Path]]) -> Dict[str, object]:
+    # 各样例互不依赖，并行解析（解压 + lxml 解析可重叠）；结果顺序与 docx_paths 一致
+    if len(docx_paths) > 1:
+        with ThreadPoolExecutor(max_workers=min(len(docx_paths), 4)) as pool:
+            profiles = list(pool.map(build_style_profile, docx_paths))
+    else:
+        profiles = [build_style_profile(p) for p in docx_paths]
 
     def mean(xs: List[float]) -> float:
         return float(sum(xs) / max(1, len(xs)))
@@ -171,23 +315,13 @@ def build_combined_profile(
         },
     }
 
-    result: Dict[str, object] = {
+    return {
         "sources": [asdict(p) for p in profiles],
         "universal": universal,
         "target": universal,  # 向后兼容
     }
 
-    # 附加题材层信息
-    if genre:
-        from .genres import load_genre
-        genre_template = load_genre(genre)
-        result["genre_specific"] = genre_template.to_dict()
-
-    return result
-
 
 def save_json(obj: object, path: str | Path) -> None:
-    p = Path(path)
-    p.parent.mkdir(parents=True, exist_ok=True)
-    p.write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
+    jsonio.write_json(path, obj)
 
@@ -2,7 +2,14 @@ from __future__ import annotations
 
 from pathlib import Path
 
-from charset_normalizer import from_path
+from charset_normalizer import from_bytes
+
+try:  # 可选依赖：C 实现的编码探测，比 charset_normalizer 快一个数量级
+    from cchardet import detect as _fast_detect
+except ImportError:  # pragma: no cover - 取决于运行环境
+    _fast_detect = None
+
+_UTF8_BOM = b"\xef\xbb\xbf"
 
 
 def read_text_auto(path: str | Path) -> str:
@@ -12,12 +19,29 @@ def read_text_auto(path: str | Path) -> str:
     说明：
     - 你提供的《地狱游戏》为 gb18030
     - 《末世天灾》为 utf-8
+
+    先按 UTF-8 严格解码（C 实现，绝大多数文件一步到位）；失败时若装了 cchardet 用它探测，
+    最后才回退到纯 Python 的 charset_normalizer 逐编码打分。
     """
-    p = Path(path)
-    best = from_path(str(p)).best()
+    data = Path(path).read_bytes()
+
+    if not data.startswith(_UTF8_BOM):
+        try:
+            return data.decode("utf-8")
+        except UnicodeDecodeError:
+            pass
+
+        if _fast_detect is not None:
+            enc = _fast_detect(data).get("encoding")
+            if enc:
+                try:
+                    return data.decode(enc)
+                except (UnicodeDecodeError, LookupError):
+                    pass
+
+    best = from_bytes(data).best()
     if best is None:
         # 极端情况下兜底：当作 utf-8 读
-        return p.read_text(encoding="utf-8", errors="ignore")
+        return data.decode("utf-8", errors="ignore")
     # CharsetMatch.__str__ 会返回解码后的字符串（内部用 best.encoding）
     return str(best)
-
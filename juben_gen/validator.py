@@ -6,13 +6,13 @@
 
 from __future__ import annotations
 
-import json
 import re
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
 from typing import Dict, List, Optional
 
+from . import jsonio
 from .style_profile import (
     FULL_COLON,
     TRI,
@@ -68,10 +68,19 @@ class ValidationResult:
     issues: List[ValidationIssue] = field(default_factory=list)
 
     def to_dict(self) -> dict:
+        # stats 只有 int 字段，直接组装 dict（asdict 会递归深拷贝每个字段）
+        st = self.stats
         return {
             "passed": self.passed,
             "episode": self.episode,
-            "stats": asdict(self.stats),
+            "stats": {
+                "episode": st.episode,
+                "scene_count": st.scene_count,
+                "total_lines": st.total_lines,
+                "dialogue_lines": st.dialogue_lines,
+                "stage_lines": st.stage_lines,
+                "vo_os_lines": st.vo_os_lines,
+            },
             "issues": [
                 {
                     "type": iss.type.value,
@@ -96,7 +105,7 @@ DEFAULT_TARGET: Dict[str, Dict] = {
 
 # ── 允许的转场标记 ────────────────────────────────────────────────
 
-ALLOWED_TRANSITIONS = {"【切】", "【转】", "【闪回】", "【闪出】"}
+ALLOWED_TRANSITIONS = frozenset({"【切】", "【转】", "【闪回】", "【闪出】"})
 
 # ── 正则 ──────────────────────────────────────────────────────────
 
@@ -104,9 +113,9 @@ ALLOWED_TRANSITIONS = {"【切】", "【转】", "【闪回】", "【闪出】"}
 RE_EP_TITLE = re.compile(r"^" + EP_PREFIX + r"(\d+)" + EP_SUFFIX + r"$")
 
 # 场次行：{ep}-{scene}场  {place}\t{time}\t{in_out}
-# 宽松匹配：允许空格/制表符混用
+# 宽松匹配：允许空格/制表符混用（\s 已含 \t）；日/夜、内/外用字符类，免去分支回溯
 RE_SCENE = re.compile(
-    r"^(\d+)-(\d+)场\s+(.+?)[\s\t]+(日|夜)[\s\t]+(内|外)\s*$"
+    r"^(\d+)-(\d+)场\s+(.+?)\s+([日夜])\s+([内外])\s*$"
 )
 
 # 人物行：人物：A、B、C
@@ -120,6 +129,10 @@ RE_DIALOGUE = re.compile(r"^[^▲\s【].+?" + FULL_COLON + r".+")
 
 # 转场行：【切】【转】【闪回】【闪出】
 RE_TRANSITION = re.compile(r"^【.+?】$")
+RBR = "\u3011"  # 】
+
+# 台词行（半角冒号，格式错误但仍归为台词）
+RE_HALF_COLON_DIALOGUE = re.compile(r"^[^\s▲【].+:.+")
 
 # VO/OS 标记
 RE_VO_OS = re.compile(r"\b(VO|OS)\b|" + r"(VO|OS)" + FULL_COLON)
@@ -141,34 +154,52 @@ class LineKind(str, Enum):
 
 def classify_line(line: str) -> LineKind:
     """将单行剧本文本归类。"""
-    s = line.strip()
+    return _classify_stripped(line.strip())
+
+
+def _classify_stripped(s: str) -> LineKind:
+    """classify_line 的主体，s 为已 strip 的行。
+
+    先按首字符分派，每行最多只跑一条可能命中的结构正则（集标题 / 场次）；
+    人物 / 动作 / 转场行用前缀、后缀判断，不走正则。
+    """
     if not s:
         return LineKind.BLANK
-    if RE_EP_TITLE.match(s):
-        return LineKind.EP_TITLE
-    if RE_SCENE.match(s):
-        return LineKind.SCENE
-    if RE_RENWU.match(s):
+    c = s[0]
+    if c == EP_PREFIX:
+        if RE_EP_TITLE.match(s):
+            return LineKind.EP_TITLE
+    elif c.isdecimal():  # 与正则 \d 的字符集一致
+        if RE_SCENE.match(s):
+            return LineKind.SCENE
+    elif s.startswith(RENWU_PREFIX):
         return LineKind.RENWU
-    if RE_STAGE.match(s):
+    elif c == TRI:
         return LineKind.STAGE
-    if RE_TRANSITION.match(s):
-        return LineKind.TRANSITION
+    elif c == LBR:
+        # 等价于 RE_TRANSITION：【 + 至少一个字符 + 】
+        if len(s) > 2 and s[-1] == RBR:
+            return LineKind.TRANSITION
     # VO/OS 行也按 stage+vo_os 统计
-    if s.startswith("VO") or s.startswith("OS") or RE_VO_OS.search(s):
+    if s.startswith(("VO", "OS")) or _is_vo_os_line(s):
         return LineKind.DIALOGUE  # VO/OS 本质是台词的一种变体
     if FULL_COLON in s:
         return LineKind.DIALOGUE
     # 半角冒号的台词行（格式错误但仍归为台词）
-    if re.match(r"^[^\s▲【].+:.+", s):
+    if ":" in s and RE_HALF_COLON_DIALOGUE.match(s):
         return LineKind.DIALOGUE
     return LineKind.UNKNOWN
 
 
 def _is_vo_os_line(line: str) -> bool:
-    """判断是否是 VO/OS 台词行。"""
-    s = line.strip()
-    return bool(RE_VO_OS.search(s))
+    """判断是否是 VO/OS 台词行。
+
+    绝大多数行不含 "VO" / "OS" 子串，先用 C 层子串查找排除，只有含子串时才跑
+    RE_VO_OS 检查单词边界 / 全角冒号（首尾空白不影响结果，无需先 strip）。
+    """
+    if "VO" not in line and "OS" not in line:
+        return False
+    return RE_VO_OS.search(line) is not None
 
 
 # ── 格式校验 ──────────────────────────────────────────────────────
@@ -189,10 +220,10 @@ def _check_format(lines: List[str]) -> tuple[List[ValidationIssue], EpisodeValid
             expect_renwu_after_scene = False
             continue
 
-        kind = classify_line(raw_line)
+        kind = _classify_stripped(s)
         stats.total_lines += 1
 
-        if kind == LineKind.EP_TITLE:
+        if kind is LineKind.EP_TITLE:
             has_ep_title = True
             m = RE_EP_TITLE.match(s)
             if m:
@@ -200,13 +231,13 @@ def _check_format(lines: List[str]) -> tuple[List[ValidationIssue], EpisodeValid
             expect_renwu_after_scene = False
             continue
 
-        if kind == LineKind.SCENE:
+        if kind is LineKind.SCENE:
             has_scene = True
             stats.scene_count += 1
             expect_renwu_after_scene = True
             continue
 
-        if kind == LineKind.RENWU:
+        if kind is LineKind.RENWU:
             # 人物行格式检查：顿号分隔
             content = s[len(RENWU_PREFIX):]
             if content and "," in content and "、" not in content:
@@ -219,12 +250,12 @@ def _check_format(lines: List[str]) -> tuple[List[ValidationIssue], EpisodeValid
             expect_renwu_after_scene = False
             continue
 
-        if kind == LineKind.STAGE:
+        if kind is LineKind.STAGE:
             stats.stage_lines += 1
             expect_renwu_after_scene = False
             continue
 
-        if kind == LineKind.TRANSITION:
+        if kind is LineKind.TRANSITION:
             if s not in ALLOWED_TRANSITIONS:
                 issues.append(ValidationIssue(
                     type=IssueType.FORMAT,
@@ -235,9 +266,9 @@ def _check_format(lines: List[str]) -> tuple[List[ValidationIssue], EpisodeValid
             expect_renwu_after_scene = False
             continue
 
-        if kind == LineKind.DIALOGUE:
+        if kind is LineKind.DIALOGUE:
             stats.dialogue_lines += 1
-            if _is_vo_os_line(raw_line):
+            if _is_vo_os_line(s):
                 stats.vo_os_lines += 1
             # 检查是否用了半角冒号
             if ":" in s and FULL_COLON not in s:
@@ -379,11 +410,14 @@ def _check_ratios(stats: EpisodeValidation) -> List[ValidationIssue]:
 
 
 def load_target(profile_path: str | Path = "juben_gen/style_profile.json") -> Dict[str, Dict]:
-    """从 style_profile.json 加载 target 区间。找不到则返回默认值。"""
+    """从 style_profile.json 加载 target 区间。找不到则返回默认值。
+
+    解析结果按文件修改时间缓存（逐集校验时不重复读盘），返回共享对象，调用方不应修改。
+    """
     p = Path(profile_path)
     if not p.exists():
         return DEFAULT_TARGET
-    data = json.loads(p.read_text(encoding="utf-8"))
+    data = jsonio.load_json_cached(p)
     return data.get("target", DEFAULT_TARGET)
 
 
@@ -404,9 +438,11 @@ def validate_episode(
     """
     if target is None:
         target = DEFAULT_TARGET
+    return _validate_lines(text.split("\n"), target)
 
-    lines = text.split("\n")
 
+def _validate_lines(lines: List[str], target: Dict[str, Dict]) -> ValidationResult:
+    """校验已按行切好的单集剧本（validate_episode / validate_script 共用）。"""
     # 1. 格式校验 + 统计
     format_issues, stats = _check_format(lines)
 
@@ -417,7 +453,7 @@ def validate_episode(
     ratio_issues = _check_ratios(stats)
 
     all_issues = format_issues + count_issues + ratio_issues
-    has_error = any(iss.level == IssueLevel.ERROR for iss in all_issues)
+    has_error = any(iss.level is IssueLevel.ERROR for iss in all_issues)
 
     return ValidationResult(
         passed=not has_error,
@@ -445,27 +481,33 @@ def validate_script(
     if target is None:
         target = DEFAULT_TARGET
 
-    # 按「第N集」分割
-    ep_pattern = re.compile(r"^(" + EP_PREFIX + r"\d+" + EP_SUFFIX + r")$", re.MULTILINE)
-    splits = ep_pattern.split(text)
-
-    # splits 形如 [前文, "第1集", 内容, "第2集", 内容, ...]
+    # 整份文本只切一次行，按「第N集」标题行的下标切片出各集（标题须独占一行）
+    lines = text.split("\n")
+    heads = [i for i, line in enumerate(lines) if line.startswith(EP_PREFIX) and RE_EP_TITLE.match(line)]
     results: List[ValidationResult] = []
-    i = 1
-    while i < len(splits):
-        ep_title = splits[i]
-        ep_body = splits[i + 1] if i + 1 < len(splits) else ""
-        ep_text = ep_title + "\n" + ep_body
-        results.append(validate_episode(ep_text, target))
-        i += 2
+    for k, i in enumerate(heads):
+        # 与历史上「标题 + "\n" + 标题后原文」再 split 的结果逐行一致：
+        # 标题后补一个空行；非最后一集的切片末尾也补一个空行（原文片段以换行结尾）
+        if k + 1 < len(heads):
+            ep_lines = [lines[i], ""] + lines[i + 1:heads[k + 1]] + [""]
+        else:
+            ep_lines = [lines[i], ""] + lines[i + 1:]
+        results.append(_validate_lines(ep_lines, target))
 
     # 如果没有检测到集标题，整体当作一集校验
     if not results:
-        results.append(validate_episode(text, target))
+        results.append(_validate_lines(lines, target))
 
     return results
 
 
+def _issue_report_line(iss: ValidationIssue) -> str:
+    """单条问题的报告行（一次格式化，不另拼位置字符串）。"""
+    if iss.line_num:
+        return f"    [L{iss.line_num}] {iss.description}"
+    return f"    [整集] {iss.description}"
+
+
 def format_report(results: List[ValidationResult]) -> str:
     """将校验结果格式化为可读文本报告。"""
     lines: List[str] = []
@@ -475,28 +517,28 @@ def format_report(results: List[ValidationResult]) -> str:
     for r in results:
         ep_label = f"第{r.episode}集" if r.episode else "未知集"
         status = "PASS" if r.passed else "FAIL"
+        st = r.stats
         lines.append(f"== {ep_label} {status} ==")
         lines.append(
-            f"  统计：场景={r.stats.scene_count}  总行={r.stats.total_lines}  "
-            f"台词={r.stats.dialogue_lines}  舞台={r.stats.stage_lines}  "
-            f"VO/OS={r.stats.vo_os_lines}"
+            f"  统计：场景={st.scene_count}  总行={st.total_lines}  "
+            f"台词={st.dialogue_lines}  舞台={st.stage_lines}  "
+            f"VO/OS={st.vo_os_lines}"
         )
 
-        errors = [iss for iss in r.issues if iss.level == IssueLevel.ERROR]
-        warnings = [iss for iss in r.issues if iss.level == IssueLevel.WARNING]
+        # 一次遍历分到错误 / 警告两组（问题只有这两种级别）
+        errors: List[ValidationIssue] = []
+        warnings: List[ValidationIssue] = []
+        for iss in r.issues:
+            (errors if iss.level is IssueLevel.ERROR else warnings).append(iss)
         total_errors += len(errors)
         total_warnings += len(warnings)
 
         if errors:
             lines.append(f"  错误（{len(errors)}）：")
-            for iss in errors:
-                loc = f"L{iss.line_num}" if iss.line_num else "整集"
-                lines.append(f"    [{loc}] {iss.description}")
+            lines.extend(map(_issue_report_line, errors))
         if warnings:
             lines.append(f"  警告（{len(warnings)}）：")
-            for iss in warnings:
-                loc = f"L{iss.line_num}" if iss.line_num else "整集"
-                lines.append(f"    [{loc}] {iss.description}")
+            lines.extend(map(_issue_report_line, warnings))
         if not errors and not warnings:
             lines.append("  无问题")
         lines.append("")
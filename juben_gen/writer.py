@@ -3,17 +3,19 @@
 流程：
 1. 加载节拍表 JSON
 2. 逐集调用 Claude API（write 角色）
-3. 第2集起注入前一集摘要保持连贯性
+3. 第2集起注入前一集摘要保持连贯性（并发模式下改用上一集节拍表）
 4. 双格式输出：TXT + DOCX
 """
 
 from __future__ import annotations
 
-import json
 import logging
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
 
+from . import jsonio
+from .cache import ResponseCache, llm_cache_key
 from .config import AppConfig, RoleConfig, maybe_load_config
 from .docx_io import write_docx_lines
 from .llm_clients import ClaudeClient, LLMResponse
@@ -22,13 +24,17 @@ from .rules import AdaptRules
 
 logger = logging.getLogger(__name__)
 
+# 单集剧本 / 前情摘要请求的输出上限（同时计入响应缓存 key）
+_EPISODE_MAX_TOKENS = 8192
+_SUMMARY_MAX_TOKENS = 1024
+
 
 def load_plan(plan_path: str | Path) -> List[Dict]:
-    """读取节拍表 JSON 文件。"""
+    """读取节拍表 JSON 文件（按修改时间缓存，返回共享对象，调用方不应修改）。"""
     p = Path(plan_path)
     if not p.exists():
         raise FileNotFoundError(f"节拍表 JSON 不存在：{p}")
-    data = json.loads(p.read_text(encoding="utf-8"))
+    data = jsonio.load_json_cached(p)
     if not isinstance(data, list):
         raise ValueError(f"节拍表应为 JSON 数组，实际类型为 {type(data).__name__}")
     return data
@@ -44,15 +50,18 @@ def generate_episode(
     role_cfg: RoleConfig,
     prev_summary: str = "",
     sample_script: str = "",
+    cache: Optional[ResponseCache] = None,
 ) -> str:
     """生成单集剧本。
 
+    cache 不为 None 时，prompt + 模型完全一致则直接复用上次生成结果。
+
     Returns
     -------
     剧本纯文本。
     """
     ep_num = episode_plan.get("ep", "?")
-    episode_plan_json = json.dumps(episode_plan, ensure_ascii=False, indent=2)
+    episode_plan_json = jsonio.dumps_prompt(episode_plan)
 
     user_msg = prompt_write_episode(
         rules=rules,
@@ -62,6 +71,18 @@ def generate_episode(
         sample_script=sample_script,
     )
 
+    key = llm_cache_key(
+        system_prompt, user_msg,
+        model=role_cfg.model,
+        max_tokens=_EPISODE_MAX_TOKENS,
+        thinking=role_cfg.thinking,
+        budget_tokens=role_cfg.budget_tokens,
+    )
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
     logger.info("生成第 %s 集剧本（模型=%s）", ep_num, role_cfg.model)
     response: LLMResponse = client.chat(
         model=role_cfg.model,
@@ -69,11 +90,13 @@ def generate_episode(
         messages=[{"role": "user", "content": user_msg}],
         thinking=role_cfg.thinking,
         budget_tokens=role_cfg.budget_tokens,
-        max_tokens=8192,
+        max_tokens=_EPISODE_MAX_TOKENS,
     )
 
     script = response.text.strip()
     logger.info("第 %s 集剧本生成完成（%d 字符）", ep_num, len(script))
+    if cache is not None:
+        cache.put(key, script)
     return script
 
 
@@ -82,6 +105,7 @@ def generate_summary(
     episode_script: str,
     client: ClaudeClient,
     role_cfg: RoleConfig,
+    cache: Optional[ResponseCache] = None,
 ) -> str:
     """从剧本中提取关键摘要（角色状态、剧情进展、未解钩子），用于下一集连贯性注入。
 
@@ -96,15 +120,26 @@ def generate_summary(
         "【输出】直接输出摘要文本，不要加标题或解释。\n\n"
         f"【剧本】\n{episode_script}"
     )
+    system = "你是短剧创作助手，擅长提取剧情要点。"
+
+    # 摘要请求固定不开 thinking（与下方 chat 调用一致）
+    key = llm_cache_key(system, user_msg, model=role_cfg.model, max_tokens=_SUMMARY_MAX_TOKENS)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
 
     response: LLMResponse = client.chat(
         model=role_cfg.model,
-        system="你是短剧创作助手，擅长提取剧情要点。",
+        system=system,
         messages=[{"role": "user", "content": user_msg}],
         thinking=False,
-        max_tokens=1024,
+        max_tokens=_SUMMARY_MAX_TOKENS,
     )
-    return response.text.strip()
+    summary = response.text.strip()
+    if cache is not None:
+        cache.put(key, summary)
+    return summary
 
 
 def save_episode(
@@ -132,6 +167,17 @@ def save_episode(
     return txt_path, docx_path
 
 
+def _iter_full_lines(episodes: List[str]) -> Iterator[str]:
+    """逐行产出 ``"\\n\\n".join(episodes).split("\\n")`` 的结果，不拼接整本剧本。"""
+    if not episodes:
+        yield ""
+        return
+    for i, ep in enumerate(episodes):
+        if i:
+            yield ""
+        yield from ep.split("\n")
+
+
 def save_full_script(
     episodes: List[str],
     output_dir: str | Path,
@@ -145,19 +191,41 @@ def save_full_script(
     d = Path(output_dir)
     d.mkdir(parents=True, exist_ok=True)
 
-    full_text = "\n\n".join(episodes)
-
+    # TXT 逐集写入，不再先拼出整本剧本字符串；DOCX 由 write_docx_lines 按行组装（仍整份在内存中生成 document.xml）
     txt_path = d / "script_full.txt"
-    txt_path.write_text(full_text, encoding="utf-8")
+    with open(txt_path, "w", encoding="utf-8") as f:
+        for i, ep in enumerate(episodes):
+            if i:
+                f.write("\n\n")
+            f.write(ep)
 
     docx_path = d / "script_full.docx"
-    lines = full_text.split("\n")
-    write_docx_lines(docx_path, lines, title="完整剧本")
+    write_docx_lines(docx_path, _iter_full_lines(episodes), title="完整剧本")
 
     logger.info("合并剧本已保存：%s, %s", txt_path, docx_path)
     return txt_path, docx_path
 
 
+def _plan_summary(episode_plan: Dict) -> str:
+    """用节拍表字段拼出“前一集摘要”（并发生成时替代 LLM 摘要）。"""
+    lines = [f"（依据第{episode_plan.get('ep', '?')}集节拍表）"]
+    for label, key in (
+        ("本集目标", "core_goal"),
+        ("核心冲突", "core_conflict"),
+        ("反转", "turn"),
+        ("爽点", "highlight"),
+    ):
+        value = episode_plan.get(key)
+        if value:
+            lines.append(f"{label}：{value}")
+    hook = episode_plan.get("end_hook")
+    if isinstance(hook, dict):
+        parts = [str(hook[k]) for k in ("type", "last_image", "last_line") if hook.get(k)]
+        if parts:
+            lines.append("结尾钩子：" + " / ".join(parts))
+    return "\n".join(lines)
+
+
 def generate_all_episodes(
     *,
     plan_path: str | Path,
@@ -166,6 +234,8 @@ def generate_all_episodes(
     constraints_path: str = "juben_gen/constraints.fused.json",
     output_dir: str | Path,
     sample_script: str = "",
+    use_cache: bool = True,
+    concurrency: Optional[int] = None,
 ) -> List[str]:
     """执行完整的逐集剧本生成流程。
 
@@ -177,6 +247,10 @@ def generate_all_episodes(
     constraints_path : 融合约束 JSON 路径
     output_dir : 输出目录
     sample_script : 样例剧本片段（few-shot），为空则跳过
+    use_cache : 是否启用磁盘缓存（逐集剧本与摘要，prompt 不变时跳过 API 调用）
+    concurrency : 同时生成的集数，为 None 时取 config.concurrency.max_workers。
+        为 1 时逐集串行并注入前一集剧本摘要；大于 1 时各集并发生成，
+        前情改用上一集节拍表（不再等待上一集剧本和摘要）
 
     Returns
     -------
@@ -204,15 +278,13 @@ def generate_all_episodes(
         max_attempts=cfg.retry.max_attempts,
         base_delay=cfg.retry.base_delay,
     )
+    cache = ResponseCache("write", enabled=use_cache)
+    io_pool = ThreadPoolExecutor(max_workers=1)
+    saves: List[Future] = []
 
-    # 5. 逐集生成
-    episodes: List[str] = []
-    prev_summary = ""
-
-    for episode_plan in plan:
-        ep_num = episode_plan.get("ep", len(episodes) + 1)
-
-        # 生成剧本
+    def _write_one(i: int, prev_summary: str) -> str:
+        episode_plan = plan[i]
+        ep_num = episode_plan.get("ep", i + 1)
         script = generate_episode(
             episode_plan=episode_plan,
             rules=rules,
@@ -222,20 +294,46 @@ def generate_all_episodes(
             role_cfg=write_cfg,
             prev_summary=prev_summary,
             sample_script=sample_script,
+            cache=cache,
         )
-        episodes.append(script)
-
-        # 保存分集文件
-        save_episode(script, ep_num, output_dir)
-
-        # 为下一集生成摘要
-        if episode_plan != plan[-1]:
-            prev_summary = generate_summary(
-                episode_script=script,
-                client=client,
-                role_cfg=write_cfg,
-            )
-            logger.info("第 %s 集摘要已生成（%d 字符）", ep_num, len(prev_summary))
+        # TXT/DOCX 交给后台线程落盘，不挡住下一次 API 调用（摘要 / 下一集）
+        saves.append(io_pool.submit(save_episode, script, ep_num, output_dir))
+        return script
+
+    # 5. 逐集生成
+    max_workers = concurrency or cfg.concurrency.max_workers
+    episodes: List[str] = []
+    try:
+        if max_workers <= 1:
+            # 串行：第2集起注入前一集剧本的 LLM 摘要
+            prev_summary = ""
+            for i in range(len(plan)):
+                script = _write_one(i, prev_summary)
+                episodes.append(script)
+
+                # 为下一集生成摘要
+                if i < len(plan) - 1:
+                    prev_summary = generate_summary(
+                        episode_script=script,
+                        client=client,
+                        role_cfg=write_cfg,
+                        cache=cache,
+                    )
+                    logger.info("第 %s 集摘要已生成（%d 字符）", plan[i].get("ep", i + 1), len(prev_summary))
+        else:
+            # 并发：各集不再等待上一集剧本，连贯性改由上一集节拍表提供
+            logger.info("并发生成剧本（max_workers=%d）", max_workers)
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                futures = [
+                    pool.submit(_write_one, i, _plan_summary(plan[i - 1]) if i else "")
+                    for i in range(len(plan))
+                ]
+                episodes = [f.result() for f in futures]
+    finally:
+        # 等待逐集文件全部写完，写入出错时照常抛出
+        io_pool.shutdown(wait=True)
+        for f in saves:
+            f.result()
 
     # 6. 保存合并版本
     save_full_script(episodes, output_dir)